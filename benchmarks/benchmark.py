@@ -0,0 +1,257 @@
+import argparse
+import ctypes
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+import zlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from ctsgen3.analysis.statistics import PixelStatistics
+from ctsgen3.conversion.conversion import FRAME_SHAPE, frames_to_float
+from ctsgen3.device.device import ReplayDevice, synthetic_packets
+from ctsgen3.recording.archive import ArchiveCodec
+from ctsgen3.recording.recording import record_type
+from ctsgen3.registers.dtypes import struct_dtype
+from ctsgen3.spi.crc import crc_failures, crc_failures_batch
+from ctsgen3.spi.detections import DetectionTable
+from ctsgen3.spi.dtypes import SPI_PACKET_DTYPE
+from ctsgen3.spi.reader import SpiPacketReader
+from ctsgen3.spi.spi import SpiPacket
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+"""
+Results of an earlier run on this machine that `run` compares against, written by `--save`. Timings only compare on the
+same machine and load, so the file is not committed.
+"""
+
+BATCH_SIZE = 4096
+
+
+class Benchmark(NamedTuple):
+    """
+    A timed hot path operation, reported in seconds per item (e.g. per packet) so batched and per-packet variants of
+    the same operation compare directly.
+    """
+
+    name: str
+    setup: Callable[[], Callable[[], object]]  #: prepares inputs and returns the callable to time
+    items: int = 1  #: items processed per call
+
+
+def _packets(count: int) -> bytes:
+    return b"".join(itertools.islice(synthetic_packets(), count))
+
+
+def _parse_from_buffer_copy() -> Callable[[], object]:
+    raw = _packets(1)
+    return lambda: SpiPacket.from_buffer_copy(raw)
+
+
+def _parse_memmove() -> Callable[[], object]:
+    raw = _packets(1)
+    packet = SpiPacket()  # referenced by the lambda, so it outlives the benchmark
+    return lambda: ctypes.memmove(ctypes.addressof(packet), raw, len(raw))
+
+
+def _parse_frombuffer_batch() -> Callable[[], object]:
+    raw = _packets(BATCH_SIZE)
+    return lambda: np.frombuffer(raw, SPI_PACKET_DTYPE).copy()
+
+
+def _crc_failures() -> Callable[[], object]:
+    packet = SpiPacket.from_buffer_copy(_packets(1))
+    return lambda: crc_failures(packet)
+
+
+def _crc_failures_batch() -> Callable[[], object]:
+    raw = np.frombuffer(_packets(BATCH_SIZE), np.uint8).reshape(BATCH_SIZE, -1)
+    return lambda: crc_failures_batch(raw)
+
+
+def _convert_frame() -> Callable[[], object]:
+    frame = np.ctypeslib.as_array(SpiPacket.from_buffer_copy(_packets(1)).thermal_frame.thermal_frame)
+    out = np.empty(FRAME_SHAPE, np.float32)
+    return lambda: frames_to_float(frame, out=out)
+
+
+def _convert_frame_astype() -> Callable[[], object]:
+    frame = np.ctypeslib.as_array(SpiPacket.from_buffer_copy(_packets(1)).thermal_frame.thermal_frame)
+    return lambda: frame.astype(np.float32).reshape(FRAME_SHAPE) / 256.0
+
+
+def _convert_frames_batch() -> Callable[[], object]:
+    frames = np.frombuffer(_packets(BATCH_SIZE), SPI_PACKET_DTYPE)["thermal_frame"]["thermal_frame"]
+    out = np.empty((BATCH_SIZE,) + FRAME_SHAPE, np.float32)
+    return lambda: frames_to_float(frames, out=out)
+
+
+def _pixel_statistics_batch() -> Callable[[], object]:
+    frames = frames_to_float(np.frombuffer(_packets(BATCH_SIZE), SPI_PACKET_DTYPE)["thermal_frame"]["thermal_frame"])
+    return lambda: PixelStatistics().update(frames)
+
+
+def _detections_batch() -> Callable[[], object]:
+    detections = np.frombuffer(_packets(BATCH_SIZE), SPI_PACKET_DTYPE)["cv_detections"]["cv_detections"]
+    return lambda: DetectionTable.from_detections(detections)
+
+
+def _detections_loop() -> Callable[[], object]:
+    packet = SpiPacket.from_buffer_copy(_packets(1))
+    return lambda: [
+        (detection.id, detection.peak_temperature) for detection in packet.cv_detections.cv_detections if detection.id
+    ]
+
+
+def _records(count: int) -> npt.NDArray[Any]:
+    records = np.zeros(count, struct_dtype(record_type(SpiPacket)))
+    records["timestamp"] = np.arange(count) / 60.0
+    records["packet"] = np.frombuffer(_packets(count), SPI_PACKET_DTYPE)
+    return records
+
+
+def _archive_encode() -> Callable[[], object]:
+    records = _records(BATCH_SIZE)
+    codec = ArchiveCodec()
+    return lambda: zlib.compress(codec.encode(records))
+
+
+def _archive_decode() -> Callable[[], object]:
+    codec = ArchiveCodec()
+    data = zlib.compress(codec.encode(_records(BATCH_SIZE)))
+    return lambda: codec.decode(zlib.decompress(data), BATCH_SIZE)
+
+
+def _end_to_end() -> Callable[[], object]:
+    reader = SpiPacketReader(ReplayDevice(itertools.cycle(list(itertools.islice(synthetic_packets(), 256)))))
+    packet = SpiPacket()
+    return lambda: reader.next_frame(packet)
+
+
+def _import(module: str) -> Callable[[], Callable[[], object]]:
+    # a fresh interpreter per import, which fails if the import pulls in the hardware or GUI backends
+    statement = f"import sys, {module}; assert not {{'ft4222', 'matplotlib'}} & set(sys.modules)" if module else "pass"
+    return lambda: lambda: subprocess.run([sys.executable, "-c", statement], check=True)
+
+
+BENCHMARKS = [
+    Benchmark("parse.from_buffer_copy", _parse_from_buffer_copy),
+    Benchmark("parse.memmove", _parse_memmove),
+    Benchmark("parse.frombuffer_batch", _parse_frombuffer_batch, BATCH_SIZE),
+    Benchmark("crc.crc_failures", _crc_failures),
+    Benchmark("crc.crc_failures_batch", _crc_failures_batch, BATCH_SIZE),
+    Benchmark("conversion.frames_to_float", _convert_frame),
+    Benchmark("conversion.astype", _convert_frame_astype),
+    Benchmark("conversion.frames_to_float_batch", _convert_frames_batch, BATCH_SIZE),
+    Benchmark("analysis.pixel_statistics_batch", _pixel_statistics_batch, BATCH_SIZE),
+    Benchmark("detections.from_detections_batch", _detections_batch, BATCH_SIZE),
+    Benchmark("detections.python_loop", _detections_loop),
+    Benchmark("archive.encode_zlib", _archive_encode, BATCH_SIZE),
+    Benchmark("archive.decode_zlib", _archive_decode, BATCH_SIZE),
+    Benchmark("end_to_end.next_frame", _end_to_end),
+    Benchmark("import.interpreter", _import("")),
+    Benchmark("import.spi", _import("ctsgen3.spi.spi")),
+    Benchmark("import.recording", _import("ctsgen3.recording.recording")),
+    Benchmark("import.reader", _import("ctsgen3.spi.reader")),
+]
+"""
+Packet parsing, CRC validation, fixed point conversion, per-pixel statistics, detection decoding, archive encoding
+and decoding, end to end frames from a [ReplayDevice][ctsgen3.device.device.ReplayDevice] with no frame rate limit (so
+the host is the bottleneck), and the startup time of a fresh interpreter importing the offline modules (compare
+against `import.interpreter`).
+"""
+
+
+def measure(benchmark: Benchmark, repeat: int = 5) -> float:
+    """
+    Best of `repeat` timings of `benchmark`, in seconds per item. Each timing runs the callable enough times to take at
+    least 0.2 seconds, and the best is reported as the least disturbed by other load.
+    """
+    timer = timeit.Timer(benchmark.setup())
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number / benchmark.items
+
+
+def run(
+    benchmarks: Sequence[Benchmark] = BENCHMARKS,
+    baselines: Optional[Dict[str, float]] = None,
+    tolerance: float = 0.25,
+    repeat: int = 5,
+) -> Dict[str, float]:
+    """
+    Measure `benchmarks`, printing each result beside its baseline if there is one. Results slower than the baseline
+    by more than `tolerance` (a fraction) are flagged as regressions.
+    """
+    results = {}
+    for benchmark in benchmarks:
+        seconds = results[benchmark.name] = measure(benchmark, repeat)
+        line = f"{benchmark.name:36} {seconds * 1e6:10.3f}us {1 / seconds:12.0f}/s"
+        baseline = (baselines or {}).get(benchmark.name)
+        if baseline is not None:
+            ratio = seconds / baseline
+            line += f"  baseline {baseline * 1e6:10.3f}us  x{ratio:.2f}"
+            if ratio > 1 + tolerance:
+                line += "  REGRESSION"
+        print(line, flush=True)
+    return results
+
+
+def regressions(results: Dict[str, float], baselines: Dict[str, float], tolerance: float = 0.25) -> List[str]:
+    """
+    Names of `results` slower than their baseline by more than `tolerance`.
+    """
+    return [
+        name for name, seconds in results.items() if name in baselines and seconds > baselines[name] * (1 + tolerance)
+    ]
+
+
+def load_baselines(path: str = BASELINES_PATH) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        baselines: Dict[str, float] = json.load(file)["results"]
+    return baselines
+
+
+def save_baselines(results: Dict[str, float], path: str = BASELINES_PATH) -> None:
+    with open(path, "w") as file:
+        json.dump(
+            {
+                "machine": f"{platform.machine()} {platform.processor()}",
+                "python": platform.python_version(),
+                "results": results,
+            },
+            file,
+            indent=4,
+        )
+        file.write("\n")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the benchmarks and exit with status 1 if any regressed against the baselines saved earlier on this machine.
+    """
+    parser = argparse.ArgumentParser(description="Run the ctsgen3 hot path benchmarks.")
+    parser.add_argument("-k", dest="pattern", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baselines", default=BASELINES_PATH, help="baselines JSON file from this machine")
+    parser.add_argument("--save", action="store_true", help="store the results as this machine's baselines")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction of the baseline")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    baselines = load_baselines(args.baselines)
+    selected = [benchmark for benchmark in BENCHMARKS if args.pattern in benchmark.name]
+    results = run(selected, baselines, args.tolerance, args.repeat)
+    if args.save:
+        save_baselines({**baselines, **results}, args.baselines)
+        return 0
+    return 1 if regressions(results, baselines, args.tolerance) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from ctsgen3.conversion.conversion import FRAME_SHAPE, frames_to_float
+from ctsgen3.recording.recording import Recording
+
+METADATA_COLUMNS: Dict[str, Tuple[str, str]] = {
+    "exposure": ("EXPOSURE_0x05", "exposure"),
+    "luminosity": ("LUMINOSITY_0x06", "luminosity"),
+    "image_sensor_temp": ("IS_TEMP_0x07", "image_sensor_temp"),
+}
+"""
+Default `{column: (register, field)}` metadata copied into the per-frame statistics, to correlate with the frames.
+"""
+
+FRAME_STATISTICS = ("mean", "std", "min", "max")
+
+
+class PixelStatistics:
+    """
+    Per-pixel count, mean, variance, minimum and maximum over a stream of frames, in degrees C.
+
+    Each [update][ctsgen3.analysis.statistics.PixelStatistics.update] reduces a whole chunk of frames with vectorised
+    NumPy operations and merges it into the running moments with Chan et al.'s parallel form of Welford's algorithm, so
+    the result is numerically stable however many frames are added, memory does not grow with them, and statistics of
+    separate recordings (or workers) can be combined with [merge][ctsgen3.analysis.statistics.PixelStatistics.merge].
+    """
+
+    def __init__(self, shape: Tuple[int, ...] = FRAME_SHAPE) -> None:
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        """
+        Sum of squared deviations from the mean.
+        """
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+
+    def update(self, frames: npt.NDArray[np.floating[Any]]) -> None:
+        """
+        Add `frames`, an array of shape `(N, *shape)`.
+        """
+        if not len(frames):
+            return
+        mean = frames.mean(axis=0, dtype=np.float64)
+        deviations = np.subtract(frames, mean, dtype=np.float64)
+        m2 = np.einsum("i...,i...->...", deviations, deviations)  # sum of squares without a squared temporary
+        self._combine(len(frames), mean, m2, frames.min(axis=0), frames.max(axis=0))
+
+    def merge(self, other: "PixelStatistics") -> None:
+        """
+        Add the frames summarised by `other`.
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(
+        self,
+        count: int,
+        mean: npt.NDArray[np.float64],
+        m2: npt.NDArray[np.float64],
+        minimum: npt.NDArray[Any],
+        maximum: npt.NDArray[Any],
+    ) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * (count / total)
+        self.m2 += m2 + delta**2 * (self.count * count / total)
+        self.count = total
+        np.minimum(self.min, minimum, out=self.min)
+        np.maximum(self.max, maximum, out=self.max)
+
+    @property
+    def variance(self) -> npt.NDArray[np.float64]:
+        """
+        Sample variance of each pixel over time (NaN until two frames have been added).
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance: npt.NDArray[np.float64] = self.m2 / (self.count - 1)
+        return variance
+
+    @property
+    def temporal_noise(self) -> npt.NDArray[np.float64]:
+        """
+        Standard deviation of each pixel over time.
+        """
+        return np.sqrt(self.variance)
+
+    @property
+    def netd(self) -> float:
+        """
+        NETD-style noise figure: the mean over pixels of the temporal noise, in degrees C (K). Only meaningful for frames
+        of a constant scene, e.g. a blackbody.
+        """
+        return float(self.temporal_noise.mean())
+
+    @property
+    def spatial_noise(self) -> float:
+        """
+        Standard deviation over pixels of the per-pixel means, i.e. the fixed pattern noise.
+        """
+        return float(self.mean.std())
+
+
+class RecordingStatistics:
+    """
+    [PixelStatistics][ctsgen3.analysis.statistics.PixelStatistics] of the thermal frames of a stream of records, plus a
+    per-frame table [frames][ctsgen3.analysis.statistics.RecordingStatistics.frames] with each record's timestamp, the
+    [FRAME_STATISTICS][ctsgen3.analysis.statistics.FRAME_STATISTICS] of its frame and the metadata `columns` (see
+    [METADATA_COLUMNS][ctsgen3.analysis.statistics.METADATA_COLUMNS]), to correlate with.
+
+    The per-frame table is about 1/40th of the size of the records, so recordings larger than RAM can be summarised;
+    use [recording_statistics][ctsgen3.analysis.statistics.recording_statistics] for a whole recording.
+    """
+
+    def __init__(self, columns: Optional[Dict[str, Tuple[str, str]]] = None) -> None:
+        self.columns = METADATA_COLUMNS if columns is None else columns
+        self.pixels = PixelStatistics()
+        self.dtype = np.dtype(
+            [("timestamp", "<f8")]
+            + [(name, "<f4") for name in FRAME_STATISTICS]
+            + [(name, "<f8") for name in self.columns]
+        )
+        self._chunks: List[npt.NDArray[Any]] = []
+        self._buffer = np.empty((0,) + FRAME_SHAPE, np.float32)
+
+    def update(self, records: npt.NDArray[Any]) -> None:
+        """
+        Add a chunk of [Recording][ctsgen3.recording.recording.Recording] records, e.g. from
+        [chunks][ctsgen3.recording.recording.Recording.chunks]. Metadata columns are left NaN if the records have no
+        metadata section.
+        """
+        if len(records) > len(self._buffer):
+            self._buffer = np.empty((len(records),) + FRAME_SHAPE, np.float32)
+        packets = records["packet"]
+        frames = frames_to_float(packets["thermal_frame"]["thermal_frame"], out=self._buffer[: len(records)])
+        self.pixels.update(frames)
+        table = np.full(len(records), np.nan, self.dtype)
+        table["timestamp"] = records["timestamp"]
+        table["mean"] = frames.mean(axis=(1, 2))
+        table["std"] = frames.std(axis=(1, 2))
+        table["min"] = frames.min(axis=(1, 2))
+        table["max"] = frames.max(axis=(1, 2))
+        if "metadata" in (packets.dtype.names or ()):
+            metadata = packets["metadata"]["metadata"]
+            for name, (register, field) in self.columns.items():
+                table[name] = metadata[register][field]
+        self._chunks.append(table)
+
+    @property
+    def frames(self) -> npt.NDArray[Any]:
+        """
+        Per-frame structured array of every record added so far.
+        """
+        if len(self._chunks) != 1:
+            self._chunks = [np.concatenate(self._chunks) if self._chunks else np.empty(0, self.dtype)]
+        return self._chunks[0]
+
+    def correlation(self, statistic: str = "mean") -> Dict[str, float]:
+        """
+        Pearson correlation of per-frame `statistic` with each metadata column, NaN for a constant column.
+        """
+        frames = self.frames
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {name: float(np.corrcoef(frames[statistic], frames[name])[0, 1]) for name in self.columns}
+
+    def summary(self) -> str:
+        pixels = self.pixels
+        lines = [
+            f"{pixels.count} frames, {pixels.mean.mean():.3f} C mean, {pixels.min.min():.3f} to {pixels.max.max():.3f} C",
+            f"NETD {pixels.netd * 1e3:.1f} mK, spatial noise {pixels.spatial_noise * 1e3:.1f} mK",
+        ]
+        lines.extend(
+            f"correlation of frame mean with {name}: {correlation:+.3f}"
+            for name, correlation in self.correlation().items()
+        )
+        return "\n".join(lines)
+
+
+def recording_statistics(
+    recording: Recording,
+    chunk_size: int = 4096,
+    valid_only: bool = True,
+    columns: Optional[Dict[str, Tuple[str, str]]] = None,
+) -> RecordingStatistics:
+    """
+    Statistics of every thermal frame of `recording`, by default skipping records that failed a CRC. The memory-mapped
+    recording is read one chunk of `chunk_size` records at a time, e.g.
+
+    ```
+    statistics = recording_statistics(Recording("blackbody.cts"))
+    noise = statistics.pixels.temporal_noise  # (PIXEL_HEIGHT, PIXEL_WIDTH)
+    statistics.correlation("mean")["image_sensor_temp"]
+    ```
+    """
+    statistics = RecordingStatistics(columns)
+    for chunk in recording.chunks(chunk_size, valid_only):
+        statistics.update(chunk)
+    return statistics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-pixel and per-frame statistics of a recording.")
+    parser.add_argument("recording")
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    args = parser.parse_args()
+    print(recording_statistics(Recording(args.recording), args.chunk_size).summary())
@@ -1,111 +1,123 @@
-from crc import Calculator, Configuration
+import argparse
+import time
 import numpy as np
-import matplotlib.pyplot
-import matplotlib.animation
-import ctypes  # Data format
 from typing import List
-from ctsgen3.spi.spi import (
-    PIXEL_HEIGHT,
-    PIXEL_WIDTH,
-    CRC_POLYNOMIAL,
-    CRC_INITIAL_VALUE,
-    SpiPacket,
-)
+from ctsgen3.instrumentation.instrumentation import Instrumentation
+from ctsgen3.conversion.conversion import FRAME_SHAPE, frames_to_float
+from ctsgen3.spi.detections import DetectionTable
+from ctsgen3.spi.dtypes import CV_DETECTION_DTYPE
+from ctsgen3.spi.spi import SpiPacket
+from ctsgen3.spi.acquisition import AcquisitionThread
+from ctsgen3.spi.reader import SpiPacketReader
 
-import ft4222
+CLIM_UPDATE_PERIOD = 1.0
+"""
+Seconds between thermal colour scale updates. Changing the scale redraws the whole figure (including the colorbar),
+so it is not done every frame; in between only the animated artists are blitted.
+"""
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot  # only the viewer itself needs the GUI backend, not modules importing its constants
+    import matplotlib.animation
+
+    parser = argparse.ArgumentParser(description="Live thermal and CV foreground viewer.")
+    parser.add_argument("--instrument", action="store_true", help="print per-stage latency histograms on exit")
+    args = parser.parse_args()
     ################Serial Config################
-    devA = ft4222.openByDescription("FT4222 A")
-    devA.setClock(ft4222.SysClock.CLK_60)
-    devA.spiMaster_Init(
-        ft4222.SPIMaster.Mode.SINGLE,
-        ft4222.SPIMaster.Clock.DIV_32,
-        ft4222.SPI.Cpol.IDLE_HIGH,
-        ft4222.SPI.Cpha.CLK_LEADING,
-        ft4222.SPIMaster.SlaveSelect.SS0,
-    )
+    reader = SpiPacketReader.open()
+    if args.instrument:
+        reader.instrumentation = Instrumentation()
+    acquisition = AcquisitionThread(reader)
+    acquisition.start()
+    spi_packet = SpiPacket()
+    thermal_frame = np.ctypeslib.as_array(spi_packet.thermal_frame.thermal_frame)
+    cv_foreground = np.ctypeslib.as_array(spi_packet.cv_foreground.cv_foreground)
+    detections = np.frombuffer(memoryview(spi_packet.cv_detections.cv_detections), CV_DETECTION_DTYPE)
+    ir_frame_np = np.zeros(FRAME_SHAPE, dtype=np.float32)
+    cv_foreground_np = np.zeros(FRAME_SHAPE, dtype=np.float32)
     #################Plot Config#################
     fig, (ax1, ax2) = matplotlib.pyplot.subplots(1, 2, figsize=(15, 10))
-    heatmap = ax1.imshow(np.zeros((PIXEL_HEIGHT, PIXEL_WIDTH)), cmap="jet", interpolation="nearest")
+    heatmap = ax1.imshow(ir_frame_np, cmap="jet", interpolation="nearest", vmin=15, vmax=35)
     colorbar = matplotlib.pyplot.colorbar(heatmap, ax=ax1, label="Temperature")
     ax1.set_title("Thermal Heatmap")
     ax1.set_xlabel("Columns")
     ax1.set_ylabel("Rows")
-    cv_foreground_heatmap = ax2.imshow(np.zeros((PIXEL_HEIGHT, PIXEL_WIDTH)), cmap="jet", interpolation="nearest")
+    cv_foreground_heatmap = ax2.imshow(cv_foreground_np, cmap="jet", interpolation="nearest", vmin=-7, vmax=7)
     colorbar2 = matplotlib.pyplot.colorbar(cv_foreground_heatmap, ax=ax2, label="CV foreground")
     ax2.set_title("CV Foreground")
     ax2.set_xlabel("Columns")
     ax2.set_ylabel("Rows")
-    #################CRC Config##################
-    config = Configuration(
-        width=16,
-        polynomial=CRC_POLYNOMIAL,
-        init_value=CRC_INITIAL_VALUE,
-        final_xor_value=0x00,
-        reverse_input=False,
-        reverse_output=False,
-    )
-    crc_calculator = Calculator(config)
+    no_detections = np.empty((0, 2))
+    centres = ax1.scatter([], [], marker="+", s=200, c="white")
+    feet = ax1.scatter([], [], marker="v", s=80, c="white")
+    foreground_centres = ax2.scatter([], [], marker="+", s=200, c="white")
+    status = ax1.text(0.01, 0.99, "", transform=ax1.transAxes, va="top", fontsize=8, backgroundcolor="white")
+    artists: List[matplotlib.artist.Artist] = [
+        heatmap,
+        cv_foreground_heatmap,
+        centres,
+        feet,
+        foreground_centres,
+        status,
+    ]
+    render_times = np.zeros(60)  # ring of the last update times, for the measured render rate
+    num_renders = 0
+    num_frames = 0
+    last_clim_update = 0.0
 
     def update(
         frame: int,
     ) -> List[matplotlib.artist.Artist]:  # function for matplotlib animation updates
-        spi_packet = SpiPacket.from_buffer_copy(
-            devA.spiMaster_SingleReadWrite(bytes([0] * ctypes.sizeof(SpiPacket)), True)
-        )
-        crc_data = ctypes.string_at(
-            ctypes.addressof(spi_packet.thermal_frame),
-            ctypes.sizeof(spi_packet.thermal_frame) - ctypes.sizeof(ctypes.c_uint16),
-        )
-        crc_computed = crc_calculator.checksum(crc_data)
-        if crc_computed != spi_packet.thermal_frame.crc:
-            print("⚠️ Thermal CRC fail.\n" f"Got: {spi_packet.thermal_frame.crc}\n" f"Expected: {crc_computed}")
-            return [heatmap, cv_foreground_heatmap]
-        crc_data = ctypes.string_at(
-            ctypes.addressof(spi_packet.cv_foreground),
-            ctypes.sizeof(spi_packet.cv_foreground) - ctypes.sizeof(ctypes.c_uint16),
-        )
-        crc_computed = crc_calculator.checksum(crc_data)
-        if crc_computed != spi_packet.cv_foreground.crc:
-            print("⚠️ Foreground CRC fail.\n" f"Got: {spi_packet.cv_foreground.crc}\n" f"Expected: {crc_computed}")
-            return [heatmap, cv_foreground_heatmap]
-        crc_data = ctypes.string_at(
-            ctypes.addressof(spi_packet.cv_detections),
-            ctypes.sizeof(spi_packet.cv_detections) - ctypes.sizeof(ctypes.c_uint16),
-        )
-        crc_computed = crc_calculator.checksum(crc_data)
-        if crc_computed != spi_packet.cv_detections.crc:
-            print("⚠️ Detections CRC fail.\n" f"Got: {spi_packet.cv_detections.crc}\n" f"Expected: {crc_computed}")
-            return [heatmap, cv_foreground_heatmap]
-        crc_data = ctypes.string_at(
-            ctypes.addressof(spi_packet.metadata),
-            ctypes.sizeof(spi_packet.metadata) - ctypes.sizeof(ctypes.c_uint16),
-        )
-        crc_computed = crc_calculator.checksum(crc_data)
-        if crc_computed != spi_packet.metadata.crc:
-            print("⚠️ Metadata CRC fail.\n" f"Got: {spi_packet.metadata.crc}\n" f"Expected: {crc_computed}")
-            return [heatmap, cv_foreground_heatmap]
-        ###############Print CV detections################
-        print()
-        print("detections:")
-        for detection in spi_packet.cv_detections.cv_detections:
-            print(detection)
+        global num_renders, num_frames, last_clim_update
+        now = time.monotonic()
+        if reader.instrumentation is not None and num_renders:
+            # time between updates: the previous blit, event loop idle and this update's scheduling
+            reader.instrumentation.observe("render.interval", now - render_times[(num_renders - 1) % len(render_times)])
+        render_times[num_renders % len(render_times)] = now
+        num_renders += 1
+        if not acquisition.latest(spi_packet, timeout=0):
+            return artists
+        num_frames += 1
         ###############Update heatmap################
-        ir_frame_np = (
-            np.ctypeslib.as_array(spi_packet.thermal_frame.thermal_frame).astype(np.float32) / 256.0
-        ).reshape((PIXEL_HEIGHT, PIXEL_WIDTH))
+        start = time.monotonic()
+        frames_to_float(thermal_frame, out=ir_frame_np)
+        frames_to_float(cv_foreground, out=cv_foreground_np)
+        if reader.instrumentation is not None:
+            reader.instrumentation.observe("conversion", time.monotonic() - start)
         heatmap.set_data(ir_frame_np)
-        heatmap.set_clim(vmin=ir_frame_np.min(), vmax=ir_frame_np.max())  # Normalize color scale
-        cv_foreground_np = (
-            np.ctypeslib.as_array(spi_packet.cv_foreground.cv_foreground).astype(np.float32) / 256.0
-        ).reshape((PIXEL_HEIGHT, PIXEL_WIDTH))
+        if now - last_clim_update > CLIM_UPDATE_PERIOD:
+            last_clim_update = now
+            heatmap.set_clim(vmin=ir_frame_np.min(), vmax=ir_frame_np.max())  # Normalize color scale
+            fig.canvas.draw_idle()  # redraws the colorbar; animated artists are left to the next blit
         cv_foreground_heatmap.set_data(cv_foreground_np)
-        cv_foreground_heatmap.set_clim(vmin=-7, vmax=7)
-        fig.canvas.draw_idle()
-        return [heatmap, cv_foreground_heatmap]
+        ###############Overlay CV detections################
+        table = DetectionTable.from_detections(detections)
+        if len(table):
+            centre = np.column_stack([table.temperature_centre_location_x, table.temperature_centre_location_y])
+            centres.set_offsets(centre)
+            foreground_centres.set_offsets(centre)
+            feet.set_offsets(np.column_stack([table.foot_position_estimate_x, table.foot_position_estimate_y]))
+        else:
+            centres.set_offsets(no_detections)
+            foreground_centres.set_offsets(no_detections)
+            feet.set_offsets(no_detections)
+        ###############Status################
+        window = min(num_renders, len(render_times))
+        oldest = render_times[num_renders % len(render_times)] if num_renders > window else render_times[0]
+        render_fps = (window - 1) / (now - oldest) if now > oldest else 0.0
+        status.set_text(
+            f"render: {render_fps:.1f} FPS  frames: {num_frames}  detections: {len(table)}\n"
+            f"CRC failures: {reader.num_invalid}  recovered: {reader.num_recovered}  lost: {reader.num_lost}  "
+            f"dropped: {acquisition.num_dropped}  late: {acquisition.num_late}"
+        )
+        if reader.instrumentation is not None:
+            reader.instrumentation.observe("render.update", time.monotonic() - now)
+        return artists
 
-    ani = matplotlib.animation.FuncAnimation(fig, update, interval=250, cache_frame_data=False)
+    ani = matplotlib.animation.FuncAnimation(fig, update, interval=1000 / 60, blit=True, cache_frame_data=False)
     matplotlib.pyplot.show()
-    devA.close()
+    acquisition.stop()
+    reader.close()
+    if reader.instrumentation is not None:
+        print(reader.instrumentation.summary())
@@ -0,0 +1,327 @@
+import ctypes
+import itertools
+import time
+from abc import ABC, abstractmethod
+from types import TracebackType
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Type
+
+import numpy as np
+
+from ctsgen3.recording.recording import Recording
+from ctsgen3.registers.registers import CIS_frame_rate_enum
+from ctsgen3.spi.crc import update_crcs
+from ctsgen3.spi.spi import PIXEL_HEIGHT, PIXEL_WIDTH, SpiPacket
+
+if TYPE_CHECKING:
+    import ft4222  # imported when a device is opened, so offline tools do not need the FTDI library
+
+
+class SpiDevice(ABC):
+    """
+    SPI master connected to the processing module's bulk data interface.
+    """
+
+    has_data_ready = False
+    """
+    Whether [wait_data_ready][ctsgen3.device.device.SpiDevice.wait_data_ready] is available, i.e. DRDY is routed to
+    the host (not the case on rev1 EVKs).
+    """
+
+    def wait_data_ready(self, timeout: float) -> bool:
+        """
+        Block until DRDY is asserted (a packet is ready) or `timeout` seconds pass, returning whether it was asserted.
+        Without DRDY (see [has_data_ready][ctsgen3.device.device.SpiDevice.has_data_ready]) it returns false at once,
+        and readers pace themselves by the frame period instead.
+        """
+        return False
+
+    @abstractmethod
+    def transfer(self, tx: bytes) -> bytes:
+        """
+        Assert CS, clock out `len(tx)` bytes and deassert CS, returning the bytes read from MISO. Raises `EOFError` if
+        the device has no more packets to send, which only happens when replaying a finite source.
+        """
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "SpiDevice":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class Ft4222Device(SpiDevice):
+    """
+    FT4222 USB to SPI bridge as fitted to the EVKs.
+
+    DRDY is read through `gpio`, the FT4222's GPIO interface, when given, on `drdy_port` (P2 if `None`).
+    """
+
+    def __init__(
+        self,
+        device: "ft4222.FT4222",
+        gpio: Optional["ft4222.FT4222"] = None,
+        drdy_port: Optional["ft4222.GPIO.Port"] = None,
+    ) -> None:
+        import ft4222
+
+        self.device = device
+        self.gpio = gpio
+        self.drdy_port = ft4222.GPIO.Port.P2 if drdy_port is None else drdy_port
+        self.has_data_ready = gpio is not None
+
+    @classmethod
+    def open(
+        cls,
+        description: str = "FT4222 A",
+        clock: Optional["ft4222.SPIMaster.Clock"] = None,
+        drdy_port: Optional["ft4222.GPIO.Port"] = None,
+        gpio_description: str = "FT4222 B",
+    ) -> "Ft4222Device":
+        """
+        Open and initialise the FT4222 SPI master with the given `description`, and if `drdy_port` is given the GPIO
+        interface DRDY is routed to.
+
+        The default clock divider (`DIV_32` if `clock` is `None`) gives the maximum supported SCLK of 1.875MHz from the
+        60MHz system clock.
+        """
+        import ft4222
+
+        device = cls._spi_master_init(ft4222.openByDescription(description), clock)
+        if drdy_port is None:
+            return cls(device)
+        return cls(device, cls._gpio_init(ft4222.openByDescription(gpio_description)), drdy_port)
+
+    @classmethod
+    def open_by_location(
+        cls,
+        location: int,
+        clock: Optional["ft4222.SPIMaster.Clock"] = None,
+        drdy_port: Optional["ft4222.GPIO.Port"] = None,
+        gpio_location: Optional[int] = None,
+    ) -> "Ft4222Device":
+        """
+        As [open][ctsgen3.device.device.Ft4222Device.open], for one of several FT4222s identified by USB location.
+        """
+        import ft4222
+
+        device = cls._spi_master_init(ft4222.openByLocation(location), clock)
+        if drdy_port is None or gpio_location is None:
+            return cls(device)
+        return cls(device, cls._gpio_init(ft4222.openByLocation(gpio_location)), drdy_port)
+
+    @staticmethod
+    def _spi_master_init(device: "ft4222.FT4222", clock: Optional["ft4222.SPIMaster.Clock"]) -> "ft4222.FT4222":
+        import ft4222
+
+        device.setClock(ft4222.SysClock.CLK_60)
+        device.spiMaster_Init(
+            ft4222.SPIMaster.Mode.SINGLE,
+            ft4222.SPIMaster.Clock.DIV_32 if clock is None else clock,
+            ft4222.SPI.Cpol.IDLE_HIGH,
+            ft4222.SPI.Cpha.CLK_LEADING,
+            ft4222.SPIMaster.SlaveSelect.SS0,
+        )  # initialisation asserts CS briefly, triggering an internal buffer reset
+        return device
+
+    @staticmethod
+    def _gpio_init(gpio: "ft4222.FT4222") -> "ft4222.FT4222":
+        gpio.gpio_Init()  # all inputs
+        return gpio
+
+    def wait_data_ready(self, timeout: float) -> bool:
+        if self.gpio is None:
+            return super().wait_data_ready(timeout)
+        try:
+            # DRDY is active low; 0 would mean no timeout, so always wait at least 1ms
+            self.gpio.gpio_Wait(self.drdy_port, False, timeout=max(1, int(timeout * 1000)), sleep=0)
+        except TimeoutError:
+            return False
+        return True
+
+    def transfer(self, tx: bytes) -> bytes:
+        return self.device.spiMaster_SingleReadWrite(tx, True)
+
+    def close(self) -> None:
+        self.device.close()
+        if self.gpio is not None:
+            self.gpio.close()
+
+
+class ReplayDevice(SpiDevice):
+    """
+    Stand-in for the processing module and FT4222 that serves packets from `packets`, e.g.
+    [synthetic_packets][ctsgen3.device.device.synthetic_packets] or
+    [recording_packets][ctsgen3.device.device.recording_packets].
+
+    The SPI TX FIFO behaves as described in the SPI overview for EVKs with RST routed to CS: a transfer shorter than a
+    packet returns its first bytes, a longer one pads with copies of the last byte, and the next transfer starts from the
+    beginning of the same packet again.
+
+    With `fps` set, a new packet becomes ready every `1 / fps` seconds of wall clock time, so fast hosts read duplicates
+    and slow hosts miss packets, and DRDY is emulated unless `data_ready` is false (as on rev1 EVKs). Without `fps`,
+    every clean read of exactly one packet is followed by a new packet, for throughput benchmarks, and a faulty read is
+    followed by the same packet, as a retry within the frame period would be.
+
+    Once a finite source (e.g. a list, or [recording_packets][ctsgen3.device.device.recording_packets] without `loop`)
+    has no packets left, [transfer][ctsgen3.device.device.ReplayDevice.transfer] raises `EOFError`, which ends iteration
+    of a [SpiPacketReader][ctsgen3.spi.reader.SpiPacketReader].
+
+    Faults are injected into individual transfers with the given probabilities: a flipped bit (CRC failure), a transfer
+    that ends early (short read) or one that returns extra padding bytes (over-read).
+    """
+
+    def __init__(
+        self,
+        packets: Iterable[bytes],
+        fps: Optional[float] = None,
+        crc_error_rate: float = 0.0,
+        short_read_rate: float = 0.0,
+        over_read_rate: float = 0.0,
+        seed: Optional[int] = None,
+        data_ready: bool = True,
+    ) -> None:
+        self.fps = fps
+        self.has_data_ready = data_ready
+        self.crc_error_rate = crc_error_rate
+        self.short_read_rate = short_read_rate
+        self.over_read_rate = over_read_rate
+        self.num_transfers = 0
+        self.num_packets = 0
+        """
+        Number of packets made ready so far.
+        """
+        self._packets = iter(packets)
+        self._packet: Optional[bytes] = next(self._packets, None)  # None once the source is exhausted
+        self._ready = True
+        self._start = time.monotonic()
+        self._rng = np.random.default_rng(seed)
+
+    def _next_packet(self) -> None:
+        # fetched only when the previous packet is due to be replaced, so reading the last packet of a finite source
+        # does not fail, and only reading past it does
+        self._packet = next(self._packets, None)
+        if self._packet is not None:
+            self.num_packets += 1
+        self._ready = True
+
+    def _advance(self) -> None:
+        if self.fps is None:
+            if not self._ready:
+                self._next_packet()
+            return
+        frame = int((time.monotonic() - self._start) * self.fps)
+        while self._packet is not None and self.num_packets < frame:
+            self._next_packet()
+
+    def wait_data_ready(self, timeout: float) -> bool:
+        if not self.has_data_ready:
+            return super().wait_data_ready(timeout)
+        self._advance()
+        if self._ready or self.fps is None:
+            return True
+        delay = self._start + (self.num_packets + 1) / self.fps - time.monotonic()
+        time.sleep(max(0.0, min(delay, timeout)))
+        self._advance()
+        return self._ready
+
+    def transfer(self, tx: bytes) -> bytes:
+        self._advance()
+        packet = self._packet
+        if packet is None:
+            raise EOFError("No packets left to replay")
+        self.num_transfers += 1
+        num_bytes = len(tx)
+        if self.short_read_rate and self._rng.random() < self.short_read_rate:
+            num_bytes = int(self._rng.integers(0, num_bytes))
+        elif self.over_read_rate and self._rng.random() < self.over_read_rate:
+            num_bytes += int(self._rng.integers(1, 64))
+        rx = packet[:num_bytes] + packet[-1:] * (num_bytes - len(packet))
+        clean = num_bytes == len(packet)
+        if rx and self.crc_error_rate and self._rng.random() < self.crc_error_rate:
+            corrupted = bytearray(rx)
+            corrupted[int(self._rng.integers(0, len(rx)))] ^= 1 << int(self._rng.integers(0, 8))
+            rx = bytes(corrupted)
+            clean = False
+        if clean:  # a faulty read leaves the packet ready, so a retry reads the same packet
+            self._ready = False
+        return rx
+
+
+FRAME_RATES = {
+    CIS_frame_rate_enum.FPS_60: 60.0,
+    CIS_frame_rate_enum.FPS_32: 32.0,
+    CIS_frame_rate_enum.FPS_8: 8.0,
+    CIS_frame_rate_enum.FPS_1: 1.0,
+}
+"""
+Frames per second of each `FRAME_RATE_MODE` in [CTS_CTRL_0x1F][ctsgen3.registers.registers.CTS_CTRL_0x1F].
+"""
+
+
+def synthetic_packets(
+    packet_type: Type[ctypes.Structure] = SpiPacket,
+    frame_rate: CIS_frame_rate_enum = CIS_frame_rate_enum.FPS_60,
+    seed: Optional[int] = 0,
+) -> Iterator[bytes]:
+    """
+    Endless stream of plausible packets with valid CRCs: a warm blob circling a noisy ~22C background, its foreground and
+    detection, and metadata with an incrementing `GLOBAL_FRM_CNT_0x02` and the given `FRAME_RATE_MODE`.
+    """
+    rng = np.random.default_rng(seed)
+    rows, columns = np.mgrid[0:PIXEL_HEIGHT, 0:PIXEL_WIDTH]
+    packet = packet_type()
+    fields = {name for name, *_ in packet_type._fields_}
+    if "metadata" in fields:
+        packet.metadata.metadata.CTS_CTRL_0x1F.FRAME_RATE_MODE = frame_rate
+        packet.metadata.metadata.IR_RESOLUTION_0x3C.ir_rows = PIXEL_HEIGHT
+        packet.metadata.metadata.IR_RESOLUTION_0x3C.ir_cols = PIXEL_WIDTH
+    for frame_count in itertools.count():
+        angle = 2 * np.pi * frame_count / 240
+        centre_y = PIXEL_HEIGHT / 2 + PIXEL_HEIGHT / 4 * np.sin(angle)
+        centre_x = PIXEL_WIDTH / 2 + PIXEL_WIDTH / 4 * np.cos(angle)
+        blob = 10.0 * np.exp(-((rows - centre_y) ** 2 + (columns - centre_x) ** 2) / 4.0)
+        thermal = 22.0 + blob + rng.normal(0.0, 0.1, blob.shape)
+        if "thermal_frame" in fields:
+            np.ctypeslib.as_array(packet.thermal_frame.thermal_frame)[:] = (thermal * 256).astype(np.int16).ravel()
+        if "cv_foreground" in fields:
+            np.ctypeslib.as_array(packet.cv_foreground.cv_foreground)[:] = (blob * 256).astype(np.int16).ravel()
+        if "cv_detections" in fields:
+            ctypes.memset(packet.cv_detections.cv_detections, 0, ctypes.sizeof(packet.cv_detections.cv_detections))
+            detection = packet.cv_detections.cv_detections[0]
+            detection.id = 1
+            detection.label = 1
+            detection.temperature_centre_location_x = int(round(centre_x))
+            detection.temperature_centre_location_y = int(round(centre_y))
+            detection.peak_temperature = float(thermal.max())
+            detection.foot_position_estimate_x = centre_x
+            detection.foot_position_estimate_y = min(centre_y + 2, PIXEL_HEIGHT - 1)
+        if "metadata" in fields:
+            packet.metadata.metadata.GLOBAL_FRM_CNT_0x02.frame_count = frame_count
+            packet.metadata.metadata.TEMP_SENSOR_0x00.temperature_sensor_0 = int(30.0 * 256)
+        update_crcs(packet)
+        yield bytes(packet)
+
+
+def recording_packets(recording: Recording, loop: bool = False) -> Iterator[bytes]:
+    """
+    Packets of a [Recording][ctsgen3.recording.recording.Recording] that passed their CRC, optionally repeated forever.
+    Looping a recording with no valid packets raises `ValueError` rather than spinning.
+    """
+    while True:
+        empty = True
+        for chunk in recording.chunks(valid_only=True):
+            for packet in chunk["packet"]:
+                empty = False
+                yield packet.tobytes()
+        if not loop:
+            return
+        if empty:
+            raise ValueError("Recording has no valid packets to loop")
@@ -0,0 +1,217 @@
+import ctypes
+import queue
+import threading
+import time
+from types import TracebackType
+from typing import TYPE_CHECKING, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from ctsgen3.device.device import Ft4222Device
+from ctsgen3.registers.registers import RegisterMap
+from ctsgen3.spi.reader import SpiPacketReader
+from ctsgen3.spi.spi import SpiPacket, SpiSection, packet_sections
+
+if TYPE_CHECKING:
+    import ft4222
+
+
+def serial_number(metadata: RegisterMap) -> int:
+    """
+    64 bit device serial number from `SERIAL_NUMBER_HI_0x15` and `SERIAL_NUMBER_LO_0x14`.
+    """
+    return int(metadata.SERIAL_NUMBER_HI_0x15.serial_hi) << 32 | int(metadata.SERIAL_NUMBER_LO_0x14.serial_lo)
+
+
+def ft4222_locations() -> List[Tuple[int, Optional[int]]]:
+    """
+    USB location of the SPI master interface ("FT4222 A") of every connected FT4222, paired with the location of its
+    GPIO interface ("FT4222 B") if present. Interfaces of the same chip share their serial number but for the last
+    character.
+    """
+    import ft4222
+
+    details = [ft4222.getDeviceInfoDetail(index, False) for index in range(ft4222.createDeviceInfoList())]
+    gpio = {detail["serial"][:-1]: detail["location"] for detail in details if detail["description"] == b"FT4222 B"}
+    return [
+        (detail["location"], gpio.get(detail["serial"][:-1]))
+        for detail in details
+        if detail["description"] == b"FT4222 A"
+    ]
+
+
+class ManagedPacket(NamedTuple):
+    """
+    Packet from one of the devices of an [AcquisitionManager][ctsgen3.device.manager.AcquisitionManager].
+    """
+
+    timestamp: float  #: host `time.time()` when the packet was read
+    serial_number: Optional[int]  #: serial number from the packet's metadata, `None` without a metadata section
+    device: int  #: index of the device's worker in `AcquisitionManager.workers`
+    packet: ctypes.Structure  #: copy of the packet, owned by the consumer
+
+
+class DeviceWorker(threading.Thread):
+    """
+    Reads frames from one device into the manager's shared queue, keeping per-device statistics, until stopped or
+    the end of a replayed source.
+    """
+
+    def __init__(self, index: int, reader: SpiPacketReader, output: "queue.Queue[ManagedPacket]") -> None:
+        super().__init__(name=f"ctsgen3-device-{index}", daemon=True)
+        self.index = index
+        self.reader = reader
+        self.serial_number: Optional[int] = None
+        self.num_frames = 0
+        self.num_dropped = 0
+        """
+        Frames discarded because the consumer fell behind and the shared queue was full.
+        """
+        self.start_time = time.monotonic()
+        self.error: Optional[BaseException] = None
+        self._output = output
+        self._stop_event = threading.Event()
+        self._has_metadata = bool(packet_sections(reader.packet_type) & SpiSection.METADATA)
+
+    def run(self) -> None:
+        self.start_time = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                if not self.reader.next_frame(self.reader.packet, timeout=0.1):
+                    continue
+                packet = self.reader.packet_type.from_buffer_copy(self.reader.packet)
+                if self._has_metadata:
+                    self.serial_number = serial_number(packet.metadata.metadata)
+                self.num_frames += 1
+                try:
+                    self._output.put_nowait(ManagedPacket(time.time(), self.serial_number, self.index, packet))
+                except queue.Full:
+                    self.num_dropped += 1
+        except EOFError:
+            pass
+        except BaseException as error:
+            self.error = error
+
+    @property
+    def fps(self) -> float:
+        """
+        Average frames per second since the worker started.
+        """
+        elapsed = time.monotonic() - self.start_time
+        return self.num_frames / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """
+        Throughput and CRC failure statistics of this device.
+        """
+        failures = ", ".join(
+            f"{section.name}={count}" for section, count in self.reader.section_failures.items() if count
+        )
+        serial = "unknown" if self.serial_number is None else f"{self.serial_number:016X}"
+        return (
+            f"device {self.index} serial {serial}: {self.num_frames} frames {self.fps:.1f} FPS "
+            f"{self.fps * ctypes.sizeof(self.reader.packet_type) / 1e3:.1f} kB/s, {self.num_dropped} dropped, "
+            f"{self.reader.num_invalid} invalid reads ({failures or 'no CRC failures'})"
+        )
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+class AcquisitionManager:
+    """
+    Acquires from several EVKs concurrently, each reader on its own [DeviceWorker][ctsgen3.device.manager.DeviceWorker]
+    thread, and merges their frames into one timestamped stream of
+    [ManagedPacket][ctsgen3.device.manager.ManagedPacket]s in arrival order.
+
+    ```
+    with AcquisitionManager.open_all() as manager:
+        for timestamp, serial, _, packet in manager:
+            ...
+    ```
+    """
+
+    def __init__(self, readers: Sequence[SpiPacketReader], maxsize: int = 256) -> None:
+        self.queue: queue.Queue[ManagedPacket] = queue.Queue(maxsize)
+        self.workers = [DeviceWorker(index, reader, self.queue) for index, reader in enumerate(readers)]
+
+    @classmethod
+    def open_all(
+        cls,
+        packet_type: Type[ctypes.Structure] = SpiPacket,
+        clock: Optional["ft4222.SPIMaster.Clock"] = None,
+        drdy_port: Optional["ft4222.GPIO.Port"] = None,
+        maxsize: int = 256,
+    ) -> "AcquisitionManager":
+        """
+        Manager of every connected FT4222, see [ft4222_locations][ctsgen3.device.manager.ft4222_locations].
+        """
+        readers: List[SpiPacketReader] = []
+        try:
+            for location, gpio_location in ft4222_locations():
+                device = Ft4222Device.open_by_location(location, clock, drdy_port, gpio_location)
+                readers.append(SpiPacketReader(device, packet_type))
+        except BaseException:
+            for reader in readers:  # release the devices already opened, so they can be opened again
+                reader.close()
+            raise
+        if not readers:
+            raise RuntimeError("No FT4222 devices found")
+        return cls(readers, maxsize)
+
+    def start(self) -> None:
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        for worker in self.workers:
+            worker.stop()
+        for worker in self.workers:
+            worker.join(timeout)
+
+    def close(self) -> None:
+        """
+        Stop every worker and close its device.
+        """
+        self.stop()
+        for worker in self.workers:
+            worker.reader.close()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[ManagedPacket]:
+        """
+        Next packet from any device, or `None` if none arrived within `timeout` seconds. Re-raises worker errors.
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            for worker in self.workers:
+                if worker.error is not None:
+                    raise worker.error
+            return None
+
+    def __iter__(self) -> Iterator[ManagedPacket]:
+        """
+        Yield packets until every worker has stopped and the queue is drained. Re-raises worker errors.
+        """
+        while True:
+            packet = self.get(timeout=0.5)
+            if packet is not None:
+                yield packet
+            elif not any(worker.is_alive() for worker in self.workers) and self.queue.empty():
+                return
+
+    def summary(self) -> str:
+        """
+        One line of throughput and CRC failure statistics per device.
+        """
+        return "\n".join(worker.summary() for worker in self.workers)
+
+    def __enter__(self) -> "AcquisitionManager":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
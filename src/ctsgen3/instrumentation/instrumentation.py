@@ -0,0 +1,160 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO
+
+LATENCY_BUCKETS = tuple(10.0 ** (exponent / 4) for exponent in range(-24, 5))
+"""
+Upper bounds in seconds of the latency histogram buckets: 4 per decade from 1us to 10s.
+"""
+
+
+class Histogram:
+    """
+    Cumulative count of observations per bucket, as a Prometheus histogram. Recording is a bisect and three additions.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the `q` quantile, or the maximum for the +Inf bucket.
+        """
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Instrumentation:
+    """
+    Opt-in latency histograms and event counters for the acquisition path. Attach one to a
+    [SpiPacketReader][ctsgen3.spi.reader.SpiPacketReader] (its `instrumentation` attribute, `None` by default so a
+    disabled reader only pays one attribute check per read) to record the stages
+
+    - `wait`: waiting for DRDY or the frame period
+    - `transfer`: the SPI transfer
+    - `parse`: copying the received bytes into the packet struct
+    - `crc.<SECTION>`: validating each section's CRC
+
+    and the `frames_missed` and `duplicates` counters (see [SequenceTracker][ctsgen3.spi.sequence.SequenceTracker]).
+    Consumers time their own stages, e.g. `with instrumentation.time("render"): ...`.
+    """
+
+    def __init__(self) -> None:
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    def count(self, name: str, increment: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + increment
+
+    @contextlib.contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def summary(self) -> str:
+        """
+        One line per stage with its count, mean, median, 99th percentile and maximum, then the counters.
+        """
+        lines = [
+            f"{stage:20} n={histogram.count:<8} mean={histogram.sum / histogram.count * 1e3:8.3f}ms "
+            f"p50<={histogram.quantile(0.5) * 1e3:8.3f}ms p99<={histogram.quantile(0.99) * 1e3:8.3f}ms "
+            f"max={histogram.max * 1e3:8.3f}ms"
+            for stage, histogram in sorted(self.histograms.items())
+            if histogram.count
+        ]
+        lines.extend(f"{name:20} {value}" for name, value in sorted(self.counters.items()))
+        return "\n".join(lines)
+
+    def prometheus(self, prefix: str = "ctsgen3") -> str:
+        """
+        All histograms and counters in the Prometheus text exposition format.
+        """
+        lines: List[str] = [f"# TYPE {prefix}_stage_seconds histogram"]
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:.6g}"
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum!r}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Atomically replace `path` with [prometheus][ctsgen3.instrumentation.instrumentation.Instrumentation.prometheus],
+        e.g. for the node exporter's textfile collector.
+        """
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as file:
+            file.write(self.prometheus())
+        os.replace(temporary, path)
+
+
+class Exporter(threading.Thread):
+    """
+    Every `interval` seconds, print the summary to `stream` and/or write the Prometheus text file `path`.
+    """
+
+    def __init__(
+        self,
+        instrumentation: Instrumentation,
+        interval: float = 10.0,
+        stream: Optional[TextIO] = None,
+        path: Optional[str] = None,
+    ) -> None:
+        super().__init__(name="ctsgen3-instrumentation", daemon=True)
+        self.instrumentation = instrumentation
+        self.interval = interval
+        self.stream = stream
+        self.path = path
+        self._stop_event = threading.Event()
+
+    def export(self) -> None:
+        if self.stream is not None:
+            print(self.instrumentation.summary(), file=self.stream, flush=True)
+        if self.path is not None:
+            self.instrumentation.write_prometheus(self.path)
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.export()
+
+    def stop(self) -> None:
+        """
+        Stop exporting, after a final export.
+        """
+        self._stop_event.set()
+        self.join()
+        self.export()
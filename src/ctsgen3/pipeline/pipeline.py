@@ -0,0 +1,270 @@
+import ctypes
+import multiprocessing
+import multiprocessing.context
+import multiprocessing.shared_memory
+import os
+import queue
+import threading
+import time
+from types import TracebackType
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Tuple, Type, TypeVar, Union
+
+from ctsgen3.spi.spi import SpiPacket, SpiSection, packet_sections, spi_packet_type
+
+T = TypeVar("T")
+
+_Result = Tuple[int, int, int, float, bool, Any]  # sequence, slot, worker, busy seconds, failed, result or error
+
+_POLL_INTERVAL = 0.1
+"""
+Seconds between checks that every worker is still running while no results arrive.
+"""
+
+
+def _work(
+    index: int,
+    name: str,
+    sections: SpiSection,
+    capacity: int,
+    function: Callable[[ctypes.Structure], Any],
+    tasks: "multiprocessing.Queue[Optional[Tuple[int, int]]]",
+    results: "multiprocessing.Queue[_Result]",
+) -> None:
+    memory = multiprocessing.shared_memory.SharedMemory(name)
+    assert memory.buf is not None
+    packet_type = spi_packet_type(sections)
+    size = ctypes.sizeof(packet_type)
+    packets = [packet_type.from_buffer(memory.buf, slot * size) for slot in range(capacity)]
+    while (task := tasks.get()) is not None:
+        sequence, slot = task
+        start = time.perf_counter()
+        try:
+            result, failed = function(packets[slot]), False
+        except Exception as error:
+            result, failed = error, True
+        results.put((sequence, slot, index, time.perf_counter() - start, failed, result))
+    del packets  # views of the shared memory must be released before it is closed
+    memory.close()
+
+
+class ProcessPipeline(Generic[T]):
+    """
+    Runs `function` on each submitted packet in `workers` processes, so CPU heavy analysis (upsampling, blob analysis,
+    fusion with the CV foreground) does not compete with acquisition for the GIL.
+
+    Packets are copied into one of `capacity` packet sized slots of a `multiprocessing.shared_memory` block, and only
+    the slot index is sent to a worker, which calls `function` with a `packet_type` struct view of the slot. The view is
+    only valid during the call, and `function` must be picklable (a module level function) and return a picklable
+    result. Results are returned in submission order, whichever worker finishes first.
+
+    [submit][ctsgen3.pipeline.pipeline.ProcessPipeline.submit] never waits for a worker unless `block` is set: when
+    every slot is in use the packet is dropped and counted, so acquisition latency does not depend on analysis cost.
+
+    A worker that dies (e.g. killed, or crashed in native code) takes its packet with it, so the results after it could
+    never be returned in order: the pipeline fails instead, and `submit` and `get` raise a `RuntimeError`.
+
+    ```
+    with ProcessPipeline(find_blobs, workers=3) as pipeline:
+        for packet in reader:
+            pipeline.submit(packet)
+            for sequence, blobs in pipeline.completed():
+                ...
+    ```
+    """
+
+    def __init__(
+        self,
+        function: Callable[[ctypes.Structure], T],
+        workers: Optional[int] = None,
+        capacity: Optional[int] = None,
+        packet_type: Type[ctypes.Structure] = SpiPacket,
+        block: bool = False,
+        context: Optional[multiprocessing.context.BaseContext] = None,
+    ) -> None:
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.capacity = capacity or 2 * self.workers
+        self.packet_type = packet_type
+        self.block = block
+        self.num_submitted = 0
+        self.num_dropped = 0
+        """
+        Packets not submitted because every slot was in use.
+        """
+        self.busy = [0.0] * self.workers
+        """
+        Seconds each worker has spent in `function`.
+        """
+        self.processed = [0] * self.workers
+        """
+        Packets processed by each worker.
+        """
+        self.error: Optional[BaseException] = None
+        """
+        Error that stopped the pipeline, re-raised by `submit` and `get`.
+        """
+        self._closing = False
+        self._size = ctypes.sizeof(packet_type)
+        self._memory = multiprocessing.shared_memory.SharedMemory(create=True, size=self.capacity * self._size)
+        assert self._memory.buf is not None
+        self._buffer = self._memory.buf
+        self._free: "queue.SimpleQueue[int]" = queue.SimpleQueue()
+        for slot in range(self.capacity):
+            self._free.put(slot)
+        self._output: "queue.Queue[Tuple[int, bool, Any]]" = queue.Queue()
+        self._pending: Dict[int, Tuple[bool, Any]] = {}  # results that arrived before an earlier sequence's
+        self._next = 0
+        context = context or multiprocessing.get_context()
+        self._tasks: "multiprocessing.Queue[Optional[Tuple[int, int]]]" = context.Queue()
+        self._results: "multiprocessing.Queue[Optional[_Result]]" = context.Queue()
+        self._processes = [
+            context.Process(  # type: ignore[attr-defined]
+                target=_work,
+                args=(
+                    index,
+                    self._memory.name,
+                    packet_sections(packet_type),
+                    self.capacity,
+                    function,
+                    self._tasks,
+                    self._results,
+                ),
+                name=f"ctsgen3-pipeline-{index}",
+                daemon=True,
+            )
+            for index in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+        self._start = time.monotonic()
+        # started after the workers, so they are never forked with it running
+        self._collector = threading.Thread(target=self._collect, name="ctsgen3-pipeline", daemon=True)
+        self._collector.start()
+
+    def submit(self, packet: Union[ctypes.Structure, bytes], timeout: Optional[float] = None) -> bool:
+        """
+        Copy `packet` (a `packet_type` struct or its bytes) into a free slot and queue it for a worker. Returns whether
+        it was submitted, i.e. false if no slot was free (within `timeout` seconds if `block` is set).
+        """
+        if self.error is not None:
+            raise self.error
+        try:
+            slot = self._free.get(self.block, timeout)
+        except queue.Empty:
+            self.num_dropped += 1
+            return False
+        if slot < 0:  # woken by a failure
+            self._free.put(slot)
+            assert self.error is not None
+            raise self.error
+        self._buffer[slot * self._size : (slot + 1) * self._size] = memoryview(packet).cast("B")
+        self._tasks.put((self.num_submitted, slot))
+        self.num_submitted += 1
+        return True
+
+    def _collect(self) -> None:
+        try:
+            while True:
+                try:
+                    item = self._results.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    self._check_workers()
+                    continue
+                if item is None:
+                    break
+                sequence, slot, worker, busy, failed, result = item
+                self._free.put(slot)
+                self.busy[worker] += busy
+                self.processed[worker] += 1
+                self._pending[sequence] = (failed, result)
+                while self._next in self._pending:
+                    self._output.put((self._next, *self._pending.pop(self._next)))
+                    self._next += 1
+        except BaseException as error:
+            self._fail(error)
+
+    def _check_workers(self) -> None:
+        if self._closing:
+            return
+        for process in self._processes:
+            if process.exitcode is not None:
+                raise RuntimeError(f"Pipeline worker {process.name} exited with code {process.exitcode}")
+
+    def _fail(self, error: BaseException) -> None:
+        self.error = error
+        self._free.put(-1)  # wake a blocked submit
+        self._output.put((-1, True, error))  # and a waiting get
+
+    def get(self, timeout: Optional[float] = None) -> Tuple[int, T]:
+        """
+        The next result in submission order as `(sequence, result)`, where `sequence` counts submitted packets. Waits up
+        to `timeout` seconds (forever if `None`), raising `queue.Empty` if none is ready. An exception raised by
+        `function` is re-raised here, in its turn, as is the `RuntimeError` of a worker that died.
+        """
+        if self.error is not None:
+            raise self.error
+        sequence, failed, result = self._output.get(timeout=timeout)
+        if failed:
+            raise result
+        return sequence, result
+
+    def completed(self) -> Iterator[Tuple[int, T]]:
+        """
+        Yield the results that are ready, in order, without waiting.
+        """
+        while True:
+            try:
+                yield self.get(timeout=0)
+            except queue.Empty:
+                return
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Packets submitted whose results have not been returned yet.
+        """
+        return self.num_submitted - self._next
+
+    def utilisation(self) -> List[float]:
+        """
+        Fraction of the time since the pipeline started that each worker has spent in `function`.
+        """
+        elapsed = time.monotonic() - self._start
+        return [busy / elapsed if elapsed > 0 else 0.0 for busy in self.busy]
+
+    def summary(self) -> str:
+        workers = ", ".join(
+            f"{processed} ({utilisation:.0%})" for processed, utilisation in zip(self.processed, self.utilisation())
+        )
+        return (
+            f"{self.num_submitted} submitted, {self.num_dropped} dropped, {self.in_flight} in flight, "
+            f"processed per worker: {workers}"
+        )
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Let the workers finish the submitted packets, then stop them and free the shared memory. The remaining results
+        can still be read with [get][ctsgen3.pipeline.pipeline.ProcessPipeline.get].
+        """
+        self._closing = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._results.put(None)
+        self._collector.join()
+        self._memory.close()
+        self._memory.unlink()
+
+    def __enter__(self) -> "ProcessPipeline[T]":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
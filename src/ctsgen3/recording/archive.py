@@ -0,0 +1,456 @@
+import argparse
+import ctypes
+import enum
+import lzma
+import os
+import struct
+import time
+import zlib
+from types import TracebackType
+from typing import Any, Iterator, List, Optional, Type, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from ctsgen3.recording.recording import Recording, record_type
+from ctsgen3.registers.dtypes import struct_dtype
+from ctsgen3.registers.registers import RegisterMap
+from ctsgen3.spi.spi import PIXEL_HEIGHT, PIXEL_WIDTH, SpiPacket, SpiSection, packet_sections, spi_packet_type
+
+ARCHIVE_MAGIC = b"CTSGEN3A"
+ARCHIVE_VERSION = 1
+
+_FRAME_SECTIONS = ("thermal_frame", "cv_foreground")  # int16 frames at the start of their section struct
+_FRAME_BYTES = PIXEL_HEIGHT * PIXEL_WIDTH * ctypes.sizeof(ctypes.c_int16)
+_METADATA_WORDS = ctypes.sizeof(RegisterMap) // 4
+
+
+class ArchiveCompression(enum.IntEnum):
+    """
+    Standard library compressor applied to each encoded chunk.
+    """
+
+    ZLIB = 0  #: fast to decode, for archives that are read often
+    LZMA = 1  #: smaller but several times slower, for cold storage
+
+
+class ArchiveFileHeader(ctypes.LittleEndianStructure):
+    """
+    Header at the start of every archive file, followed by chunks, each an
+    [ArchiveChunkHeader][ctsgen3.recording.archive.ArchiveChunkHeader] and its compressed records.
+    """
+
+    _fields_ = [
+        ("magic", ctypes.c_char * 8),
+        ("version", ctypes.c_uint16),
+        ("sections", ctypes.c_uint16),  # SpiSection flags of the archived packet layout
+        ("packet_size", ctypes.c_uint32),
+        ("record_size", ctypes.c_uint32),
+        ("compression", ctypes.c_uint16),  # ArchiveCompression
+        ("_reserved", ctypes.c_uint16),
+        ("chunk_size", ctypes.c_uint32),  # records per chunk, the last chunk may hold fewer
+        ("_reserved2", ctypes.c_uint32),
+    ]
+    _pack_ = 1
+
+
+assert ctypes.sizeof(ArchiveFileHeader) == 32
+
+
+class ArchiveChunkHeader(ctypes.LittleEndianStructure):
+    """
+    Header of each chunk, so the chunks of a file can be indexed by reading only their headers.
+    """
+
+    _fields_ = [
+        ("num_records", ctypes.c_uint32),
+        ("compressed_size", ctypes.c_uint32),
+        ("first_timestamp", ctypes.c_double),
+        ("last_timestamp", ctypes.c_double),
+    ]
+    _pack_ = 1
+
+
+assert ctypes.sizeof(ArchiveChunkHeader) == 24
+
+
+class ArchiveCodec:
+    """
+    Lossless encoding of a chunk of [record_type][ctsgen3.recording.recording.record_type] records of `packet_type`,
+    before and after compression:
+
+    - thermal frames and CV foregrounds as 16 bit differences from the previous frame of the chunk (the first frame is
+      kept whole, so every chunk decodes on its own), with the low and high bytes stored as separate planes
+    - metadata as only the 32 bit words that changed since the previous record (in practice the frame counters and a
+      few measurements), with their positions
+    - everything else (timestamps, CRCs, detections) column by column
+    """
+
+    def __init__(self, packet_type: Type[ctypes.Structure] = SpiPacket) -> None:
+        self.packet_type = packet_type
+        self.dtype = struct_dtype(record_type(packet_type))
+        packet_offset = record_type(packet_type).packet.offset
+        self._frames = [
+            packet_offset + getattr(packet_type, name).offset for name in _FRAME_SECTIONS if hasattr(packet_type, name)
+        ]
+        self._metadata = packet_offset + packet_type.metadata.offset if hasattr(packet_type, "metadata") else None
+        other = np.ones(self.dtype.itemsize, bool)
+        for offset in self._frames:
+            other[offset : offset + _FRAME_BYTES] = False
+        if self._metadata is not None:
+            other[self._metadata : self._metadata + ctypes.sizeof(RegisterMap)] = False
+        self._other = np.flatnonzero(other)
+
+    def encode(self, records: npt.NDArray[Any]) -> bytes:
+        """
+        Encoded, uncompressed bytes of `records`.
+        """
+        raw = np.ascontiguousarray(records).view(np.uint8).reshape(len(records), self.dtype.itemsize)
+        parts = []
+        for offset in self._frames:
+            frames = np.ascontiguousarray(raw[:, offset : offset + _FRAME_BYTES]).view("<u2")
+            deltas = frames.copy()
+            np.subtract(frames[1:], frames[:-1], out=deltas[1:])  # wraps, and so does the cumulative sum decoding it
+            parts.append(deltas.view(np.uint8).reshape(len(records), -1, 2).transpose(2, 0, 1).tobytes())
+        if self._metadata is not None:
+            words = np.ascontiguousarray(raw[:, self._metadata : self._metadata + ctypes.sizeof(RegisterMap)])
+            words = words.view("<u4")
+            changed = np.ones(words.shape, bool)
+            np.not_equal(words[1:], words[:-1], out=changed[1:])
+            positions = np.flatnonzero(changed).astype("<u4")
+            parts.extend([struct.pack("<I", len(positions)), positions.tobytes(), words[changed].tobytes()])
+        parts.append(raw[:, self._other].T.tobytes())
+        return b"".join(parts)
+
+    def decode(self, data: bytes, num_records: int) -> npt.NDArray[Any]:
+        """
+        Records encoded by [encode][ctsgen3.recording.archive.ArchiveCodec.encode].
+        """
+        raw = np.empty((num_records, self.dtype.itemsize), np.uint8)
+        position = 0
+        for offset in self._frames:
+            planes = np.frombuffer(data, np.uint8, 2 * num_records * (_FRAME_BYTES // 2), position)
+            position += planes.nbytes
+            deltas = planes.reshape(2, num_records, -1).transpose(1, 2, 0).copy().view("<u2")[..., 0]
+            frames = np.cumsum(deltas, axis=0, dtype=np.uint16)
+            raw[:, offset : offset + _FRAME_BYTES] = frames.view(np.uint8)
+        if self._metadata is not None:
+            (count,) = struct.unpack_from("<I", data, position)
+            positions = np.frombuffer(data, "<u4", count, position + 4)
+            values = np.frombuffer(data, "<u4", count, position + 4 + positions.nbytes)
+            position += 4 + positions.nbytes + values.nbytes
+            changed = np.zeros(num_records * _METADATA_WORDS, bool)
+            changed[positions] = True
+            latest = np.zeros(num_records * _METADATA_WORDS, "<u4")
+            latest[positions] = values
+            # each word is taken from the last record (at or before this one) in which it changed
+            source = np.where(changed.reshape(num_records, -1), np.arange(num_records)[:, np.newaxis], 0)
+            np.maximum.accumulate(source, axis=0, out=source)
+            words = latest.reshape(num_records, -1)[source, np.arange(_METADATA_WORDS)]
+            raw[:, self._metadata : self._metadata + ctypes.sizeof(RegisterMap)] = words.view(np.uint8)
+        other = np.frombuffer(data, np.uint8, len(self._other) * num_records, position)
+        raw[:, self._other] = other.reshape(len(self._other), num_records).T
+        records: npt.NDArray[Any] = raw.view(self.dtype)[:, 0]
+        return records
+
+
+def _compress(data: bytes, compression: ArchiveCompression, level: Optional[int]) -> bytes:
+    if compression == ArchiveCompression.LZMA:
+        return lzma.compress(data, preset=level)
+    return zlib.compress(data, -1 if level is None else level)
+
+
+def _decompress(data: bytes, compression: ArchiveCompression) -> bytes:
+    return lzma.decompress(data) if compression == ArchiveCompression.LZMA else zlib.decompress(data)
+
+
+class ArchiveWriter:
+    """
+    Writes packets, with their host timestamp and CRC status, to a compressed archive in independently decodable
+    chunks of `chunk_size` records (see [ArchiveCodec][ctsgen3.recording.archive.ArchiveCodec]). A drop-in
+    replacement for a [Recorder][ctsgen3.recording.recording.Recorder] when disk space matters more than CPU; the last
+    partial chunk is written on [close][ctsgen3.recording.archive.ArchiveWriter.close].
+
+    ```
+    with ArchiveWriter("capture.ctsa") as writer:
+        for packet in reader:
+            writer.write(packet)
+    ```
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike[str]],
+        packet_type: Type[ctypes.Structure] = SpiPacket,
+        chunk_size: int = 1024,
+        compression: ArchiveCompression = ArchiveCompression.ZLIB,
+        level: Optional[int] = None,
+    ) -> None:
+        self.path = path
+        self.packet_type = packet_type
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.level = level
+        """
+        Compression level, the compressor's default if `None`.
+        """
+        self.num_records = 0
+        self.codec = ArchiveCodec(packet_type)
+        self._chunk = np.zeros(chunk_size, self.codec.dtype)
+        self._records = [
+            record_type(packet_type).from_buffer(self._chunk.view(np.uint8).data, index * self.codec.dtype.itemsize)
+            for index in range(chunk_size)
+        ]
+        self._packet_offset = record_type(packet_type).packet.offset
+        self._count = 0  # records in the current chunk
+        self._file = open(path, "wb")
+        self._file.write(
+            ArchiveFileHeader(
+                magic=ARCHIVE_MAGIC,
+                version=ARCHIVE_VERSION,
+                sections=packet_sections(packet_type),
+                packet_size=ctypes.sizeof(packet_type),
+                record_size=self.codec.dtype.itemsize,
+                compression=compression,
+                chunk_size=chunk_size,
+            )
+        )
+
+    def write(
+        self,
+        packet: Union[ctypes.Structure, bytes],
+        crc_failures: SpiSection = SpiSection(0),
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """
+        Append `packet` (a `packet_type` struct or its bytes), timestamped now unless `timestamp` is given.
+        """
+        record = self._records[self._count]
+        record.timestamp = time.time() if timestamp is None else timestamp
+        record.crc_failures = crc_failures
+        ctypes.memmove(ctypes.addressof(record) + self._packet_offset, bytes(packet), ctypes.sizeof(self.packet_type))
+        self._count += 1
+        self.num_records += 1
+        if self._count == self.chunk_size:
+            self.flush()
+
+    def write_records(self, records: npt.NDArray[Any]) -> None:
+        """
+        Append [Recording][ctsgen3.recording.recording.Recording] records of `packet_type`, e.g. to archive a recording
+        chunk by chunk.
+        """
+        start = 0
+        while start < len(records):
+            count = min(len(records) - start, self.chunk_size - self._count)
+            self._chunk[self._count : self._count + count] = records[start : start + count]
+            self._count += count
+            self.num_records += count
+            start += count
+            if self._count == self.chunk_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """
+        Compress and write the records buffered so far as a chunk.
+        """
+        if not self._count:
+            return
+        records = self._chunk[: self._count]
+        data = _compress(self.codec.encode(records), self.compression, self.level)
+        header = ArchiveChunkHeader(
+            num_records=self._count,
+            compressed_size=len(data),
+            first_timestamp=records["timestamp"][0],
+            last_timestamp=records["timestamp"][-1],
+        )
+        self._file.write(header)
+        self._file.write(data)
+        self._file.flush()
+        self._count = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class Archive:
+    """
+    Random access reader of an archive file. Opening reads only the chunk headers, and each access decompresses only
+    the chunks it needs; the most recently decoded chunk is kept, so reading packets in order decodes each chunk once.
+    The file stays open until [close][ctsgen3.recording.archive.Archive.close].
+
+    Decoded records have the same structured dtype as [Recording][ctsgen3.recording.recording.Recording] records:
+
+    ```
+    with Archive("capture.ctsa") as archive:
+        for records in archive.chunks():
+            thermal_frames = records["packet"]["thermal_frame"]["thermal_frame"]
+        last_minute = archive.time_slice(archive.last_timestamps[-1] - 60, archive.last_timestamps[-1])
+    ```
+    """
+
+    def __init__(self, path: Union[str, os.PathLike[str]]) -> None:
+        self.path = path
+        offsets: List[int] = []
+        headers: List[ArchiveChunkHeader] = []
+        self._file = open(path, "rb")
+        try:
+            self.header = ArchiveFileHeader.from_buffer_copy(self._file.read(ctypes.sizeof(ArchiveFileHeader)))
+            if self.header.magic != ARCHIVE_MAGIC:
+                raise ValueError(f"{path} is not an archive")
+            if self.header.version != ARCHIVE_VERSION:
+                raise ValueError(f"Unsupported archive version {self.header.version}")
+            size = os.fstat(self._file.fileno()).st_size
+            offset = ctypes.sizeof(ArchiveFileHeader)
+            while offset + ctypes.sizeof(ArchiveChunkHeader) <= size:
+                self._file.seek(offset)
+                header = ArchiveChunkHeader.from_buffer_copy(self._file.read(ctypes.sizeof(ArchiveChunkHeader)))
+                offset += ctypes.sizeof(ArchiveChunkHeader)
+                if offset + header.compressed_size > size:
+                    break  # a trailing partial chunk (e.g. the writer was killed mid write) is ignored
+                offsets.append(offset)
+                headers.append(header)
+                offset += header.compressed_size
+        except BaseException:
+            self._file.close()
+            raise
+        self.packet_type = spi_packet_type(SpiSection(self.header.sections))
+        """
+        Packet struct of the archived sections, see [spi_packet_type][ctsgen3.spi.spi.spi_packet_type].
+        """
+        self.compression = ArchiveCompression(self.header.compression)
+        self.codec = ArchiveCodec(self.packet_type)
+        self._offsets = offsets
+        self._sizes = [header.compressed_size for header in headers]
+        self.chunk_lengths = np.array([header.num_records for header in headers], np.int64)
+        self.chunk_starts = np.concatenate([[0], np.cumsum(self.chunk_lengths)[:-1]]).astype(np.int64)
+        """
+        Index of the first record of each chunk.
+        """
+        self.first_timestamps = np.array([header.first_timestamp for header in headers])
+        self.last_timestamps = np.array([header.last_timestamp for header in headers])
+        self._cached: Optional[int] = None
+        self._cached_records: Optional[npt.NDArray[Any]] = None
+
+    def __len__(self) -> int:
+        return int(self.chunk_lengths.sum())
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self._offsets)
+
+    def chunk(self, index: int) -> npt.NDArray[Any]:
+        """
+        Decoded records of chunk `index`.
+        """
+        if index != self._cached or self._cached_records is None:
+            self._file.seek(self._offsets[index])
+            data = _decompress(self._file.read(self._sizes[index]), self.compression)
+            self._cached_records = self.codec.decode(data, int(self.chunk_lengths[index]))
+            self._cached = index
+        return self._cached_records
+
+    def chunks(self) -> Iterator[npt.NDArray[Any]]:
+        for index in range(self.num_chunks):
+            yield self.chunk(index)
+
+    def packet(self, index: int) -> ctypes.Structure:
+        """
+        Copy of record `index` as a `packet_type` struct.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        chunk = int(np.searchsorted(self.chunk_starts, index, side="right")) - 1
+        offset = index - int(self.chunk_starts[chunk])
+        return self.packet_type.from_buffer_copy(self.chunk(chunk)[offset : offset + 1]["packet"].tobytes())
+
+    def time_slice(self, start: float, stop: float) -> npt.NDArray[Any]:
+        """
+        Records with `start <= timestamp < stop`, decoding only the chunks that overlap, assuming timestamps are
+        increasing.
+        """
+        parts = []
+        for index in np.flatnonzero((self.last_timestamps >= start) & (self.first_timestamps < stop)):
+            records = self.chunk(int(index))
+            timestamps = records["timestamp"]
+            parts.append(records[np.searchsorted(timestamps, start) : np.searchsorted(timestamps, stop)])
+        return np.concatenate(parts) if parts else np.empty(0, self.codec.dtype)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def archive_recording(
+    recording: Recording,
+    path: Union[str, os.PathLike[str]],
+    chunk_size: int = 1024,
+    compression: ArchiveCompression = ArchiveCompression.ZLIB,
+    level: Optional[int] = None,
+) -> None:
+    """
+    Write every record of `recording` to a new archive at `path`, reading the memory-mapped recording one chunk at a
+    time.
+    """
+    with ArchiveWriter(path, recording.packet_type, chunk_size, compression, level) as writer:
+        for records in recording.chunks(chunk_size):
+            writer.write_records(records)
+
+
+if __name__ == "__main__":
+    import itertools
+    import tempfile
+
+    from ctsgen3.device.device import synthetic_packets
+
+    parser = argparse.ArgumentParser(description="Compression ratio and speed of the archive format.")
+    parser.add_argument("recording", nargs="?", help="recording to archive (default: 8192 synthetic frames)")
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+    if args.recording:
+        recording = Recording(args.recording)
+        packet_type, records = recording.packet_type, recording.records
+    else:
+        packet_type = SpiPacket
+        records = np.zeros(8192, struct_dtype(record_type(SpiPacket)))
+        records["timestamp"] = np.arange(len(records)) / 60.0
+        packets = b"".join(itertools.islice(synthetic_packets(), len(records)))
+        records["packet"] = np.frombuffer(packets, struct_dtype(SpiPacket))
+    with tempfile.TemporaryDirectory() as directory:
+        for compression in ArchiveCompression:
+            path = os.path.join(directory, f"archive_{compression.name}")
+            start = time.perf_counter()
+            with ArchiveWriter(path, packet_type, args.chunk_size, compression) as writer:
+                writer.write_records(records)
+            encode = time.perf_counter() - start
+            with Archive(path) as archive:
+                start = time.perf_counter()
+                decoded = np.concatenate(list(archive.chunks()))
+                decode = time.perf_counter() - start
+            assert decoded.tobytes() == np.ascontiguousarray(records).tobytes()
+            ratio = records.nbytes / os.path.getsize(path)
+            print(
+                f"{compression.name:5} ratio {ratio:5.1f}x  {os.path.getsize(path) / len(records):7.1f} bytes/frame  "
+                f"encode {len(records) / encode:9.0f} frames/s  decode {len(records) / decode:9.0f} frames/s"
+            )
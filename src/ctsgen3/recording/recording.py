@@ -0,0 +1,193 @@
+import ctypes
+import functools
+import os
+import time
+from types import TracebackType
+from typing import Any, Iterator, Optional, Type, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from ctsgen3.registers.dtypes import struct_dtype
+from ctsgen3.spi.spi import SpiPacket, SpiSection, packet_sections, spi_packet_type
+
+RECORDING_MAGIC = b"CTSGEN3R"
+RECORDING_VERSION = 1
+
+
+class RecordingFileHeader(ctypes.LittleEndianStructure):
+    """
+    Header at the start of every recording file.
+
+    The header is followed by fixed size records ([record_type][ctsgen3.recording.recording.record_type]), so record
+    `n` starts at byte `ctypes.sizeof(RecordingFileHeader) + n * record_size` and the file needs no separate index.
+    """
+
+    _fields_ = [
+        ("magic", ctypes.c_char * 8),
+        ("version", ctypes.c_uint16),
+        ("sections", ctypes.c_uint16),  # SpiSection flags of the recorded packet layout
+        ("packet_size", ctypes.c_uint32),
+        ("record_size", ctypes.c_uint32),
+        ("_reserved", ctypes.c_uint32 * 3),
+    ]
+    _pack_ = 1
+
+
+assert ctypes.sizeof(RecordingFileHeader) == 32
+
+
+class RecordHeader(ctypes.LittleEndianStructure):
+    """
+    Host side information stored in front of each recorded packet.
+    """
+
+    _fields_ = [
+        ("timestamp", ctypes.c_double),  # host time.time() when the packet was received
+        ("crc_failures", ctypes.c_uint16),  # SpiSection flags of sections that failed their CRC
+        ("_reserved", ctypes.c_uint16),
+    ]
+    _pack_ = 1
+
+
+@functools.cache
+def record_type(packet_type: Type[ctypes.Structure] = SpiPacket) -> Type[ctypes.Structure]:
+    """
+    Struct of one record: the [RecordHeader][ctsgen3.recording.recording.RecordHeader] fields followed by `packet`.
+    """
+    return type(
+        f"{packet_type.__name__}Record",
+        (ctypes.LittleEndianStructure,),
+        {"_fields_": RecordHeader._fields_ + [("packet", packet_type)], "_pack_": 1},
+    )
+
+
+class Recorder:
+    """
+    Appends packets, with their host timestamp and CRC status, to a recording file.
+
+    ```
+    with Recorder("capture.cts") as recorder:
+        for packet in reader:
+            recorder.write(packet)
+    ```
+    """
+
+    def __init__(
+        self, path: Union[str, os.PathLike[str]], packet_type: Type[ctypes.Structure] = SpiPacket, buffering: int = -1
+    ) -> None:
+        self.path = path
+        self.packet_type = packet_type
+        self.num_records = 0
+        self._header = RecordHeader()
+        self._file = open(path, "wb", buffering=buffering)
+        self._file.write(
+            RecordingFileHeader(
+                magic=RECORDING_MAGIC,
+                version=RECORDING_VERSION,
+                sections=packet_sections(packet_type),
+                packet_size=ctypes.sizeof(packet_type),
+                record_size=ctypes.sizeof(record_type(packet_type)),
+            )
+        )
+
+    def write(
+        self, packet: ctypes.Structure, crc_failures: SpiSection = SpiSection(0), timestamp: Optional[float] = None
+    ) -> None:
+        """
+        Append `packet`, timestamped now unless `timestamp` is given.
+        """
+        self._header.timestamp = time.time() if timestamp is None else timestamp
+        self._header.crc_failures = crc_failures
+        self._file.write(self._header)
+        self._file.write(packet)
+        self.num_records += 1
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class Recording:
+    """
+    Random access reader of a recording file, memory-mapped so that recordings larger than RAM can be sliced and
+    iterated without loading them.
+
+    [records][ctsgen3.recording.recording.Recording.records] is a NumPy structured array (see
+    [struct_dtype][ctsgen3.registers.dtypes.struct_dtype]) with `timestamp`, `crc_failures` and `packet` fields, e.g.
+
+    ```
+    recording = Recording("capture.cts")
+    thermal_frames = recording.records["packet"]["thermal_frame"]["thermal_frame"]  # (N, PIXEL_HEIGHT * PIXEL_WIDTH)
+    last_minute = recording.time_slice(recording.timestamps[-1] - 60, recording.timestamps[-1])
+    ```
+    """
+
+    def __init__(self, path: Union[str, os.PathLike[str]]) -> None:
+        self.path = path
+        with open(path, "rb") as file:
+            self.header = RecordingFileHeader.from_buffer_copy(file.read(ctypes.sizeof(RecordingFileHeader)))
+        if self.header.magic != RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a recording")
+        if self.header.version != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version {self.header.version}")
+        packet_type = spi_packet_type(SpiSection(self.header.sections))
+        if self.header.packet_size != ctypes.sizeof(packet_type):
+            raise ValueError(f"Recorded packet size {self.header.packet_size} does not match {packet_type.__name__}")
+        self.packet_type = packet_type
+        """
+        Packet struct of the recorded sections, see [spi_packet_type][ctsgen3.spi.spi.spi_packet_type].
+        """
+        dtype = struct_dtype(record_type(packet_type))
+        # a trailing partial record (e.g. the recorder was killed mid write) is ignored
+        num_records = (os.path.getsize(path) - ctypes.sizeof(RecordingFileHeader)) // dtype.itemsize
+        self.records: npt.NDArray[Any] = (
+            np.memmap(path, dtype=dtype, mode="r", offset=ctypes.sizeof(RecordingFileHeader), shape=(num_records,))
+            if num_records
+            else np.empty(0, dtype=dtype)
+        )
+
+    @property
+    def timestamps(self) -> npt.NDArray[np.float64]:
+        """
+        Host timestamp of every record.
+        """
+        return self.records["timestamp"]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def packet(self, index: int) -> ctypes.Structure:
+        """
+        Copy of record `index` (negative indices count from the end) as a `packet_type` struct.
+        """
+        return self.packet_type.from_buffer_copy(self.records[index]["packet"].tobytes())
+
+    def time_slice(self, start: float, stop: float) -> npt.NDArray[Any]:
+        """
+        View of the records with `start <= timestamp < stop`, assuming timestamps are increasing.
+        """
+        timestamps = self.timestamps
+        return self.records[np.searchsorted(timestamps, start) : np.searchsorted(timestamps, stop)]
+
+    def chunks(self, size: int = 4096, valid_only: bool = False) -> Iterator[npt.NDArray[Any]]:
+        """
+        Iterate over views of `size` consecutive records, optionally dropping records that failed any CRC. Only the
+        pages of the current chunk need to be resident.
+        """
+        for start in range(0, len(self.records), size):
+            chunk = self.records[start : start + size]
+            yield chunk[chunk["crc_failures"] == 0] if valid_only else chunk
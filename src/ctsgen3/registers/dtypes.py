@@ -0,0 +1,98 @@
+import ctypes
+import functools
+from typing import Any, Dict, Tuple, Type
+
+import numpy as np
+import numpy.typing as npt
+
+from ctsgen3.registers.registers import RegisterMap
+
+
+def _is_bitfield(struct_type: Type[ctypes.Structure]) -> bool:
+    return any(len(field) == 3 for field in struct_type._fields_)
+
+
+def _field_dtype(field_type: Any) -> np.dtype[Any]:
+    if issubclass(field_type, ctypes.Structure):
+        return struct_dtype(field_type)
+    if issubclass(field_type, ctypes.Array):
+        return np.dtype((_field_dtype(field_type._type_), (field_type._length_,)))
+    dtype: np.dtype[Any] = np.dtype(field_type)
+    return dtype.newbyteorder("<")
+
+
+@functools.cache
+def struct_dtype(struct_type: Type[ctypes.Structure]) -> np.dtype[Any]:
+    """
+    NumPy structured dtype with the same byte layout as the little-endian ctypes struct `struct_type`.
+
+    Nested structs become nested dtypes with the same field names, and arrays become subarrays. A register made of
+    bitfields (e.g. [CTS_CTRL_0x1F][ctsgen3.registers.registers.CTS_CTRL_0x1F]) becomes its unsigned storage word,
+    from which fields are extracted with [bitfield][ctsgen3.registers.dtypes.bitfield].
+    """
+    if _is_bitfield(struct_type):
+        return np.dtype(f"<u{ctypes.sizeof(struct_type)}")
+    return np.dtype(
+        {
+            "names": [name for name, *_ in struct_type._fields_],
+            "formats": [_field_dtype(field_type) for _, field_type, *_ in struct_type._fields_],
+            "offsets": [getattr(struct_type, name).offset for name, *_ in struct_type._fields_],
+            "itemsize": ctypes.sizeof(struct_type),
+        }
+    )
+
+
+@functools.cache
+def bitfields(register_type: Type[ctypes.Structure]) -> Dict[str, Tuple[int, int]]:
+    """
+    `{name: (shift, width)}` of each bitfield in `register_type`, as laid out by ctypes.
+    """
+    layout = {}
+    for name, *_ in register_type._fields_:
+        register = register_type()
+        setattr(register, name, -1)  # ctypes truncates to the field width, setting every bit of the field
+        mask = int.from_bytes(bytes(register), "little")
+        layout[name] = ((mask & -mask).bit_length() - 1, mask.bit_count())
+    return layout
+
+
+def bitfield(
+    values: npt.NDArray[np.unsignedinteger[Any]], register_type: Type[ctypes.Structure], name: str
+) -> npt.NDArray[Any]:
+    """
+    Vectorised extraction of bitfield `name` from an array of `register_type` words, e.g.
+
+    ```
+    frame_rate_mode = bitfield(metadata["CTS_CTRL_0x1F"], CTS_CTRL_0x1F, "FRAME_RATE_MODE")
+    ```
+    """
+    shift, width = bitfields(register_type)[name]
+    return (values >> shift) & ((1 << width) - 1)
+
+
+def layout_matches(struct_type: Type[ctypes.Structure], dtype: np.dtype[Any]) -> bool:
+    """
+    Whether every field of `struct_type` decodes to the same value through `dtype`, checked on a non-repeating byte
+    pattern so that any offset, size or byte order mismatch shows up.
+    """
+    raw = bytes((7 * i) % 251 for i in range(ctypes.sizeof(struct_type)))
+    return dtype.itemsize == len(raw) and _values_match(struct_type.from_buffer_copy(raw), np.frombuffer(raw, dtype)[0])
+
+
+def _values_match(struct: Any, record: Any) -> bool:
+    if isinstance(struct, ctypes.Structure):
+        if _is_bitfield(type(struct)):
+            return all(
+                getattr(struct, name) == int(bitfield(np.asarray(record), type(struct), name))
+                for name in bitfields(type(struct))
+            )
+        return all(_values_match(getattr(struct, name), record[name]) for name, *_ in struct._fields_)
+    if isinstance(struct, ctypes.Array):
+        return all(_values_match(element, value) for element, value in zip(struct, record))
+    return bool(struct == record or (struct != struct and record != record))  # NaN bytes are equal too
+
+
+REGISTER_MAP_DTYPE = struct_dtype(RegisterMap)
+"""
+NumPy structured dtype equivalent of [RegisterMap][ctsgen3.registers.registers.RegisterMap].
+"""
@@ -323,9 +323,9 @@ class RESERVED_0x1A_0x1E(ctypes.LittleEndianStructure):  # 0x1A - 0x1E
     _fields_ = [
         ("_reserved0", ctypes.c_uint32),
         ("_reserved1", ctypes.c_uint32),
-        ("_reserved0", ctypes.c_uint32),
-        ("_reserved0", ctypes.c_uint32),
-        ("_reserved0", ctypes.c_uint32),
+        ("_reserved2", ctypes.c_uint32),
+        ("_reserved3", ctypes.c_uint32),
+        ("_reserved4", ctypes.c_uint32),
     ]
     _pack_ = 1
 
@@ -0,0 +1,148 @@
+import ctypes
+from typing import Any, ClassVar, Dict, FrozenSet, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ctsgen3.registers.registers import RegisterMap
+
+STATIC_REGISTERS = frozenset(
+    {
+        "SERIAL_NUMBER_LO_0x14",
+        "SERIAL_NUMBER_HI_0x15",
+        "FW_VERSION_0x16",
+        "FOV_LENS_0x17",
+        "DECENTRATION_0x18",
+        "CALIB_PARAMS_0x19",
+        "BB_WIDTH_0x20",
+        "BB_HEIGHT_0x21",
+        "IR_RESOLUTION_0x3C",
+        "CMOS_RESOLUTION_0x3D",
+    }
+)
+"""
+Registers set at manufacture or configuration that are not expected to change while streaming. Their decoded structs
+are cached per device (by serial number) and shared between snapshots.
+"""
+
+_LAYOUT: Dict[str, Tuple[Any, int, int]] = {
+    name: (register_type, getattr(RegisterMap, name).offset, ctypes.sizeof(register_type))
+    for name, register_type, *_ in RegisterMap._fields_
+}
+_WORD_REGISTER = np.array(
+    [name for name, (_, offset, size) in _LAYOUT.items() for _ in range(offset // 4, (offset + size) // 4)],
+    dtype=object,
+)  # name of the register each 32 bit word belongs to
+_SERIAL_NUMBER = slice(_LAYOUT["SERIAL_NUMBER_LO_0x14"][1], _LAYOUT["FW_VERSION_0x16"][1])
+
+assert len(_WORD_REGISTER) == ctypes.sizeof(RegisterMap) // 4
+
+
+class RegisterSnapshot:
+    """
+    Read-only view of one metadata block that decodes each register on first access, e.g.
+    `snapshot.EXPOSURE_0x05.exposure`, instead of decoding all 64 registers of every packet.
+
+    Given the `previous` snapshot of the same stream,
+    [changed][ctsgen3.registers.snapshot.RegisterSnapshot.changed] lists the registers whose bytes differ, and
+    registers that did not change reuse the previous snapshot's decoded struct. Decoded structs are shared, so must not
+    be modified.
+    """
+
+    _static_cache: ClassVar[Dict[bytes, Dict[str, Tuple[bytes, ctypes.Structure]]]] = {}
+
+    def __init__(self, raw: Union[bytes, RegisterMap], previous: Optional["RegisterSnapshot"] = None) -> None:
+        self.raw = bytes(raw)
+        if len(self.raw) != ctypes.sizeof(RegisterMap):
+            raise ValueError(f"Expected {ctypes.sizeof(RegisterMap)} bytes, got {len(self.raw)}")
+        self._decoded: Dict[str, ctypes.Structure] = {}
+        self._changed: Optional[FrozenSet[str]] = None
+        self._previous = previous
+        self._static = self._static_cache.setdefault(self.raw[_SERIAL_NUMBER], {})
+
+    @property
+    def changed(self) -> FrozenSet[str]:
+        """
+        Names of the registers that differ from the previous snapshot, every register if there is none. Identical
+        blocks are found with a single comparison of the raw bytes, otherwise the differing 32 bit words are found with
+        one vectorised comparison.
+        """
+        if self._changed is None:
+            previous = self._previous
+            if previous is None:
+                self._changed = frozenset(_LAYOUT)
+            elif previous.raw == self.raw:
+                self._changed = frozenset()
+            else:
+                words = np.frombuffer(self.raw, "<u4") != np.frombuffer(previous.raw, "<u4")
+                self._changed = frozenset(_WORD_REGISTER[words])
+        return self._changed
+
+    def _detach(self) -> None:
+        # settle the changed registers against the previous snapshot, then drop it to keep one snapshot of history alive
+        self._changed = self.changed
+        self._previous = None
+
+    def __getattr__(self, name: str) -> ctypes.Structure:
+        # only called for attributes not found normally, i.e. registers
+        if name not in _LAYOUT:
+            raise AttributeError(name)
+        decoded = self._decoded.get(name)
+        if decoded is None:
+            decoded = self._decode(name)
+            self._decoded[name] = decoded
+        return decoded
+
+    def _decode(self, name: str) -> ctypes.Structure:
+        register_type, offset, size = _LAYOUT[name]
+        raw = self.raw[offset : offset + size]
+        if name in STATIC_REGISTERS:
+            cached = self._static.get(name)
+            if cached is not None and cached[0] == raw:
+                return cached[1]
+        previous = self._previous
+        if previous is not None and name in previous._decoded and name not in self.changed:
+            decoded: ctypes.Structure = previous._decoded[name]
+        else:
+            decoded = register_type.from_buffer_copy(raw)
+        if name in STATIC_REGISTERS:
+            self._static[name] = (raw, decoded)
+        return decoded
+
+    def changed_registers(self) -> Dict[str, ctypes.Structure]:
+        """
+        Decoded structs of only the registers in [changed][ctsgen3.registers.snapshot.RegisterSnapshot.changed].
+        """
+        return {name: getattr(self, name) for name in sorted(self.changed, key=lambda name: _LAYOUT[name][1])}
+
+    def register_map(self) -> RegisterMap:
+        """
+        The whole block decoded as a [RegisterMap][ctsgen3.registers.registers.RegisterMap].
+        """
+        return RegisterMap.from_buffer_copy(self.raw)
+
+    def __dir__(self) -> List[str]:
+        return list(super().__dir__()) + list(_LAYOUT)
+
+
+class RegisterTracker:
+    """
+    Snapshots of a stream of metadata blocks, each linked to the previous one:
+
+    ```
+    tracker = RegisterTracker()
+    for packet in reader:
+        snapshot = tracker.update(packet.metadata.metadata)
+        if "EXPOSURE_0x05" in snapshot.changed:
+            ...
+    ```
+    """
+
+    def __init__(self) -> None:
+        self.snapshot: Optional[RegisterSnapshot] = None
+
+    def update(self, registers: Union[bytes, RegisterMap]) -> RegisterSnapshot:
+        previous = self.snapshot
+        if previous is not None:
+            previous._detach()
+        self.snapshot = RegisterSnapshot(registers, previous)
+        return self.snapshot
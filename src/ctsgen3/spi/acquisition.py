@@ -0,0 +1,103 @@
+import ctypes
+import queue
+import threading
+from typing import Optional
+
+from ctsgen3.spi.reader import SpiPacketReader
+from ctsgen3.spi.ring import SpiPacketRing
+
+
+class AcquisitionThread(threading.Thread):
+    """
+    Reads frames ([next_frame][ctsgen3.spi.reader.SpiPacketReader.next_frame]) on a background thread so that
+    acquisition runs at the sensor's rate regardless of how long the consumer (e.g. rendering) takes.
+
+    Valid packets are written into a [SpiPacketRing][ctsgen3.spi.ring.SpiPacketRing] and their sequence numbers are
+    published to a queue of at most `maxsize` entries. When the consumer falls behind, the oldest queued packet is
+    dropped rather than blocking the reader.
+
+    ```
+    acquisition = AcquisitionThread(SpiPacketReader.open())
+    acquisition.start()
+    packet = SpiPacket()
+    if acquisition.latest(packet, timeout=1.0):
+        ...
+    acquisition.stop()
+    ```
+    """
+
+    def __init__(self, reader: SpiPacketReader, maxsize: int = 4, capacity: int = 16) -> None:
+        super().__init__(name="ctsgen3-acquisition", daemon=True)
+        if capacity <= maxsize:
+            raise ValueError("capacity must exceed maxsize so queued packets are not overwritten")
+        self.reader = reader
+        self.ring = SpiPacketRing(capacity, reader.packet_type)
+        self.queue: queue.Queue[int] = queue.Queue(maxsize)
+        """
+        Sequence numbers (`ring.count` at commit) of packets waiting for the consumer.
+        """
+        self.num_dropped = 0
+        """
+        Packets discarded by the reader thread because the queue was full.
+        """
+        self.num_late = 0
+        """
+        Packets the consumer skipped because a newer one was available.
+        """
+        self.error: Optional[BaseException] = None
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                if self.reader.next_frame(self.ring.claim(), timeout=0.1):
+                    self.ring.commit()
+                    self._publish(self.ring.count - 1)
+        except BaseException as error:
+            self.error = error
+
+    def _publish(self, sequence: int) -> None:
+        try:
+            self.queue.put_nowait(sequence)
+        except queue.Full:
+            try:
+                self.queue.get_nowait()
+                self.num_dropped += 1
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(sequence)
+
+    def latest(self, packet: ctypes.Structure, timeout: Optional[float] = None) -> bool:
+        """
+        Copy the newest packet into `packet`, skipping any older queued packets. Waits up to `timeout` seconds (forever
+        if `None`) for a packet and returns whether one was copied. Re-raises any error from the reader thread.
+        """
+        try:
+            sequence = self.queue.get(timeout=timeout) if timeout != 0 else self.queue.get_nowait()
+        except queue.Empty:
+            if self.error is not None:
+                raise self.error
+            return False
+        while True:
+            try:
+                newer = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.num_late += 1
+            sequence = newer
+        ctypes.memmove(
+            ctypes.addressof(packet),
+            ctypes.addressof(self.ring.packets[sequence % self.ring.capacity]),
+            ctypes.sizeof(self.ring.packet_type),
+        )
+        if self.ring.count - sequence >= self.ring.capacity:  # the reader lapped the ring while we were copying
+            self.num_late += 1
+            return False
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop reading and wait for the thread to finish.
+        """
+        self._stop_event.set()
+        self.join(timeout)
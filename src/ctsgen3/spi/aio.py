@@ -0,0 +1,137 @@
+import asyncio
+import concurrent.futures
+import ctypes
+from types import TracebackType
+from typing import AsyncIterator, Optional, Tuple, Type
+
+from ctsgen3.spi.reader import SpiPacketReader
+
+
+class AsyncPacketStream:
+    """
+    Async iterator of the new valid frames of a [SpiPacketReader][ctsgen3.spi.reader.SpiPacketReader], for embedding
+    acquisition in an asyncio service:
+
+    ```
+    async with AsyncPacketStream(SpiPacketReader.open()) as stream:
+        async for packet in stream:
+            await client.send(bytes(packet))
+    ```
+
+    The blocking DRDY waits and transfers ([next_frame][ctsgen3.spi.reader.SpiPacketReader.next_frame]) run on
+    `executor`, by default a single thread owned by the stream, so one event loop can serve many sensors and clients.
+    As with iterating the reader, the same preallocated packet is returned each time, so copy it to keep it past the
+    next read.
+
+    Cancelling a [read][ctsgen3.spi.aio.AsyncPacketStream.read] (e.g. by `asyncio.wait_for`) does not interrupt the
+    transfer in flight: the next read picks up its result, and [aclose][ctsgen3.spi.aio.AsyncPacketStream.aclose] waits
+    for it to finish before closing the device, so the FT4222 handle is never closed under a transfer.
+    """
+
+    def __init__(
+        self,
+        reader: SpiPacketReader,
+        executor: Optional[concurrent.futures.Executor] = None,
+        poll_timeout: float = 1.0,
+    ) -> None:
+        self.reader = reader
+        self.poll_timeout = poll_timeout
+        """
+        Seconds each executor call waits for a frame before returning, bounding how long closing waits.
+        """
+        self._executor = executor or concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="ctsgen3-aio")
+        self._owns_executor = executor is None
+        self._pending: Optional[asyncio.Future[bool]] = None
+        self._closed = False
+
+    async def read(self) -> ctypes.Structure:
+        """
+        Wait for the next new valid frame and return the reader's packet holding it.
+        """
+        loop = asyncio.get_running_loop()
+        while not self._closed:
+            if self._pending is None:
+                self._pending = loop.run_in_executor(
+                    self._executor, self.reader.next_frame, self.reader.packet, self.poll_timeout
+                )
+            pending = self._pending
+            try:
+                # shielded, so cancelling this read leaves the transfer running for the next read or aclose to collect
+                valid = await asyncio.shield(pending)
+            finally:
+                if pending.done():
+                    self._pending = None
+            if valid:
+                return self.reader.packet
+        raise RuntimeError("Stream is closed")
+
+    def __aiter__(self) -> "AsyncPacketStream":
+        return self
+
+    async def __anext__(self) -> ctypes.Structure:
+        try:
+            return await self.read()
+        except EOFError:  # a replayed source ran out
+            raise StopAsyncIteration
+        except RuntimeError:
+            if self._closed:  # closed by another task, while or before waiting
+                raise StopAsyncIteration
+            raise
+
+    async def aclose(self) -> None:
+        """
+        Stop reading, wait for any transfer in flight and close the reader's device.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            await asyncio.wait([pending])  # finished or failed, the device is closed either way
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.reader.close)
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncPacketStream":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.aclose()
+
+
+async def merge_streams(*streams: AsyncPacketStream) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Frames of several streams as they arrive, as `(index of the stream, copy of the packet)`. Each stream is read by
+    its own task, so a slow or disconnected sensor does not hold up the others. Closing the iterator cancels the
+    tasks; the streams are left open.
+    """
+    queue: asyncio.Queue[Tuple[int, bytes]] = asyncio.Queue()
+
+    async def forward(index: int, stream: AsyncPacketStream) -> None:
+        async for packet in stream:
+            queue.put_nowait((index, bytes(packet)))
+
+    tasks = [asyncio.create_task(forward(index, stream)) for index, stream in enumerate(streams)]
+    try:
+        while True:
+            running = [task for task in tasks if not task.done()]
+            if not running and queue.empty():
+                return
+            get = asyncio.ensure_future(queue.get())
+            await asyncio.wait([get, *running], return_when=asyncio.FIRST_COMPLETED)
+            for task in tasks:
+                if task.done():
+                    task.result()  # re-raise a reader's error
+            if get.done():
+                yield get.result()
+            else:
+                get.cancel()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,173 @@
+import binascii
+import ctypes
+import functools
+from typing import List, Tuple, Type, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from ctsgen3.spi.spi import CRC_INITIAL_VALUE, CRC_POLYNOMIAL, SpiPacket, SpiSection
+
+Buffer = Union[bytes, bytearray, memoryview, ctypes.Structure]
+"""
+Any contiguous buffer holding raw SPI packet bytes.
+"""
+
+
+def _crc_table(polynomial: int) -> Tuple[int, ...]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = (crc << 1) ^ polynomial if crc & 0x8000 else crc << 1
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+
+CRC_TABLE = _crc_table(CRC_POLYNOMIAL)
+"""
+Precomputed CRC-16-CCITT (XModem) lookup table, indexed by `(crc >> 8) ^ byte`.
+"""
+_CRC_TABLE_NP = np.array(CRC_TABLE, dtype=np.uint16)
+_CRC_TABLE_WORD = np.arange(1 << 16, dtype=np.uint16)
+for _ in range(2):  # advance every 16 bit register value by two zero bytes, consuming a big-endian word per lookup
+    _CRC_TABLE_WORD = (_CRC_TABLE_WORD << 8) ^ _CRC_TABLE_NP[_CRC_TABLE_WORD >> 8]
+
+
+def crc16(data: Buffer, crc: int = CRC_INITIAL_VALUE) -> int:
+    """
+    CRC of `data` as computed by the processing module for each SPI packet section.
+
+    `binascii.crc_hqx` implements the same table driven CRC-16-CCITT in C, so no Python level loop is needed.
+    """
+    return binascii.crc_hqx(data, crc)
+
+
+def crc16_batch(data: npt.NDArray[np.uint8], crc: int = CRC_INITIAL_VALUE) -> npt.NDArray[np.uint16]:
+    """
+    CRC of each row of an (N, M) array, vectorised across rows.
+
+    Rows are consumed a 16 bit word at a time through a 65536 entry table derived from
+    [CRC_TABLE][ctsgen3.spi.crc.CRC_TABLE], halving the number of passes over the batch.
+    """
+    result = np.full(data.shape[0], crc, dtype=np.uint16)
+    index = np.empty_like(result)
+    words = np.ascontiguousarray(data[:, : data.shape[1] & ~1]).view(">u2")
+    for column in words.T:
+        np.bitwise_xor(result, column, out=index)
+        np.take(_CRC_TABLE_WORD, index, out=result)
+    if data.shape[1] & 1:
+        np.right_shift(result, 8, out=index)
+        np.bitwise_xor(index, data[:, -1], out=index)
+        np.left_shift(result, 8, out=result)
+        np.bitwise_xor(result, _CRC_TABLE_NP[index], out=result)
+    return result
+
+
+@functools.cache
+def sections(packet_type: Type[ctypes.Structure]) -> List[Tuple[SpiSection, int, int]]:
+    """
+    `(section, offset, length)` of each section in `packet_type`, where `length` excludes the trailing 2 byte CRC.
+    """
+    result = []
+    for name, section_type, *_ in packet_type._fields_:
+        offset = getattr(packet_type, name).offset
+        result.append((SpiSection[name.upper()], offset, ctypes.sizeof(section_type) - ctypes.sizeof(ctypes.c_uint16)))
+    return result
+
+
+def section_crc_matches(raw: memoryview, offset: int, length: int) -> bool:
+    """
+    Whether the section of `length` bytes at `offset` of the packet bytes `raw` matches the CRC that follows it.
+    """
+    return binascii.crc_hqx(raw[offset : offset + length], CRC_INITIAL_VALUE) == raw[offset + length] | (
+        raw[offset + length + 1] << 8
+    )
+
+
+def crc_failures(packet: Buffer, packet_type: Type[ctypes.Structure] = SpiPacket) -> SpiSection:
+    """
+    Sections of a single packet whose CRC does not match, `SpiSection(0)` when every section passes.
+    """
+    raw = memoryview(packet).cast("B")
+    if raw.nbytes != ctypes.sizeof(packet_type):
+        raise ValueError(f"Expected {ctypes.sizeof(packet_type)} bytes, got {raw.nbytes}")
+    failures = SpiSection(0)
+    for section, offset, length in sections(packet_type):
+        if not section_crc_matches(raw, offset, length):
+            failures |= section
+    return failures
+
+
+def crc_failures_batch(
+    packets: Union[Buffer, npt.NDArray[np.uint8]], packet_type: Type[ctypes.Structure] = SpiPacket
+) -> npt.NDArray[np.uint8]:
+    """
+    [SpiSection][ctsgen3.spi.spi.SpiSection] CRC failure mask of each packet in a contiguous buffer of N packets.
+    """
+    size = ctypes.sizeof(packet_type)
+    if isinstance(packets, np.ndarray):
+        flat = np.ascontiguousarray(packets).view(np.uint8).reshape(-1)
+    else:
+        flat = np.frombuffer(memoryview(packets), dtype=np.uint8)
+    if flat.size % size:
+        raise ValueError(f"Buffer of {flat.size} bytes is not a whole number of {size} byte packets")
+    raw = flat.reshape(-1, size)
+    failures = np.zeros(raw.shape[0], dtype=np.uint8)
+    for section, offset, length in sections(packet_type):
+        expected = raw[:, offset + length] | raw[:, offset + length + 1].astype(np.uint16) << 8
+        failures[crc16_batch(raw[:, offset : offset + length]) != expected] |= np.uint8(section)
+    return failures
+
+
+def update_crcs(packet: ctypes.Structure) -> None:
+    """
+    Overwrite the CRC of every section in `packet` so that it validates, e.g. for synthetic packets.
+    """
+    raw = memoryview(packet).cast("B")
+    for _, offset, length in sections(type(packet)):
+        raw[offset + length : offset + length + 2] = crc16(raw[offset : offset + length]).to_bytes(2, "little")
+
+
+if __name__ == "__main__":
+    import timeit
+
+    from crc import Calculator, Configuration
+
+    NUM_PACKETS = 4096
+    rng = np.random.default_rng(0)
+    buffer = bytearray(rng.integers(0, 256, NUM_PACKETS * ctypes.sizeof(SpiPacket), dtype=np.uint8).tobytes())
+    packets = [SpiPacket.from_buffer(buffer, i * ctypes.sizeof(SpiPacket)) for i in range(NUM_PACKETS)]
+    for packet in packets:
+        update_crcs(packet)
+    crc_calculator = Calculator(
+        Configuration(
+            width=16,
+            polynomial=CRC_POLYNOMIAL,
+            init_value=CRC_INITIAL_VALUE,
+            final_xor_value=0x00,
+            reverse_input=False,
+            reverse_output=False,
+        )
+    )
+
+    def crc_library(count: int) -> None:
+        for packet in packets[:count]:
+            for _, offset, length in sections(SpiPacket):
+                crc_calculator.checksum(ctypes.string_at(ctypes.addressof(packet) + offset, length))
+
+    def table(count: int) -> None:
+        for packet in packets[:count]:
+            crc_failures(packet)
+
+    def batch(count: int) -> None:
+        crc_failures_batch(memoryview(buffer)[: count * ctypes.sizeof(SpiPacket)])
+
+    for name, function, count in [
+        ("crc library", crc_library, 4),
+        ("crc_failures", table, NUM_PACKETS),
+        ("crc_failures_batch", batch, 256),
+        ("crc_failures_batch", batch, NUM_PACKETS),
+    ]:
+        seconds = min(timeit.repeat(lambda: function(count), number=1, repeat=5))
+        print(f"{name:>18} x {count:<5}: {1e6 * seconds / count:10.2f} us/packet")
@@ -0,0 +1,100 @@
+from typing import Any, Iterable, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from ctsgen3.spi.dtypes import CV_DETECTION_DTYPE, SPI_CV_DETECTIONS_PACKET_DTYPE
+from ctsgen3.spi.spi import MAX_NUM_DETECTIONS, SpiCvDetectionsPacket
+
+
+class DetectionTable:
+    """
+    Valid detections of a stream of packets as a struct of arrays: one column per
+    [CvDetection][ctsgen3.spi.spi.CvDetection] field plus `frame`, the index of the packet each detection came from.
+    Empty detection slots (`id == 0`) are dropped, so tracking and analytics are plain vectorised NumPy operations, e.g.
+
+    ```
+    table = DetectionTable.from_detections(recording.records["packet"]["cv_detections"]["cv_detections"])
+    hot = table[table.peak_temperature > 35.0]
+    track = table[table.id == 3]
+    detections_per_frame = np.bincount(table.frame, minlength=len(recording))
+    ```
+    """
+
+    def __init__(
+        self,
+        frame: npt.NDArray[np.int64],
+        id: npt.NDArray[np.uint8],
+        label: npt.NDArray[np.uint8],
+        temperature_centre_location_x: npt.NDArray[np.uint8],
+        temperature_centre_location_y: npt.NDArray[np.uint8],
+        frames_since_motion: npt.NDArray[np.uint32],
+        peak_temperature: npt.NDArray[np.float32],
+        foot_position_estimate_x: npt.NDArray[np.float32],
+        foot_position_estimate_y: npt.NDArray[np.float32],
+    ) -> None:
+        self.frame = frame
+        self.id = id
+        self.label = label
+        self.temperature_centre_location_x = temperature_centre_location_x
+        self.temperature_centre_location_y = temperature_centre_location_y
+        self.frames_since_motion = frames_since_motion
+        self.peak_temperature = peak_temperature
+        self.foot_position_estimate_x = foot_position_estimate_x
+        self.foot_position_estimate_y = foot_position_estimate_y
+
+    @classmethod
+    def from_detections(cls, detections: npt.NDArray[Any], first_frame: int = 0) -> "DetectionTable":
+        """
+        Table of the valid slots of `detections`, an `(N, MAX_NUM_DETECTIONS)` array of
+        [CV_DETECTION_DTYPE][ctsgen3.spi.dtypes.CV_DETECTION_DTYPE] whose row `i` is frame `first_frame + i`.
+        """
+        detections = detections.reshape(-1, MAX_NUM_DETECTIONS)
+        valid = detections["id"] != 0
+        frames, _ = np.nonzero(valid)
+        selected = detections[valid]  # one pass gathers every column of the valid slots
+        columns = {name: np.ascontiguousarray(selected[name]) for name in CV_DETECTION_DTYPE.names or ()}
+        return cls(frames.astype(np.int64) + first_frame, **columns)
+
+    @classmethod
+    def from_packets(
+        cls, packets: Iterable[Union[SpiCvDetectionsPacket, bytes]], first_frame: int = 0
+    ) -> "DetectionTable":
+        """
+        Table of the valid detections of `packets`, [SpiCvDetectionsPacket][ctsgen3.spi.spi.SpiCvDetectionsPacket]s
+        (e.g. `packet.cv_detections` of each [SpiPacket][ctsgen3.spi.spi.SpiPacket]) or their raw bytes, decoded in a
+        single batch.
+        """
+        raw = b"".join(packet if isinstance(packet, bytes) else bytes(packet) for packet in packets)
+        return cls.from_detections(np.frombuffer(raw, SPI_CV_DETECTIONS_PACKET_DTYPE)["cv_detections"], first_frame)
+
+    @classmethod
+    def concatenate(cls, tables: Sequence["DetectionTable"]) -> "DetectionTable":
+        """
+        Rows of all `tables` in order, e.g. to join the tables of consecutive chunks of a recording.
+        """
+        return cls(*(np.concatenate([getattr(table, name) for table in tables]) for name in _COLUMNS))
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __getitem__(self, index: Union[slice, npt.NDArray[np.bool_], npt.NDArray[np.integer[Any]]]) -> "DetectionTable":
+        """
+        Rows selected by a slice, boolean mask or index array.
+        """
+        return DetectionTable(*(getattr(self, name)[index] for name in _COLUMNS))
+
+    def to_records(self) -> npt.NDArray[Any]:
+        """
+        Table as a structured array of [CV_DETECTION_DTYPE][ctsgen3.spi.dtypes.CV_DETECTION_DTYPE] fields plus `frame`.
+        """
+        records = np.empty(len(self), [("frame", np.int64)] + list(CV_DETECTION_DTYPE.descr))
+        for name in _COLUMNS:
+            records[name] = getattr(self, name)
+        return records
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} detections in {len(np.unique(self.frame))} frames)"
+
+
+_COLUMNS = ("frame",) + (CV_DETECTION_DTYPE.names or ())
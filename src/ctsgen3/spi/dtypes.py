@@ -0,0 +1,35 @@
+from ctsgen3.registers.dtypes import struct_dtype
+from ctsgen3.spi.spi import (
+    CvDetection,
+    SpiCvDetectionsPacket,
+    SpiCvForegroundPacket,
+    SpiMetadataPacket,
+    SpiPacket,
+    SpiThermalPacket,
+)
+
+CV_DETECTION_DTYPE = struct_dtype(CvDetection)
+"""
+NumPy structured dtype equivalent of [CvDetection][ctsgen3.spi.spi.CvDetection].
+"""
+SPI_THERMAL_PACKET_DTYPE = struct_dtype(SpiThermalPacket)
+"""
+NumPy structured dtype equivalent of [SpiThermalPacket][ctsgen3.spi.spi.SpiThermalPacket].
+"""
+SPI_METADATA_PACKET_DTYPE = struct_dtype(SpiMetadataPacket)
+"""
+NumPy structured dtype equivalent of [SpiMetadataPacket][ctsgen3.spi.spi.SpiMetadataPacket].
+"""
+SPI_CV_FOREGROUND_PACKET_DTYPE = struct_dtype(SpiCvForegroundPacket)
+"""
+NumPy structured dtype equivalent of [SpiCvForegroundPacket][ctsgen3.spi.spi.SpiCvForegroundPacket].
+"""
+SPI_CV_DETECTIONS_PACKET_DTYPE = struct_dtype(SpiCvDetectionsPacket)
+"""
+NumPy structured dtype equivalent of [SpiCvDetectionsPacket][ctsgen3.spi.spi.SpiCvDetectionsPacket].
+"""
+SPI_PACKET_DTYPE = struct_dtype(SpiPacket)
+"""
+NumPy structured dtype equivalent of [SpiPacket][ctsgen3.spi.spi.SpiPacket], so a buffer of N packets decodes with a
+single `np.frombuffer(raw, SPI_PACKET_DTYPE)`.
+"""
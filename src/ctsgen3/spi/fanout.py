@@ -0,0 +1,304 @@
+import ctypes
+import mmap
+import multiprocessing.shared_memory
+import os
+import sys
+import time
+from types import TracebackType
+from typing import Iterator, List, Optional, Type, Union
+
+import numpy as np
+
+from ctsgen3.spi.spi import SpiPacket, SpiSection, packet_sections, spi_packet_type
+
+FANOUT_MAGIC = b"CTSGEN3F"
+FANOUT_VERSION = 1
+
+
+class FanoutHeader(ctypes.LittleEndianStructure):
+    """
+    Header at the start of a fan-out ring's shared memory, followed by `capacity` slots of `slot_size` bytes, each a
+    [FanoutSlotHeader][ctsgen3.spi.fanout.FanoutSlotHeader] followed by the packet.
+    """
+
+    _fields_ = [
+        ("magic", ctypes.c_char * 8),
+        ("version", ctypes.c_uint16),
+        ("sections", ctypes.c_uint16),  # SpiSection flags of the published packet layout
+        ("packet_size", ctypes.c_uint32),
+        ("slot_size", ctypes.c_uint32),
+        ("capacity", ctypes.c_uint32),
+        ("count", ctypes.c_uint64),  # packets published, the last is in slot (count - 1) % capacity
+    ]
+    _pack_ = 1
+
+
+assert ctypes.sizeof(FanoutHeader) == 32
+
+
+class FanoutSlotHeader(ctypes.LittleEndianStructure):
+    """
+    Header of each slot. `write_count` is a sequence lock: `2 * n + 1` while packet `n` (counting from 0) is being
+    written and `2 * n + 2` once it is complete, so readers can tell a complete packet from a torn or overwritten one.
+    """
+
+    _fields_ = [
+        ("write_count", ctypes.c_uint64),
+        ("timestamp", ctypes.c_double),  # host time.time() when the packet was received
+        ("frame_count", ctypes.c_uint32),  # GLOBAL_FRM_CNT_0x02, or the packet number without metadata
+        ("_reserved", ctypes.c_uint32),
+    ]
+    _pack_ = 1
+
+
+assert ctypes.sizeof(FanoutSlotHeader) == 24
+
+
+class FanoutPublisher:
+    """
+    Publishes packets to any number of local [FanoutSubscriber][ctsgen3.spi.fanout.FanoutSubscriber] processes through
+    a ring of `capacity` slots in shared memory named `name`, so the one process owning the FT4222 can feed a viewer, a
+    recorder and analytics at once. Publishing is two small header writes and one copy, and never waits for
+    subscribers: a subscriber that falls more than `capacity` packets behind is overrun and skips ahead.
+
+    ```
+    with FanoutPublisher("ctsgen3") as publisher:
+        for packet in reader:
+            publisher.publish(packet)
+    ```
+    """
+
+    def __init__(self, name: str, capacity: int = 64, packet_type: Type[ctypes.Structure] = SpiPacket) -> None:
+        self.packet_type = packet_type
+        self.capacity = capacity
+        self._packet_size = ctypes.sizeof(packet_type)
+        self._slot_size = -(-(ctypes.sizeof(FanoutSlotHeader) + self._packet_size) // 8) * 8
+        self._memory = multiprocessing.shared_memory.SharedMemory(
+            name, create=True, size=ctypes.sizeof(FanoutHeader) + capacity * self._slot_size
+        )
+        assert self._memory.buf is not None
+        self.name = self._memory.name
+        self.header = FanoutHeader.from_buffer(self._memory.buf)
+        self.header.magic = FANOUT_MAGIC
+        self.header.version = FANOUT_VERSION
+        self.header.sections = packet_sections(packet_type)
+        self.header.packet_size = self._packet_size
+        self.header.slot_size = self._slot_size
+        self.header.capacity = capacity
+        self._buffer = self._memory.buf
+        self._slots = [FanoutSlotHeader.from_buffer(self._buffer, self._offset(slot)) for slot in range(capacity)]
+        self._packets = [
+            packet_type.from_buffer(self._buffer, self._offset(slot) + ctypes.sizeof(FanoutSlotHeader))
+            for slot in range(capacity)
+        ]
+        self._has_metadata = bool(packet_sections(packet_type) & SpiSection.METADATA)
+
+    def _offset(self, slot: int) -> int:
+        return ctypes.sizeof(FanoutHeader) + slot * self._slot_size
+
+    def publish(self, packet: Union[ctypes.Structure, bytes], timestamp: Optional[float] = None) -> None:
+        """
+        Publish `packet` (a `packet_type` struct or its bytes), received at host `time.time()` `timestamp` (now if
+        `None`).
+        """
+        count = self.header.count
+        index = count % self.capacity
+        slot = self._slots[index]
+        slot.write_count = 2 * count + 1
+        slot.timestamp = time.time() if timestamp is None else timestamp
+        start = self._offset(index) + ctypes.sizeof(FanoutSlotHeader)
+        self._buffer[start : start + self._packet_size] = memoryview(packet).cast("B")
+        if self._has_metadata:
+            slot.frame_count = self._packets[index].metadata.metadata.GLOBAL_FRM_CNT_0x02.frame_count
+        else:
+            slot.frame_count = count
+        slot.write_count = 2 * count + 2
+        self.header.count = count + 1
+
+    def close(self) -> None:
+        """
+        Stop publishing and remove the shared memory. Subscribers keep their mapping until they close it.
+        """
+        # views of the shared memory must be released before it is closed
+        del self.header, self._slots, self._packets, self._buffer
+        self._memory.close()
+        self._memory.unlink()
+
+    def __enter__(self) -> "FanoutPublisher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _shm_open_read_only(name: str) -> int:
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd: int = libc.shm_open(f"/{name}".encode(), os.O_RDONLY)
+    if fd < 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error), name)
+    return fd
+
+
+def _map_read_only(name: str, size: int) -> mmap.mmap:
+    # SharedMemory would map it writable and, before Python 3.13, unlink it when this process exits
+    if sys.platform == "win32":
+        return mmap.mmap(-1, size, tagname=name, access=mmap.ACCESS_READ)
+    if os.path.isdir("/dev/shm"):  # Linux, where POSIX shared memory objects are files
+        fd = os.open(os.path.join("/dev/shm", name), os.O_RDONLY)
+    else:  # e.g. macOS, where they have no path, so fall back to the C library
+        fd = _shm_open_read_only(name)
+    try:
+        return mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+
+
+class FanoutSubscriber:
+    """
+    Maps the ring of the [FanoutPublisher][ctsgen3.spi.fanout.FanoutPublisher] named `name` read-only and yields its
+    packets as `packet_type` structs that alias the shared memory, without copying. By default only packets published
+    after subscribing are read; with `from_oldest` reading starts at the oldest packet still in the ring.
+
+    A view stays valid until the publisher reuses its slot, `capacity` packets later. A subscriber that lags that far
+    behind skips to the oldest packet still in the ring, counting the skipped packets in
+    [num_overruns][ctsgen3.spi.fanout.FanoutSubscriber.num_overruns]; to detect a packet overwritten while it was being
+    used, check [intact][ctsgen3.spi.fanout.FanoutSubscriber.intact] afterwards (or copy it first).
+
+    ```
+    with FanoutSubscriber("ctsgen3") as subscriber:
+        for packet in subscriber:
+            thermal_frame = np.ctypeslib.as_array(packet.thermal_frame.thermal_frame)
+    ```
+    """
+
+    def __init__(self, name: str, from_oldest: bool = False, poll_interval: float = 0.001) -> None:
+        self.name = name
+        self.poll_interval = poll_interval
+        """
+        Seconds between checks for a new packet while waiting.
+        """
+        with _map_read_only(name, ctypes.sizeof(FanoutHeader)) as mapping:
+            header = FanoutHeader.from_buffer_copy(mapping)
+        if header.magic != FANOUT_MAGIC:
+            raise ValueError(f"{name} is not a fan-out ring")
+        if header.version != FANOUT_VERSION:
+            raise ValueError(f"Unsupported fan-out ring version {header.version}")
+        self.packet_type = spi_packet_type(SpiSection(header.sections))
+        self.capacity: int = header.capacity
+        self._mapping = _map_read_only(name, ctypes.sizeof(FanoutHeader) + header.capacity * header.slot_size)
+        address = np.frombuffer(self._mapping, np.uint8).ctypes.data  # read-only memory can only be viewed by address
+        self.header = FanoutHeader.from_address(address)
+        self._slots: List[FanoutSlotHeader] = []
+        self._packets: List[ctypes.Structure] = []
+        for slot in range(self.capacity):
+            slot_address = address + ctypes.sizeof(FanoutHeader) + slot * header.slot_size
+            self._slots.append(FanoutSlotHeader.from_address(slot_address))
+            self._packets.append(self.packet_type.from_address(slot_address + ctypes.sizeof(FanoutSlotHeader)))
+        count = self.header.count
+        self.position: int = max(0, count - self.capacity + 1) if from_oldest else count
+        """
+        Number of the next packet to read (packets are numbered from 0 in publishing order).
+        """
+        self.num_received = 0
+        self.num_overruns = 0
+        """
+        Packets overwritten before they were read, i.e. skipped.
+        """
+        self.timestamp = 0.0
+        """
+        Host `time.time()` at which the last packet read was received by the publisher.
+        """
+        self.frame_count = 0
+        """
+        `GLOBAL_FRM_CNT_0x02` of the last packet read.
+        """
+        self._current = -1
+
+    @property
+    def lag(self) -> int:
+        """
+        Packets published but not read yet.
+        """
+        self._check_open()
+        return int(self.header.count) - self.position
+
+    def _check_open(self) -> None:
+        # the header and slot views point into the mapping, so using them once it is unmapped would crash
+        if self._mapping.closed:
+            raise ValueError(f"Fan-out subscriber of {self.name} is closed")
+
+    def read(self, timeout: Optional[float] = None) -> Optional[ctypes.Structure]:
+        """
+        Wait up to `timeout` seconds (forever if `None`) for the next packet and return a view of it, or `None` on
+        timeout.
+        """
+        self._check_open()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            count = self.header.count
+            if count > self.position:
+                if count - self.position >= self.capacity:  # the slot is being, or has been, overwritten
+                    skipped = count - self.capacity + 1 - self.position
+                    self.num_overruns += skipped
+                    self.position += skipped
+                position = self.position
+                self.position += 1
+                slot = self._slots[position % self.capacity]
+                before = slot.write_count
+                timestamp, frame_count = slot.timestamp, slot.frame_count
+                after = slot.write_count
+                if before == after == 2 * position + 2:  # complete, and not overwritten while its header was read
+                    self.timestamp, self.frame_count = timestamp, frame_count
+                    self.num_received += 1
+                    self._current = position
+                    return self._packets[position % self.capacity]
+                self.num_overruns += 1  # overwritten since count was read
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def intact(self) -> bool:
+        """
+        Whether the last packet returned by [read][ctsgen3.spi.fanout.FanoutSubscriber.read] has not been overwritten,
+        so everything read from its view so far is consistent.
+        """
+        self._check_open()
+        if self._current < 0:
+            return False
+        return bool(self._slots[self._current % self.capacity].write_count == 2 * self._current + 2)
+
+    def __iter__(self) -> Iterator[ctypes.Structure]:
+        while True:
+            packet = self.read()
+            if packet is not None:
+                yield packet
+
+    def close(self) -> None:
+        """
+        Unmap the ring. Views returned by [read][ctsgen3.spi.fanout.FanoutSubscriber.read] must not be used afterwards,
+        and reading raises `ValueError`.
+        """
+        if self._mapping.closed:
+            return
+        del self.header
+        self._packets.clear()
+        self._slots.clear()
+        self._mapping.close()
+
+    def __enter__(self) -> "FanoutSubscriber":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -0,0 +1,271 @@
+import ctypes
+import time
+from types import TracebackType
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Type
+
+from ctsgen3.device.device import Ft4222Device, SpiDevice
+from ctsgen3.instrumentation.instrumentation import Instrumentation
+from ctsgen3.spi.crc import crc_failures, section_crc_matches, sections
+from ctsgen3.spi.sequence import FrameSequence, SequenceTracker
+from ctsgen3.spi.spi import SpiPacket, SpiSection, packet_sections
+
+if TYPE_CHECKING:
+    import ft4222
+
+
+class SpiPacketReader:
+    """
+    Reads and validates SPI packets from a [SpiDevice][ctsgen3.device.device.SpiDevice].
+
+    The TX buffer and the packet the RX bytes are decoded into are allocated once, and every transfer clocks out
+    exactly `ctypes.sizeof(packet_type)` bytes. The FT4222 driver returns each transfer as a new `bytes`, which is copied
+    straight into the destination packet without constructing another struct.
+
+    [next_frame][ctsgen3.spi.reader.SpiPacketReader.next_frame] (and iteration) reads each frame once: it waits for
+    DRDY when the device has it, otherwise for the frame period, and drops repeated packets by `GLOBAL_FRM_CNT_0x02`.
+    As the SPI TX FIFO is reset by CS, a read that fails its CRC or has the wrong length is retried immediately, up to
+    `max_retries` times while the retry can complete before the next frame replaces the packet.
+    """
+
+    def __init__(
+        self,
+        device: SpiDevice,
+        packet_type: Type[ctypes.Structure] = SpiPacket,
+        fps: Optional[float] = None,
+        max_retries: int = 3,
+    ) -> None:
+        self.device = device
+        self.packet_type = packet_type
+        self.packet = packet_type()
+        """
+        Destination of [read][ctsgen3.spi.reader.SpiPacketReader.read], overwritten by every read.
+        """
+        self.num_reads = 0
+        self.num_invalid = 0
+        self.num_wrong_length = 0
+        self.section_failures: Dict[SpiSection, int] = {section: 0 for section, _, _ in sections(packet_type)}
+        self.fps = fps
+        """
+        Frame rate used to pace reads without DRDY, or `None` to use `FRAME_RATE_MODE` of the last packet.
+        """
+        self.max_retries = max_retries
+        self.num_recovered: int = 0
+        """
+        Frames that failed their first read but were read intact by a retry.
+        """
+        self.num_lost: int = 0
+        """
+        Frames still invalid after all retries, or when no retry could complete before the next frame.
+        """
+        self.instrumentation: Optional[Instrumentation] = None
+        """
+        Per-stage latency histograms and frame counter gaps, recorded only when set.
+        """
+        self.sequence = SequenceTracker()
+        """
+        Classifies the frames read by [next_frame][ctsgen3.spi.reader.SpiPacketReader.next_frame] as new, duplicate or
+        after a gap, and measures the effective frame rate.
+        """
+        self._size = ctypes.sizeof(packet_type)
+        self._tx = bytes(self._size)
+        self._all_sections = packet_sections(packet_type)
+        self._has_metadata = bool(self._all_sections & SpiSection.METADATA)
+        self._next_frame = 0.0
+        self._transfer_time = 0.0
+
+    @classmethod
+    def open(
+        cls,
+        description: str = "FT4222 A",
+        clock: Optional["ft4222.SPIMaster.Clock"] = None,
+        packet_type: Type[ctypes.Structure] = SpiPacket,
+        drdy_port: Optional["ft4222.GPIO.Port"] = None,
+        fps: Optional[float] = None,
+        max_retries: int = 3,
+    ) -> "SpiPacketReader":
+        """
+        Reader of the FT4222 SPI master with the given `description`, see
+        [Ft4222Device.open][ctsgen3.device.device.Ft4222Device.open].
+        """
+        return cls(Ft4222Device.open(description, clock, drdy_port), packet_type, fps, max_retries)
+
+    def read_into(self, packet: ctypes.Structure) -> SpiSection:
+        """
+        Read one packet into `packet` (any writable struct of `packet_type`'s size) and return the sections that failed
+        their CRC. Every section is reported as failed if the transfer returned the wrong number of bytes.
+        """
+        if self.instrumentation is not None:
+            return self._read_into_instrumented(packet, self.instrumentation)
+        start = time.monotonic()
+        rx = self.device.transfer(self._tx)
+        self._transfer_time = time.monotonic() - start
+        self.num_reads += 1
+        if len(rx) != self._size:
+            self.num_wrong_length += 1
+            failures = self._all_sections
+        else:
+            ctypes.memmove(ctypes.addressof(packet), rx, self._size)
+            failures = crc_failures(packet, self.packet_type)
+        self._count_failures(failures)
+        return failures
+
+    def _read_into_instrumented(self, packet: ctypes.Structure, instrumentation: Instrumentation) -> SpiSection:
+        start = time.perf_counter()
+        rx = self.device.transfer(self._tx)
+        end = time.perf_counter()
+        self._transfer_time = end - start
+        instrumentation.observe("transfer", end - start)
+        self.num_reads += 1
+        if len(rx) != self._size:
+            self.num_wrong_length += 1
+            instrumentation.count("wrong_length")
+            failures = self._all_sections
+        else:
+            start = end
+            ctypes.memmove(ctypes.addressof(packet), rx, self._size)
+            end = time.perf_counter()
+            instrumentation.observe("parse", end - start)
+            raw = memoryview(packet).cast("B")
+            failures = SpiSection(0)
+            for section, offset, length in sections(self.packet_type):
+                start = end
+                if not section_crc_matches(raw, offset, length):
+                    failures |= section
+                    instrumentation.count(f"crc_failures_{str(section.name).lower()}")
+                end = time.perf_counter()
+                instrumentation.observe(f"crc.{section.name}", end - start)
+        self._count_failures(failures)
+        return failures
+
+    def _count_failures(self, failures: SpiSection) -> None:
+        if failures:
+            self.num_invalid += 1
+            for section in self.section_failures:
+                if section & failures:
+                    self.section_failures[section] += 1
+
+    def read(self) -> SpiSection:
+        """
+        Read one packet into [packet][ctsgen3.spi.reader.SpiPacketReader.packet] and return the sections that failed
+        their CRC.
+        """
+        return self.read_into(self.packet)
+
+    @property
+    def frame_period(self) -> float:
+        """
+        Seconds between frames, from [fps][ctsgen3.spi.reader.SpiPacketReader.fps] or the last packet's
+        `FRAME_RATE_MODE`, and 0 while neither is known.
+        """
+        fps = self.fps or self.sequence.configured_fps
+        return 1.0 / fps if fps else 0.0
+
+    def wait_frame(self, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for the next frame to be ready, by DRDY if the device has it or else by the frame
+        period, and return whether it is.
+        """
+        if self.device.has_data_ready:
+            return self.device.wait_data_ready(timeout)
+        delay = self._next_frame - time.monotonic()
+        if delay > timeout:
+            time.sleep(max(0.0, timeout))
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def read_frame(self, packet: ctypes.Structure) -> SpiSection:
+        """
+        Read the ready frame into `packet`, re-reading while any section fails its CRC, up to
+        [max_retries][ctsgen3.spi.reader.SpiPacketReader.max_retries] times and only while another transfer can finish
+        within the frame period (before the next DRDY overwrites the packet). Returns the sections that still failed.
+        """
+        deadline = time.monotonic() + self.frame_period
+        failures = self.read_into(packet)
+        if not failures:
+            return failures
+        for _ in range(self.max_retries):
+            if self.frame_period and time.monotonic() + self._transfer_time > deadline:
+                break
+            failures = self.read_into(packet)
+            if not failures:
+                self.num_recovered += 1
+                if self.instrumentation is not None:
+                    self.instrumentation.count("frames_recovered")
+                return failures
+        self.num_lost += 1
+        if self.instrumentation is not None:
+            self.instrumentation.count("frames_lost")
+        return failures
+
+    def next_frame(self, packet: ctypes.Structure, timeout: float = 1.0) -> bool:
+        """
+        Wait for and read the next frame into `packet`, returning whether a valid frame not seen before was read within
+        `timeout` seconds. Invalid reads are retried by [read_frame][ctsgen3.spi.reader.SpiPacketReader.read_frame].
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            start = time.perf_counter()
+            ready = self.wait_frame(deadline - time.monotonic())
+            if self.instrumentation is not None:
+                self.instrumentation.observe("wait", time.perf_counter() - start)
+            if not ready:
+                return False
+            now = time.monotonic()
+            if self.read_frame(packet):
+                return False
+            if not self._has_metadata:
+                self._next_frame = now + self.frame_period
+                return True
+            missed = self.sequence.num_missed
+            sequence = self.sequence.update(packet.metadata.metadata, now)
+            if self.instrumentation is not None:
+                if sequence == FrameSequence.DUPLICATE:
+                    self.instrumentation.count("duplicates")
+                elif sequence == FrameSequence.GAP:
+                    self.instrumentation.count("frames_missed", self.sequence.num_missed - missed)
+            if sequence != FrameSequence.DUPLICATE:
+                self._next_frame = now + self.frame_period
+                return True
+            # read before the new frame was ready, poll again shortly rather than a whole period later
+            self._next_frame = now + self.frame_period / 8
+
+    @property
+    def frame_count(self) -> Optional[int]:
+        """
+        `GLOBAL_FRM_CNT_0x02` of the last frame returned by [next_frame][ctsgen3.spi.reader.SpiPacketReader.next_frame].
+        """
+        return self.sequence.frame_count
+
+    @property
+    def num_duplicates(self) -> int:
+        return self.sequence.num_duplicates
+
+    def __iter__(self) -> Iterator[ctypes.Structure]:
+        """
+        Yield every new valid frame (see [next_frame][ctsgen3.spi.reader.SpiPacketReader.next_frame]), until the device
+        raises `EOFError` at the end of a replayed source. The same preallocated packet is yielded each time, so copy it
+        (e.g. `bytes(packet)`) to keep it past the next iteration.
+        """
+        while True:
+            try:
+                valid = self.next_frame(self.packet)
+            except EOFError:
+                return
+            if valid:
+                yield self.packet
+
+    def close(self) -> None:
+        self.device.close()
+
+    def __enter__(self) -> "SpiPacketReader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -0,0 +1,86 @@
+import ctypes
+from typing import List, Optional, Type
+
+import numpy as np
+import numpy.typing as npt
+
+from ctsgen3.registers.dtypes import struct_dtype
+from ctsgen3.spi.spi import PIXEL_HEIGHT, PIXEL_WIDTH, SpiPacket
+
+
+class SpiPacketRing:
+    """
+    Ring buffer of `capacity` packet slots backed by one contiguous `(capacity, ctypes.sizeof(packet_type))` array.
+
+    Received bytes are written straight into a slot ([claim][ctsgen3.spi.ring.SpiPacketRing.claim]), and every view
+    handed out (`packet_type.from_buffer` structs and NumPy frame arrays) aliases the ring, so no per-frame objects are
+    allocated. A slot is overwritten `capacity` commits after it was written.
+
+    ```
+    ring = SpiPacketRing(8)
+    if not reader.read_into(ring.claim()):
+        slot = ring.commit()
+        thermal_frame = ring.thermal_frames[slot]  # (PIXEL_HEIGHT, PIXEL_WIDTH) int16 view
+    ```
+    """
+
+    def __init__(self, capacity: int, packet_type: Type[ctypes.Structure] = SpiPacket) -> None:
+        self.capacity = capacity
+        self.packet_type = packet_type
+        self.buffer = np.zeros((capacity, ctypes.sizeof(packet_type)), dtype=np.uint8)
+        self.packets: List[ctypes.Structure] = [
+            packet_type.from_buffer(self.buffer.data, slot * self.buffer.shape[1]) for slot in range(capacity)
+        ]
+        """
+        `packet_type` struct view of each slot.
+        """
+        self.records = self.buffer.view(struct_dtype(packet_type))[:, 0]
+        """
+        NumPy structured view of every slot, see [SPI_PACKET_DTYPE][ctsgen3.spi.dtypes.SPI_PACKET_DTYPE].
+        """
+        self.thermal_frames = self._frames("thermal_frame")
+        """
+        `(capacity, PIXEL_HEIGHT, PIXEL_WIDTH)` <8,8> fixed point thermal frame view of each slot, `None` if
+        `packet_type` has no thermal frame section.
+        """
+        self.cv_foregrounds = self._frames("cv_foreground")
+        """
+        `(capacity, PIXEL_HEIGHT, PIXEL_WIDTH)` <8,8> fixed point CV foreground view of each slot, `None` if
+        `packet_type` has no CV foreground section.
+        """
+        self.count = 0
+        """
+        Number of packets committed since creation.
+        """
+
+    def _frames(self, section: str) -> Optional[npt.NDArray[np.int16]]:
+        if not hasattr(self.packet_type, section):
+            return None
+        offset = getattr(self.packet_type, section).offset
+        frame_bytes = PIXEL_HEIGHT * PIXEL_WIDTH * ctypes.sizeof(ctypes.c_int16)
+        frames = self.buffer[:, offset : offset + frame_bytes].view("<i2")
+        return frames.reshape(self.capacity, PIXEL_HEIGHT, PIXEL_WIDTH)
+
+    def claim(self) -> ctypes.Structure:
+        """
+        Packet view of the slot the next [commit][ctsgen3.spi.ring.SpiPacketRing.commit] publishes.
+        """
+        return self.packets[self.count % self.capacity]
+
+    def commit(self) -> int:
+        """
+        Publish the claimed slot and return its index.
+        """
+        slot = self.count % self.capacity
+        self.count += 1
+        return slot
+
+    @property
+    def latest(self) -> int:
+        """
+        Slot index of the most recently committed packet, or -1 if nothing has been committed.
+        """
+        return (self.count - 1) % self.capacity if self.count else -1
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
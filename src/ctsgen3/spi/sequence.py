@@ -0,0 +1,147 @@
+import enum
+import time
+from typing import Any, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from ctsgen3.device.device import FRAME_RATES
+from ctsgen3.registers.registers import RegisterMap
+
+FRAME_COUNT_MODULUS = 1 << 32
+"""
+`GLOBAL_FRM_CNT_0x02` and `CMOS_FRAME_CNT_ADDR_0x3F` are 32 bit counters that wrap.
+"""
+
+
+class FrameSequence(enum.IntEnum):
+    """
+    Classification of a valid read by its frame counters.
+    """
+
+    NEW = 0  #: the frame after the previous one (or the first frame, or after a counter reset)
+    DUPLICATE = 1  #: the same frame again, read before the next was ready
+    GAP = 2  #: a new frame, with one or more frames missed since the previous one
+
+
+class SequenceTracker:
+    """
+    Classifies consecutive reads by `GLOBAL_FRM_CNT_0x02.frame_count` and `CMOS_FRAME_CNT_ADDR_0x3F.cmos_frame_count`
+    (see [FrameSequence][ctsgen3.spi.sequence.FrameSequence]) and measures the effective frame rate against the
+    configured `FRAME_RATE_MODE`.
+
+    A read is a duplicate only when both counters are unchanged. A counter that goes backwards is taken as a reset of
+    the processing module and starts a new sequence.
+    """
+
+    def __init__(self) -> None:
+        self.frame_count: Optional[int] = None
+        self.cmos_frame_count: Optional[int] = None
+        self.num_new = 0
+        self.num_duplicates = 0
+        self.num_gaps = 0
+        self.num_missed = 0
+        """
+        Frames skipped over by all gaps.
+        """
+        self.num_resets = 0
+        self.configured_fps: Optional[float] = None
+        """
+        Frame rate of the last packet's `FRAME_RATE_MODE`.
+        """
+        self._first_time = 0.0
+        self._first_frame_count = 0
+        self._last_time = 0.0
+        self._received = 0  # new frames since the first frame or the last reset
+
+    def update(self, metadata: RegisterMap, timestamp: Optional[float] = None) -> FrameSequence:
+        """
+        Classify a valid read with metadata `metadata`, received at host `time.monotonic()` `timestamp` (now if
+        `None`).
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        frame_count = metadata.GLOBAL_FRM_CNT_0x02.frame_count
+        cmos_frame_count = metadata.CMOS_FRAME_CNT_ADDR_0x3F.cmos_frame_count
+        self.configured_fps = FRAME_RATES.get(metadata.CTS_CTRL_0x1F.FRAME_RATE_MODE)
+        previous = self.frame_count
+        self.frame_count = frame_count
+        if previous is None:
+            result = self._restart(now, frame_count)
+        else:
+            step = (frame_count - previous) % FRAME_COUNT_MODULUS
+            if step == 0 and cmos_frame_count == self.cmos_frame_count:
+                self.num_duplicates += 1
+                return FrameSequence.DUPLICATE
+            if step >= FRAME_COUNT_MODULUS // 2:
+                self.num_resets += 1
+                result = self._restart(now, frame_count)
+            else:
+                if step > 1:
+                    self.num_gaps += 1
+                    self.num_missed += step - 1
+                    result = FrameSequence.GAP
+                else:
+                    result = FrameSequence.NEW
+                self.num_new += 1
+                self._received += 1
+        self.cmos_frame_count = cmos_frame_count
+        self._last_time = now
+        return result
+
+    def _restart(self, now: float, frame_count: int) -> FrameSequence:
+        self.num_new += 1
+        self._received = 1
+        self._first_time = now
+        self._first_frame_count = frame_count
+        return FrameSequence.NEW
+
+    @property
+    def effective_fps(self) -> float:
+        """
+        Frames per second received since the first frame (or the last reset), 0 until two frames have arrived.
+        """
+        elapsed = self._last_time - self._first_time
+        return (self._received - 1) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def sensor_fps(self) -> float:
+        """
+        Frames per second produced by the sensor over the same interval, from the advance of `GLOBAL_FRM_CNT_0x02`.
+        """
+        elapsed = self._last_time - self._first_time
+        produced = ((self.frame_count or 0) - self._first_frame_count) % FRAME_COUNT_MODULUS
+        return produced / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """
+        Effective, sensor and configured frame rates and the classification counts.
+        """
+        configured = "unknown" if self.configured_fps is None else f"{self.configured_fps:.1f}"
+        return (
+            f"{self.effective_fps:.2f} FPS received of {self.sensor_fps:.2f} FPS produced (configured {configured}), "
+            f"{self.num_new} new, {self.num_duplicates} duplicates, {self.num_gaps} gaps ({self.num_missed} frames "
+            f"missed), {self.num_resets} resets"
+        )
+
+
+def classify_frame_counts(
+    frame_counts: npt.NDArray[np.unsignedinteger[Any]], cmos_frame_counts: npt.NDArray[np.unsignedinteger[Any]]
+) -> npt.NDArray[np.int8]:
+    """
+    Vectorised [FrameSequence][ctsgen3.spi.sequence.FrameSequence] of each of a sequence of `GLOBAL_FRM_CNT_0x02` and
+    `CMOS_FRAME_CNT_ADDR_0x3F` values, by the same rules as [SequenceTracker][ctsgen3.spi.sequence.SequenceTracker],
+    e.g. of a recording:
+
+    ```
+    metadata = recording.records["packet"]["metadata"]["metadata"]
+    sequence = classify_frame_counts(
+        metadata["GLOBAL_FRM_CNT_0x02"]["frame_count"], metadata["CMOS_FRAME_CNT_ADDR_0x3F"]["cmos_frame_count"]
+    )
+    unique = recording.records[sequence != FrameSequence.DUPLICATE]
+    ```
+    """
+    result = np.full(len(frame_counts), FrameSequence.NEW, np.int8)
+    steps = np.mod(np.diff(frame_counts.astype(np.int64)), FRAME_COUNT_MODULUS)
+    result[1:][(steps == 0) & (np.diff(cmos_frame_counts.astype(np.int64)) == 0)] = FrameSequence.DUPLICATE
+    result[1:][(steps > 1) & (steps < FRAME_COUNT_MODULUS // 2)] = FrameSequence.GAP
+    return result
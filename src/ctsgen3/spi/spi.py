@@ -1,7 +1,8 @@
-import ft4222
-from crc import Calculator, Configuration
 from ctsgen3.registers.registers import RegisterMap
 import ctypes
+import functools
+from enum import IntFlag
+from typing import Type
 
 #################SPI output################
 # these should go somewhere else later...
@@ -21,6 +22,20 @@ CRC_POLYNOMIAL = 0x1021
 CRC_INITIAL_VALUE = 0xFFFF
 
 
+class SpiSection(IntFlag):
+    """
+    SPI bulk data packet sections, in the order they are transmitted.
+
+    Member names match the upper-cased field names of [SpiPacket][ctsgen3.spi.spi.SpiPacket], and combinations are used
+    wherever a set of sections is reported (e.g. sections that failed their CRC).
+    """
+
+    THERMAL_FRAME = 1 << 0  #: [SpiThermalPacket][ctsgen3.spi.spi.SpiThermalPacket]
+    METADATA = 1 << 1  #: [SpiMetadataPacket][ctsgen3.spi.spi.SpiMetadataPacket]
+    CV_FOREGROUND = 1 << 2  #: [SpiCvForegroundPacket][ctsgen3.spi.spi.SpiCvForegroundPacket]
+    CV_DETECTIONS = 1 << 3  #: [SpiCvDetectionsPacket][ctsgen3.spi.spi.SpiCvDetectionsPacket]
+
+
 class CvDetection(ctypes.LittleEndianStructure):
     """
     CV algorithm outputs for each detected heat blob.
@@ -105,53 +120,54 @@ class SpiPacket(ctypes.LittleEndianStructure):
     _pack_ = 1
 
 
+def packet_sections(packet_type: Type[ctypes.Structure]) -> SpiSection:
+    """
+    Sections present in `packet_type`, e.g. every [SpiSection][ctsgen3.spi.spi.SpiSection] for
+    [SpiPacket][ctsgen3.spi.spi.SpiPacket].
+    """
+    sections = SpiSection(0)
+    for name, *_ in packet_type._fields_:
+        sections |= SpiSection[name.upper()]
+    return sections
+
+
+def section_names(sections: SpiSection) -> str:
+    """
+    Names of the members of `sections` joined by `|`, e.g. `THERMAL_FRAME|METADATA`, or `none` if it is empty.
+    `sections.name` is `None` for a combination on Python 3.10.
+    """
+    return "|".join(str(section.name) for section in SpiSection if section & sections) or "none"
+
+
+@functools.cache
+def spi_packet_type(sections: SpiSection) -> Type[ctypes.Structure]:
+    """
+    Packet struct containing only `sections`, in transmission order, for when the other sections are turned off via
+    the command and control I2C interface. Reading only the required sections shortens every transfer, e.g. a thermal
+    frame only packet is a third of the size of a full [SpiPacket][ctsgen3.spi.spi.SpiPacket].
+
+    ```
+    reader = SpiPacketReader.open(packet_type=spi_packet_type(SpiSection.THERMAL_FRAME | SpiSection.METADATA))
+    ```
+    """
+    if not sections:
+        raise ValueError("At least one section must be enabled")
+    if sections == packet_sections(SpiPacket):
+        return SpiPacket
+    fields = [field for field in SpiPacket._fields_ if SpiSection[field[0].upper()] & sections]
+    name = "".join(str(section.name).title().replace("_", "") for section in SpiSection if section & sections)
+    return type(f"SpiPacket{name}", (ctypes.LittleEndianStructure,), {"_fields_": fields, "_pack_": 1})
+
+
 if __name__ == "__main__":
-    devA = ft4222.openByDescription("FT4222 A")
-    devA.setClock(ft4222.SysClock.CLK_60)
-    devA.spiMaster_Init(
-        ft4222.SPIMaster.Mode.SINGLE,
-        ft4222.SPIMaster.Clock.DIV_16,
-        ft4222.SPI.Cpol.IDLE_HIGH,
-        ft4222.SPI.Cpha.CLK_LEADING,
-        ft4222.SPIMaster.SlaveSelect.SS0,
-    )  # initialisation asserts CS briefly, triggering an internal buffer reset
-    config = Configuration(
-        width=16,
-        polynomial=CRC_POLYNOMIAL,
-        init_value=CRC_INITIAL_VALUE,
-        final_xor_value=0x00,
-        reverse_input=False,
-        reverse_output=False,
-    )
-    crc_calculator = Calculator(config)
-    for i in range(0, 100000):
-        rx = devA.spiMaster_SingleReadWrite(bytes(2500 * [0]), True)
-        spi_packet = SpiPacket.from_buffer_copy(rx)
-        crc_data = ctypes.string_at(
-            ctypes.addressof(spi_packet.thermal_frame),
-            ctypes.sizeof(spi_packet.thermal_frame) - ctypes.sizeof(ctypes.c_uint16),
-        )
-        crc_computed = crc_calculator.checksum(crc_data)
-        if crc_computed != spi_packet.thermal_frame.crc:
-            print("⚠️ Thermal CRC fail.\n" f"Got: {spi_packet.thermal_frame.crc}\n" f"Expected: {crc_computed}")
-        crc_data = ctypes.string_at(
-            ctypes.addressof(spi_packet.cv_foreground),
-            ctypes.sizeof(spi_packet.cv_foreground) - ctypes.sizeof(ctypes.c_uint16),
-        )
-        crc_computed = crc_calculator.checksum(crc_data)
-        if crc_computed != spi_packet.cv_foreground.crc:
-            print("⚠️ Foreground CRC fail.\n" f"Got: {spi_packet.cv_foreground.crc}\n" f"Expected: {crc_computed}")
-        crc_data = ctypes.string_at(
-            ctypes.addressof(spi_packet.cv_detections),
-            ctypes.sizeof(spi_packet.cv_detections) - ctypes.sizeof(ctypes.c_uint16),
-        )
-        crc_computed = crc_calculator.checksum(crc_data)
-        if crc_computed != spi_packet.cv_detections.crc:
-            print("⚠️ Detections CRC fail.\n" f"Got: {spi_packet.cv_detections.crc}\n" f"Expected: {crc_computed}")
-        crc_data = ctypes.string_at(
-            ctypes.addressof(spi_packet.metadata),
-            ctypes.sizeof(spi_packet.metadata) - ctypes.sizeof(ctypes.c_uint16),
-        )
-        crc_computed = crc_calculator.checksum(crc_data)
-        if crc_computed != spi_packet.metadata.crc:
-            print("⚠️ Metadata CRC fail.\n" f"Got: {spi_packet.metadata.crc}\n" f"Expected: {crc_computed}")
+    import ft4222
+
+    from ctsgen3.spi.reader import SpiPacketReader
+
+    packet = SpiPacket()
+    with SpiPacketReader.open(clock=ft4222.SPIMaster.Clock.DIV_16) as reader:
+        for i in range(0, 100000):
+            if not reader.wait_frame(1.0):
+                print("⚠️ No frame ready.")
+            elif failures := reader.read_frame(packet):
+                print(f"⚠️ {section_names(failures)} CRC fail ({reader.num_recovered} recovered by re-reading).")
@@ -0,0 +1,228 @@
+import argparse
+import ctypes
+import signal
+import sys
+import time
+from types import FrameType
+from typing import Dict, List, Optional, Sequence, Type
+
+from ctsgen3.device.device import ReplayDevice, SpiDevice, recording_packets, synthetic_packets
+from ctsgen3.instrumentation.instrumentation import Exporter, Instrumentation
+from ctsgen3.recording.recording import Recording
+from ctsgen3.spi.reader import SpiPacketReader
+from ctsgen3.spi.spi import SpiSection, spi_packet_type
+from ctsgen3.stream.sinks import (
+    FanoutSink,
+    JsonLinesSink,
+    NpySink,
+    RawSink,
+    RecordingSink,
+    Sink,
+    SinkWorker,
+    SocketSink,
+)
+
+SINKS_HELP = """sinks (--sink, repeatable):
+  raw:PATH          packets back to back as read from the bus
+  recording:PATH    timestamped recording, see ctsgen3.recording
+  npy:DIRECTORY     .npy chunks of timestamped records
+  json:PATH         JSON lines of detections, json:- for stdout
+  unix:PATH         raw packets to a listening UNIX socket
+  tcp:HOST:PORT     raw packets to a listening TCP socket
+  shm:NAME          shared memory ring for local subscribers, see ctsgen3.spi.fanout
+"""
+
+
+SPI_CLOCKS = ["DIV_2", "DIV_4", "DIV_8", "DIV_16", "DIV_32", "DIV_64", "DIV_128", "DIV_256", "DIV_512"]
+"""
+Names of the `ft4222.SPIMaster.Clock` dividers, listed here so the FTDI library is only loaded to open a device.
+"""
+GPIO_PORTS = ["P0", "P1", "P2", "P3"]
+
+
+def open_sink(spec: str, packet_type: Type[ctypes.Structure]) -> Sink:
+    """
+    [Sink][ctsgen3.stream.sinks.Sink] described by `spec`, one of the forms listed in `ctsgen3 --help`.
+    """
+    kind, _, location = spec.partition(":")
+    if not location:
+        raise ValueError(f"Sink {spec} has no location")
+    if kind == "raw":
+        return RawSink(location)
+    if kind == "recording":
+        return RecordingSink(location, packet_type)
+    if kind == "npy":
+        return NpySink(location, packet_type)
+    if kind == "json":
+        if location == "-":
+            return JsonLinesSink(sys.stdout, packet_type)
+        stream = open(location, "w")
+        try:
+            return JsonLinesSink(stream, packet_type)
+        except BaseException:
+            stream.close()
+            raise
+    if kind in ("unix", "tcp"):
+        return SocketSink(spec)
+    if kind == "shm":
+        return FanoutSink(location, packet_type)
+    raise ValueError(f"Unknown sink {kind}")
+
+
+class StreamStats:
+    """
+    Throughput and error counters of a stream, formatted as one status line per interval.
+    """
+
+    def __init__(self, reader: SpiPacketReader, workers: Dict[str, SinkWorker]) -> None:
+        self.reader = reader
+        self.workers = workers
+        self.num_frames = 0
+        self.start = time.monotonic()
+        self._last = self.start
+        self._last_frames = 0
+
+    def line(self) -> str:
+        now = time.monotonic()
+        fps = (self.num_frames - self._last_frames) / (now - self._last) if now > self._last else 0.0
+        self._last, self._last_frames = now, self.num_frames
+        failures = " ".join(f"{section.name}={count}" for section, count in self.reader.section_failures.items())
+        dropped = " ".join(f"{name}={worker.num_dropped}" for name, worker in self.workers.items())
+        return (
+            f"{now - self.start:8.1f}s {self.num_frames} frames {fps:6.1f} frames/s "
+            f"{fps * ctypes.sizeof(self.reader.packet_type) / 1e3:8.1f} kB/s | CRC failures {failures} "
+            f"recovered={self.reader.num_recovered} lost={self.reader.num_lost} | {self.reader.sequence.summary()} | "
+            f"dropped {dropped or '-'}"
+        )
+
+
+def parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="ctsgen3",
+        description="Stream packets from a CTS Gen3 EVK to one or more sinks without a GUI.",
+        epilog=SINKS_HELP,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--sink", action="append", default=[], metavar="KIND:LOCATION", help="where to stream to")
+    parser.add_argument(
+        "--sections",
+        default=",".join(str(section.name) for section in SpiSection),
+        help="comma separated SPI sections enabled on the device (default: all)",
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--description", default="FT4222 A", help="FT4222 SPI master description")
+    source.add_argument("--replay", metavar="RECORDING", help="replay a recording instead of reading a device")
+    source.add_argument("--synthetic", action="store_true", help="stream synthetic packets instead of a device")
+    parser.add_argument("--clock", default="DIV_32", choices=SPI_CLOCKS, help="SPI clock divider of the 60MHz clock")
+    parser.add_argument("--drdy-port", choices=GPIO_PORTS, help="GPIO port of DRDY")
+    parser.add_argument("--fps", type=float, help="frame rate if not read from the packets' metadata")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--frames", type=int, help="stop after this many frames")
+    parser.add_argument("--queue-size", type=int, default=1024, help="packets buffered per sink (default: 1024)")
+    parser.add_argument("--block", action="store_true", help="pause acquisition when a sink falls behind, not drop")
+    parser.add_argument("--stats-interval", type=float, default=5.0, help="seconds between stats lines, 0 for none")
+    parser.add_argument(
+        "--instrument", action="store_true", help="print per-stage latency histograms with every stats line"
+    )
+    parser.add_argument("--prometheus", metavar="PATH", help="write per-stage latency histograms to a Prometheus file")
+    args = parser.parse_args(argv)
+    if not args.sink:
+        parser.error("at least one --sink is required")
+    try:
+        args.sections = SpiSection(sum(SpiSection[name.strip().upper()] for name in args.sections.split(",")))
+    except KeyError as error:
+        names = ", ".join(str(section.name) for section in SpiSection)
+        parser.error(f"unknown section {error}, expected a comma separated list of {names}")
+    return args
+
+
+def open_reader(args: argparse.Namespace) -> SpiPacketReader:
+    if args.replay:
+        recording = Recording(args.replay)
+        device: SpiDevice = ReplayDevice(recording_packets(recording, loop=True), fps=args.fps or 60.0)
+        return SpiPacketReader(device, recording.packet_type, args.fps)
+    packet_type = spi_packet_type(args.sections)
+    if args.synthetic:
+        return SpiPacketReader(
+            ReplayDevice(synthetic_packets(packet_type), fps=args.fps or 60.0), packet_type, args.fps
+        )
+    import ft4222
+
+    drdy_port = None if args.drdy_port is None else ft4222.GPIO.Port[args.drdy_port]
+    clock = ft4222.SPIMaster.Clock[args.clock]
+    return SpiPacketReader.open(args.description, clock, packet_type, drdy_port, args.fps)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Entry point of the `ctsgen3` console script: stream valid frames to every `--sink` until `--duration`,
+    `--frames`, Ctrl+C or SIGTERM, printing a stats line to stderr every `--stats-interval` seconds.
+    """
+    args = parse_args(argv)
+    stopping: List[bool] = []
+
+    def stop(signum: int, frame: Optional[FrameType]) -> None:
+        stopping.append(True)
+
+    try:
+        reader = open_reader(args)
+    except (OSError, ValueError) as error:
+        print(f"ctsgen3: error: cannot open source: {error}", file=sys.stderr)
+        return 2
+    with reader:
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        if args.instrument or args.prometheus:
+            reader.instrumentation = Instrumentation()
+        sinks: Dict[str, Sink] = {}
+        try:
+            for index, spec in enumerate(args.sink):
+                sinks[f"{spec.partition(':')[0]}{index}"] = open_sink(spec, reader.packet_type)
+        except BaseException as error:
+            for sink in sinks.values():  # e.g. so a shared memory ring is not left behind
+                sink.close()
+            if isinstance(error, (OSError, ValueError)):
+                print(f"ctsgen3: error: cannot open sink {spec}: {error}", file=sys.stderr)
+                return 2
+            raise
+        workers = {
+            name: SinkWorker(name, sink, args.queue_size, args.block, reader.instrumentation)
+            for name, sink in sinks.items()
+        }
+        for worker in workers.values():
+            worker.start()
+        exporter = None
+        if reader.instrumentation is not None:
+            stream = sys.stderr if args.instrument else None
+            exporter = Exporter(reader.instrumentation, args.stats_interval or 10.0, stream, args.prometheus)
+            exporter.start()
+        stats = StreamStats(reader, workers)
+        deadline = None if args.duration is None else time.monotonic() + args.duration
+        next_stats = time.monotonic() + args.stats_interval
+        packet = reader.packet
+        try:
+            while not stopping and (args.frames is None or stats.num_frames < args.frames):
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                if args.stats_interval and now >= next_stats:
+                    next_stats += args.stats_interval
+                    print(stats.line(), file=sys.stderr, flush=True)
+                if not reader.next_frame(packet, timeout=0.5):
+                    continue
+                timestamp = time.time()
+                data = bytes(packet)
+                for worker in workers.values():
+                    worker.put(timestamp, data)
+                stats.num_frames += 1
+        finally:
+            for worker in workers.values():
+                worker.stop()
+            if exporter is not None:
+                exporter.stop()
+        print(stats.line(), file=sys.stderr, flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
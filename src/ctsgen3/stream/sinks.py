@@ -0,0 +1,247 @@
+import ctypes
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, TextIO, Tuple, Type, Union
+
+import numpy as np
+
+from ctsgen3.instrumentation.instrumentation import Instrumentation
+from ctsgen3.recording.recording import RecordHeader, Recorder, record_type
+from ctsgen3.registers.dtypes import struct_dtype
+from ctsgen3.spi.detections import DetectionTable
+from ctsgen3.spi.dtypes import CV_DETECTION_DTYPE
+from ctsgen3.spi.fanout import FanoutPublisher
+from ctsgen3.spi.spi import MAX_NUM_DETECTIONS, SpiPacket
+
+
+class Sink(ABC):
+    """
+    Destination of a packet stream. Sinks are written from their own [SinkWorker][ctsgen3.stream.sinks.SinkWorker]
+    thread, so a slow sink does not stall acquisition.
+    """
+
+    @abstractmethod
+    def write(self, timestamp: float, packet: bytes) -> None:
+        """
+        Write one packet of the stream's packet type, received at host time `timestamp`.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class RawSink(Sink):
+    """
+    Packets back to back with no header or timestamps, as read from the SPI bus.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike[str]]) -> None:
+        self._file = open(path, "wb")
+
+    def write(self, timestamp: float, packet: bytes) -> None:
+        self._file.write(packet)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class RecordingSink(Sink):
+    """
+    Timestamped [Recording][ctsgen3.recording.recording.Recording] file.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike[str]], packet_type: Type[ctypes.Structure] = SpiPacket) -> None:
+        self._recorder = Recorder(path, packet_type)
+        self._packet_type = packet_type
+
+    def write(self, timestamp: float, packet: bytes) -> None:
+        self._recorder.write(self._packet_type.from_buffer_copy(packet), timestamp=timestamp)
+
+    def close(self) -> None:
+        self._recorder.close()
+
+
+class NpySink(Sink):
+    """
+    Directory of `.npy` files of `chunk_size` records each (`chunk_000000.npy`, ...), structured as
+    [record_type][ctsgen3.recording.recording.record_type], so each chunk loads with `np.load` alone. The last chunk
+    holds only the records received before closing.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, os.PathLike[str]],
+        packet_type: Type[ctypes.Structure] = SpiPacket,
+        chunk_size: int = 4096,
+    ) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.num_chunks = 0
+        self._records = np.zeros(chunk_size, struct_dtype(record_type(packet_type)))
+        self._raw = self._records.view(np.uint8).reshape(chunk_size, -1)
+        self._header_size = ctypes.sizeof(RecordHeader)
+        self._count = 0
+
+    def write(self, timestamp: float, packet: bytes) -> None:
+        self._records["timestamp"][self._count] = timestamp
+        self._raw[self._count, self._header_size :] = np.frombuffer(packet, np.uint8)
+        self._count += 1
+        if self._count == len(self._records):
+            self._save()
+
+    def _save(self) -> None:
+        np.save(os.path.join(self.directory, f"chunk_{self.num_chunks:06d}.npy"), self._records[: self._count])
+        self.num_chunks += 1
+        self._count = 0
+
+    def close(self) -> None:
+        if self._count:
+            self._save()
+
+
+class JsonLinesSink(Sink):
+    """
+    One JSON object per packet with its timestamp and valid detections, e.g. for piping to `jq`. The packet type must
+    include the CV detections section. Closing the sink closes `stream`, unless it is stdout.
+    """
+
+    def __init__(self, stream: TextIO = sys.stdout, packet_type: Type[ctypes.Structure] = SpiPacket) -> None:
+        if not hasattr(packet_type, "cv_detections"):
+            raise ValueError("JSON lines sinks need the CV_DETECTIONS section")
+        self._stream = stream
+        offset = packet_type.cv_detections.offset
+        self._detections = slice(offset, offset + CV_DETECTION_DTYPE.itemsize * MAX_NUM_DETECTIONS)
+        self._names = CV_DETECTION_DTYPE.names or ()
+
+    def write(self, timestamp: float, packet: bytes) -> None:
+        table = DetectionTable.from_detections(np.frombuffer(packet[self._detections], CV_DETECTION_DTYPE))
+        columns = [getattr(table, name).tolist() for name in self._names]
+        detections = [dict(zip(self._names, row)) for row in zip(*columns)]
+        self._stream.write(json.dumps({"timestamp": timestamp, "detections": detections}) + "\n")
+
+    def close(self) -> None:
+        if self._stream is sys.stdout:
+            self._stream.flush()
+        else:
+            self._stream.close()
+
+
+class SocketSink(Sink):
+    """
+    Raw packets (as [RawSink][ctsgen3.stream.sinks.RawSink]) sent to a listening UNIX (`unix:/path`) or TCP
+    (`tcp:host:port`) socket.
+    """
+
+    def __init__(self, address: str) -> None:
+        scheme, _, location = address.partition(":")
+        if scheme == "unix":
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(location)
+        elif scheme == "tcp":
+            host, _, port = location.rpartition(":")
+            self._socket = socket.create_connection((host, int(port)))
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            raise ValueError(f"Unsupported socket address {address}, expected unix:/path or tcp:host:port")
+
+    def write(self, timestamp: float, packet: bytes) -> None:
+        self._socket.sendall(packet)
+
+    def close(self) -> None:
+        self._socket.close()
+
+
+class FanoutSink(Sink):
+    """
+    Packets published to a shared memory ring named `name`, for local
+    [FanoutSubscriber][ctsgen3.spi.fanout.FanoutSubscriber] processes.
+    """
+
+    def __init__(self, name: str, packet_type: Type[ctypes.Structure] = SpiPacket) -> None:
+        self._publisher = FanoutPublisher(name, packet_type=packet_type)
+
+    def write(self, timestamp: float, packet: bytes) -> None:
+        self._publisher.publish(packet, timestamp)
+
+    def close(self) -> None:
+        self._publisher.close()
+
+
+_PUT_INTERVAL = 0.1
+"""
+Seconds between checks that a blocking [SinkWorker][ctsgen3.stream.sinks.SinkWorker] is still running.
+"""
+
+
+class SinkWorker(threading.Thread):
+    """
+    Feeds a [Sink][ctsgen3.stream.sinks.Sink] from a queue of at most `maxsize` packets. When the sink falls behind
+    and the queue is full, [put][ctsgen3.stream.sinks.SinkWorker.put] drops the packet if `block` is false, otherwise it
+    blocks acquisition until there is room, or until the worker stops.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sink: Sink,
+        maxsize: int = 1024,
+        block: bool = False,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
+        super().__init__(name=f"ctsgen3-sink-{name}", daemon=True)
+        self.sink = sink
+        self.instrumentation = instrumentation
+        """
+        Records the latency of each write as stage `sink.<name>` when set.
+        """
+        self._stage = f"sink.{name}"
+        self.block = block
+        self.num_written = 0
+        self.num_dropped = 0
+        self.error: Optional[BaseException] = None
+        self.queue: queue.Queue[Optional[Tuple[float, bytes]]] = queue.Queue(maxsize)
+
+    def put(self, timestamp: float, packet: bytes) -> None:
+        """
+        Queue a packet for the sink. Re-raises any error of the sink, and raises `RuntimeError` if the worker stopped
+        while `put` was waiting for room.
+        """
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self.queue.put((timestamp, packet), self.block, _PUT_INTERVAL)
+                return
+            except queue.Full:
+                if not self.block:
+                    self.num_dropped += 1
+                    return
+                if not self.is_alive():
+                    raise self.error or RuntimeError(f"{self.name} stopped")
+
+    def run(self) -> None:
+        try:
+            while (item := self.queue.get()) is not None:
+                start = time.perf_counter()
+                self.sink.write(*item)
+                if self.instrumentation is not None:
+                    self.instrumentation.observe(self._stage, time.perf_counter() - start)
+                self.num_written += 1
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.sink.close()
+
+    def stop(self) -> None:
+        """
+        Write the remaining queued packets, close the sink and wait for the thread to finish.
+        """
+        if self.is_alive():
+            self.queue.put(None)
+            self.join()
@@ -0,0 +1,45 @@
+import itertools
+import time
+from typing import List
+
+import pytest
+
+from ctsgen3.device.device import ReplayDevice, synthetic_packets
+from ctsgen3.spi.acquisition import AcquisitionThread
+from ctsgen3.spi.reader import SpiPacketReader
+from ctsgen3.spi.spi import SpiPacket
+
+
+def test_capacity_must_exceed_queue() -> None:
+    with pytest.raises(ValueError):
+        AcquisitionThread(SpiPacketReader(ReplayDevice([])), maxsize=4, capacity=4)
+
+
+def test_latest_skips_to_the_newest_packet() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 10))
+    acquisition = AcquisitionThread(SpiPacketReader(ReplayDevice(packets)), maxsize=4, capacity=16)
+    acquisition.start()
+    acquisition.join(5.0)  # the reader thread ends at the end of the source
+    assert isinstance(acquisition.error, EOFError)
+    packet = SpiPacket()
+    assert acquisition.latest(packet, timeout=0)
+    assert bytes(packet) == packets[-1]
+    assert acquisition.num_dropped == 6 and acquisition.num_late == 3
+    with pytest.raises(EOFError):
+        acquisition.latest(packet, timeout=0)
+
+
+def test_paced_stream() -> None:
+    acquisition = AcquisitionThread(SpiPacketReader(ReplayDevice(synthetic_packets(), fps=200.0)))
+    acquisition.start()
+    try:
+        packet = SpiPacket()
+        frame_counts: List[int] = []
+        deadline = time.monotonic() + 5.0
+        while len(frame_counts) < 5 and time.monotonic() < deadline:
+            if acquisition.latest(packet, timeout=1.0):
+                frame_counts.append(packet.metadata.metadata.GLOBAL_FRM_CNT_0x02.frame_count)
+        assert len(frame_counts) == 5 and frame_counts == sorted(set(frame_counts))
+    finally:
+        acquisition.stop(5.0)
+    assert not acquisition.is_alive() and acquisition.error is None
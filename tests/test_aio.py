@@ -0,0 +1,97 @@
+import asyncio
+import itertools
+import time
+from typing import List, Tuple
+
+import pytest
+
+from ctsgen3.device.device import ReplayDevice, synthetic_packets
+from ctsgen3.spi.aio import AsyncPacketStream, merge_streams
+from ctsgen3.spi.reader import SpiPacketReader
+
+
+class SlowDevice(ReplayDevice):
+    def __init__(self, packets: List[bytes], delay: float) -> None:
+        super().__init__(packets)
+        self.delay = delay
+        self.closed = False
+
+    def transfer(self, tx: bytes) -> bytes:
+        time.sleep(self.delay)
+        return super().transfer(tx)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def sources(count: int) -> List[List[bytes]]:
+    return [list(itertools.islice(synthetic_packets(seed=seed), 4)) for seed in range(count)]
+
+
+def test_iterates_until_the_source_ends() -> None:
+    (packets,) = sources(1)
+    device = SlowDevice(packets, 0.0)
+
+    async def main() -> List[bytes]:
+        async with AsyncPacketStream(SpiPacketReader(device)) as stream:
+            return [bytes(packet) async for packet in stream]
+
+    assert asyncio.run(main()) == packets
+    assert device.closed
+
+
+def test_cancelled_read_is_picked_up_by_the_next() -> None:
+    (packets,) = sources(1)
+    device = SlowDevice(packets, 0.2)
+
+    async def main() -> bytes:
+        async with AsyncPacketStream(SpiPacketReader(device)) as stream:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(stream.read(), 0.05)
+            return bytes(await stream.read())
+
+    assert asyncio.run(main()) == packets[0]
+    assert device.num_transfers == 1
+
+
+def test_read_after_close() -> None:
+    async def main() -> None:
+        stream = AsyncPacketStream(SpiPacketReader(SlowDevice(sources(1)[0], 0.0)))
+        await stream.aclose()
+        await stream.aclose()
+        with pytest.raises(RuntimeError, match="closed"):
+            await stream.read()
+        assert [packet async for packet in stream] == []
+
+    asyncio.run(main())
+
+
+def test_merge_streams() -> None:
+    packets = sources(2)
+
+    async def main() -> List[Tuple[int, bytes]]:
+        streams = [AsyncPacketStream(SpiPacketReader(SlowDevice(source, 0.01))) for source in packets]
+        try:
+            return [item async for item in merge_streams(*streams)]
+        finally:
+            for stream in streams:
+                await stream.aclose()
+
+    merged = asyncio.run(main())
+    for index, source in enumerate(packets):
+        assert [packet for stream, packet in merged if stream == index] == source
+
+
+def test_merge_streams_raises_reader_errors() -> None:
+    class FailingDevice(ReplayDevice):
+        def transfer(self, tx: bytes) -> bytes:
+            raise OSError("device unplugged")
+
+    async def main() -> None:
+        stream = AsyncPacketStream(SpiPacketReader(FailingDevice(synthetic_packets())))
+        with pytest.raises(OSError, match="unplugged"):
+            async for _ in merge_streams(stream):
+                pass
+        await stream.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+import ctypes
+import itertools
+import pathlib
+import subprocess
+import sys
+from typing import Any, Type
+
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+from ctsgen3.device.device import synthetic_packets
+from ctsgen3.recording.archive import Archive, ArchiveCompression, ArchiveWriter, archive_recording
+from ctsgen3.recording.recording import Recording, record_type
+from ctsgen3.registers.dtypes import struct_dtype
+from ctsgen3.spi.spi import SpiPacket, SpiSection, spi_packet_type
+from tests.test_recording import write_recording
+
+
+def make_records(packet_type: Type[ctypes.Structure], count: int) -> npt.NDArray[Any]:
+    records = np.zeros(count, struct_dtype(record_type(packet_type)))
+    records["timestamp"] = 100.0 + np.arange(count) / 60.0
+    records["crc_failures"] = np.arange(count) % 3 == 2
+    packets = b"".join(itertools.islice(synthetic_packets(packet_type), count))
+    records["packet"] = np.frombuffer(packets, struct_dtype(packet_type))
+    return records
+
+
+@pytest.mark.parametrize("compression", list(ArchiveCompression))
+@pytest.mark.parametrize(
+    "sections",
+    [
+        SpiSection(15),
+        SpiSection.THERMAL_FRAME,
+        SpiSection.METADATA | SpiSection.CV_DETECTIONS,
+        SpiSection.CV_FOREGROUND | SpiSection.METADATA,
+    ],
+)
+def test_round_trip(tmp_path: pathlib.Path, sections: SpiSection, compression: ArchiveCompression) -> None:
+    path = tmp_path / "capture.ctsa"
+    packet_type = spi_packet_type(sections)
+    records = make_records(packet_type, 10)
+    with ArchiveWriter(path, packet_type, chunk_size=4, compression=compression) as writer:
+        writer.write_records(records[:5])
+        for record in records[5:]:
+            writer.write(record["packet"].tobytes(), SpiSection(int(record["crc_failures"])), record["timestamp"])
+    with Archive(path) as archive:
+        assert archive.packet_type is packet_type and archive.compression == compression
+        assert len(archive) == 10
+        assert archive.chunk_lengths.tolist() == [4, 4, 2]
+        assert archive.chunk_starts.tolist() == [0, 4, 8]
+        assert np.concatenate(list(archive.chunks())).tobytes() == records.tobytes()
+        assert bytes(archive.packet(9)) == records[9]["packet"].tobytes()
+        assert bytes(archive.packet(3)) == records[3]["packet"].tobytes()
+
+
+def test_time_slice_and_packet(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.ctsa"
+    records = make_records(SpiPacket, 10)
+    with ArchiveWriter(path, chunk_size=4) as writer:
+        writer.write_records(records)
+    with Archive(path) as archive:
+        assert archive.first_timestamps.tolist() == records["timestamp"][[0, 4, 8]].tolist()
+        assert archive.last_timestamps.tolist() == records["timestamp"][[3, 7, 9]].tolist()
+        assert archive.time_slice(records["timestamp"][3], records["timestamp"][9]).tobytes() == records[3:9].tobytes()
+        assert len(archive.time_slice(0.0, 100.0)) == 0
+        assert len(archive.time_slice(200.0, 300.0)) == 0
+        with pytest.raises(IndexError):
+            archive.packet(10)
+        with pytest.raises(IndexError):
+            archive.packet(-1)
+
+
+def test_empty_archive(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.ctsa"
+    ArchiveWriter(path).close()
+    with Archive(path) as archive:
+        assert len(archive) == 0 and archive.num_chunks == 0
+        assert list(archive.chunks()) == []
+        assert len(archive.time_slice(0.0, 1e12)) == 0
+        with pytest.raises(IndexError):
+            archive.packet(0)
+
+
+def test_partial_last_chunk_is_ignored(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.ctsa"
+    with ArchiveWriter(path, chunk_size=4) as writer:
+        writer.write_records(make_records(SpiPacket, 8))
+    with open(path, "r+b") as file:
+        file.truncate(file.seek(0, 2) - 10)  # killed mid write
+    with Archive(path) as archive:
+        assert len(archive) == 4 and archive.num_chunks == 1
+
+
+def test_archive_recording(tmp_path: pathlib.Path) -> None:
+    write_recording(tmp_path / "capture.cts", 10)
+    recording = Recording(tmp_path / "capture.cts")
+    archive_recording(recording, tmp_path / "capture.ctsa", chunk_size=3, compression=ArchiveCompression.LZMA)
+    with Archive(tmp_path / "capture.ctsa") as archive:
+        assert np.concatenate(list(archive.chunks())).tobytes() == recording.records.tobytes()
+
+
+def test_close(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.ctsa"
+    with ArchiveWriter(path, chunk_size=2) as writer:
+        writer.write_records(make_records(SpiPacket, 4))
+    archive = Archive(path)
+    archive.chunk(0)
+    archive.chunk(1)
+    archive.close()
+    with pytest.raises(ValueError):
+        archive.chunk(0)
+
+
+def test_not_an_archive(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.ctsa"
+    path.write_bytes(bytes(64))
+    with pytest.raises(ValueError, match="not an archive"):
+        Archive(path)
+
+
+def test_main_archives_a_section_subset_recording(tmp_path: pathlib.Path) -> None:
+    write_recording(tmp_path / "capture.cts", 10, SpiSection.THERMAL_FRAME | SpiSection.METADATA)
+    command = [sys.executable, "-m", "ctsgen3.recording.archive", str(tmp_path / "capture.cts"), "--chunk-size", "4"]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    assert [line.split()[0] for line in result.stdout.splitlines()] == ["ZLIB", "LZMA"]
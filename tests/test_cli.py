@@ -0,0 +1,112 @@
+import io
+import json
+import multiprocessing.shared_memory
+import pathlib
+import signal
+import sys
+import time
+from typing import Any, List
+
+import pytest
+
+from ctsgen3.recording.recording import Recorder, Recording
+from ctsgen3.spi.spi import SpiPacket, SpiSection, spi_packet_type
+from ctsgen3.stream import cli
+from ctsgen3.stream.cli import main
+from ctsgen3.stream.sinks import JsonLinesSink, Sink, SinkWorker
+
+
+@pytest.fixture(autouse=True)
+def keep_signal_handlers(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(signal, "signal", lambda *args: None)
+
+
+def run(*args: str) -> int:
+    return main(["--synthetic", "--fps", "500", "--stats-interval", "0", *args])
+
+
+def test_streams_to_file_sinks(tmp_path: pathlib.Path) -> None:
+    status = run(
+        "--frames", "5", "--sink", f"json:{tmp_path / 'detections.jsonl'}", "--sink", f"recording:{tmp_path / 'r.cts'}"
+    )
+    assert status == 0
+    lines = (tmp_path / "detections.jsonl").read_text().splitlines()
+    assert len(lines) == 5
+    assert json.loads(lines[0])["detections"][0]["id"] == 1
+    assert len(Recording(tmp_path / "r.cts")) == 5
+
+
+def test_json_sink_without_detections_is_a_usage_error(capsys: pytest.CaptureFixture[str]) -> None:
+    assert run("--sections", "thermal_frame", "--frames", "1", "--sink", "json:-") == 2
+    assert "CV_DETECTIONS" in capsys.readouterr().err
+
+
+def test_failed_sink_closes_opened_sinks(tmp_path: pathlib.Path) -> None:
+    name = f"ctsgen3-test-{tmp_path.name}"
+    assert run("--frames", "1", "--sink", f"shm:{name}", "--sink", "bogus:x") == 2
+    with pytest.raises(FileNotFoundError):
+        multiprocessing.shared_memory.SharedMemory(name)
+
+
+def test_json_sink_closes_files_but_not_stdout(tmp_path: pathlib.Path) -> None:
+    stream = open(tmp_path / "detections.jsonl", "w")
+    sink = JsonLinesSink(stream, SpiPacket)
+    sink.write(1.0, bytes(SpiPacket()))
+    sink.close()
+    assert stream.closed
+    assert (tmp_path / "detections.jsonl").read_text() == '{"timestamp": 1.0, "detections": []}\n'
+    stdout = sys.stdout
+    JsonLinesSink(stdout, SpiPacket).close()
+    assert not stdout.closed
+    with pytest.raises(ValueError):
+        JsonLinesSink(io.StringIO(), spi_packet_type(SpiSection.THERMAL_FRAME | SpiSection.METADATA))
+
+
+def test_unknown_section_is_a_usage_error(capsys: pytest.CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit) as exit:
+        run("--sections", "thermal_frame,bogus", "--sink", "json:-")
+    assert exit.value.code == 2
+    error = capsys.readouterr().err
+    assert "BOGUS" in error and "THERMAL_FRAME, METADATA" in error
+
+
+def test_replaying_a_recording_without_valid_packets(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    with Recorder(tmp_path / "capture.cts") as recorder:
+        recorder.write(SpiPacket(), SpiSection.METADATA)
+    assert main(["--replay", str(tmp_path / "capture.cts"), "--sink", f"raw:{tmp_path / 'raw'}"]) == 2
+    assert "no valid packets" in capsys.readouterr().err
+
+
+def test_signal_handlers_are_installed_after_opening_the_source(monkeypatch: pytest.MonkeyPatch) -> None:
+    events: List[str] = []
+    open_reader = cli.open_reader
+
+    def record_open(args: Any) -> Any:
+        events.append("open")
+        return open_reader(args)
+
+    monkeypatch.setattr(cli, "open_reader", record_open)
+    monkeypatch.setattr(signal, "signal", lambda signum, handler: events.append(signal.Signals(signum).name))
+    assert run("--frames", "1", "--sink", "json:-") == 0
+    assert events == ["open", "SIGINT", "SIGTERM"]
+
+
+class FailingSink(Sink):
+    def write(self, timestamp: float, packet: bytes) -> None:
+        time.sleep(0.05)
+        raise BrokenPipeError("reader went away")
+
+
+def test_blocking_put_raises_when_the_worker_dies() -> None:
+    worker = SinkWorker("failing", FailingSink(), maxsize=1, block=True)
+    worker.put(0.0, b"")
+    worker.start()
+    start = time.monotonic()
+    with pytest.raises(BrokenPipeError):
+        for _ in range(10):
+            worker.put(0.0, b"")
+    assert time.monotonic() - start < 2.0
+    worker.join(1.0)
+    assert not worker.is_alive()
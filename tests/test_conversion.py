@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from ctsgen3.conversion.conversion import (
+    FIXED_POINT_FIELDS,
+    FRAME_SHAPE,
+    fixed_to_float,
+    float_to_fixed,
+    frames_to_float,
+    register_to_float,
+)
+from ctsgen3.registers.dtypes import REGISTER_MAP_DTYPE
+from ctsgen3.registers.registers import RegisterMap
+from ctsgen3.spi.spi import PIXEL_HEIGHT, PIXEL_WIDTH, SpiPacket
+
+
+def test_fixed_to_float() -> None:
+    assert fixed_to_float(np.int16(-256 - 128)) == -1.5
+    assert fixed_to_float(np.uint32(12), 3) == 1.5
+    assert fixed_to_float(np.arange(4, dtype=np.uint32), 3).dtype == np.float32
+
+
+def test_float_to_fixed_round_trip() -> None:
+    values = np.arange(-32768, 32768, dtype=np.int16)
+    assert np.array_equal(float_to_fixed(fixed_to_float(values)), values)
+
+
+def test_frames_to_float_batch() -> None:
+    frames = np.random.default_rng(0).integers(-32768, 32768, (64, PIXEL_HEIGHT * PIXEL_WIDTH), dtype=np.int16)
+    expected = frames.astype(np.float32).reshape((64,) + FRAME_SHAPE) / 256.0
+    out = np.empty((64,) + FRAME_SHAPE, np.float32)
+    assert frames_to_float(frames, out=out) is out
+    assert np.array_equal(out, expected)
+    result = frames_to_float(frames)
+    assert result.dtype == np.float32 and np.array_equal(result, expected)
+
+
+def test_frames_to_float_packet() -> None:
+    packet = SpiPacket()
+    packet.thermal_frame.thermal_frame[PIXEL_WIDTH + 1] = 25 * 256 + 128
+    out = np.zeros(FRAME_SHAPE, np.float32)
+    frames_to_float(packet.thermal_frame.thermal_frame, out=out)
+    assert out[1, 1] == 25.5 and out.sum() == 25.5
+    with pytest.raises(ValueError):
+        frames_to_float(packet.thermal_frame.thermal_frame, out=np.empty((2,) + FRAME_SHAPE, np.float32))
+
+
+def test_register_to_float() -> None:
+    registers = RegisterMap()
+    registers.TEMP_SENSOR_0x00.temperature_sensor_0 = -5 * 256 - 64
+    registers.DECENTRATION_0x18.centre_x = 81  # <10,3>
+    registers.DECENTRATION_0x18.centre_y = 4
+    assert register_to_float(registers, "TEMP_SENSOR_0x00", "temperature_sensor_0") == -5.25
+    for field, expected in [("centre_x", 10.125), ("centre_y", 0.5)]:
+        result = register_to_float(registers, "DECENTRATION_0x18", field)
+        assert result.dtype == np.float32 and result == expected
+    batch = np.frombuffer(bytes(registers) * 3, REGISTER_MAP_DTYPE)
+    for register, field in FIXED_POINT_FIELDS:
+        result = register_to_float(batch, register, field)
+        assert result.dtype == np.float32 and result.shape == (3,)
+        assert result[0] == register_to_float(registers, register, field)
@@ -0,0 +1,83 @@
+import ctypes
+from typing import Type
+
+import numpy as np
+import pytest
+
+from ctsgen3.spi.crc import (
+    CRC_TABLE,
+    crc16,
+    crc16_batch,
+    crc_failures,
+    crc_failures_batch,
+    section_crc_matches,
+    sections,
+    update_crcs,
+)
+from ctsgen3.spi.spi import SpiPacket, SpiSection, section_names, spi_packet_type
+
+
+def random_packets(count: int, packet_type: Type[ctypes.Structure] = SpiPacket, seed: int = 0) -> bytearray:
+    size = ctypes.sizeof(packet_type)
+    buffer = bytearray(np.random.default_rng(seed).integers(0, 256, count * size, dtype=np.uint8).tobytes())
+    for index in range(count):
+        update_crcs(packet_type.from_buffer(buffer, index * size))
+    return buffer
+
+
+def test_check_values() -> None:
+    assert crc16(b"123456789", 0x0000) == 0x31C3  # XModem
+    assert crc16(b"123456789") == 0x29B1  # CCITT-FALSE, the processing module's initial value
+    assert CRC_TABLE[1] == 0x1021
+
+
+@pytest.mark.parametrize("length", [0, 1, 2, 3, 8, 9, 300, 301, 602, 603])
+def test_batch_matches_single(length: int) -> None:
+    data = np.random.default_rng(length).integers(0, 256, (16, length), dtype=np.uint8)
+    expected = [crc16(row.tobytes()) for row in data]
+    assert crc16_batch(data).tolist() == expected
+    assert crc16_batch(data, 0).tolist() == [crc16(row.tobytes(), 0) for row in data]
+
+
+@pytest.mark.parametrize(
+    "sections", [SpiSection.THERMAL_FRAME, SpiSection.THERMAL_FRAME | SpiSection.CV_DETECTIONS, SpiSection(15)]
+)
+def test_failures_single_and_batch_agree(sections: SpiSection) -> None:
+    packet_type = spi_packet_type(sections)
+    size = ctypes.sizeof(packet_type)
+    buffer = random_packets(32, packet_type)
+    assert not crc_failures_batch(buffer, packet_type).any()
+    rng = np.random.default_rng(1)
+    for index in range(0, 32, 3):  # corrupt every third packet at a random byte
+        buffer[index * size + int(rng.integers(size))] ^= 0x10
+    batch = crc_failures_batch(buffer, packet_type)
+    single = [crc_failures(memoryview(buffer)[index * size : (index + 1) * size], packet_type) for index in range(32)]
+    assert batch.tolist() == [int(failures) for failures in single]
+    assert all(failures for failures in single[::3])
+    assert not any(failures for index, failures in enumerate(single) if index % 3)
+
+
+def test_failures_name_the_corrupted_section() -> None:
+    packet = SpiPacket.from_buffer(random_packets(1))
+    packet.metadata.crc ^= 1
+    packet.cv_detections.crc ^= 1
+    failures = crc_failures(packet)
+    assert failures == SpiSection.METADATA | SpiSection.CV_DETECTIONS
+    assert section_names(failures) == "METADATA|CV_DETECTIONS"
+    assert section_names(SpiSection(0)) == "none"
+
+
+def test_section_crc_matches() -> None:
+    raw = memoryview(random_packets(1))
+    assert all(section_crc_matches(raw, offset, length) for _, offset, length in sections(SpiPacket))
+    _, offset, length = sections(SpiPacket)[1]
+    corrupted = bytearray(raw)
+    corrupted[offset + length] ^= 1  # low byte of the CRC
+    assert not section_crc_matches(memoryview(corrupted), offset, length)
+
+
+def test_failures_rejects_wrong_length() -> None:
+    with pytest.raises(ValueError):
+        crc_failures(bytes(ctypes.sizeof(SpiPacket) - 1))
+    with pytest.raises(ValueError):
+        crc_failures_batch(bytes(ctypes.sizeof(SpiPacket) + 1))
@@ -0,0 +1,64 @@
+import ctypes
+import itertools
+
+import numpy as np
+
+from ctsgen3.device.device import synthetic_packets
+from ctsgen3.spi.detections import DetectionTable
+from ctsgen3.spi.dtypes import SPI_PACKET_DTYPE
+from ctsgen3.spi.spi import MAX_NUM_DETECTIONS, SpiCvDetectionsPacket, SpiPacket
+
+
+def detections_packet(*slots: int) -> SpiCvDetectionsPacket:
+    packet = SpiCvDetectionsPacket()
+    for slot in slots:
+        detection = packet.cv_detections[slot]
+        detection.id = slot + 1
+        detection.label = 2
+        detection.temperature_centre_location_x = slot % 20
+        detection.frames_since_motion = 1000 * slot
+        detection.peak_temperature = 30.0 + slot
+        detection.foot_position_estimate_y = 0.5 * slot
+    return packet
+
+
+def test_empty_packet() -> None:
+    table = DetectionTable.from_packets([SpiCvDetectionsPacket()])
+    assert len(table) == 0
+    assert len(table.to_records()) == 0
+
+
+def test_populated_slots() -> None:
+    packets = [detections_packet(0, 5), SpiCvDetectionsPacket(), detections_packet(MAX_NUM_DETECTIONS - 1)]
+    table = DetectionTable.from_packets([bytes(packets[0]), packets[1], packets[2]], first_frame=10)
+    assert table.frame.tolist() == [10, 10, 12]
+    assert table.id.tolist() == [1, 6, MAX_NUM_DETECTIONS]
+    assert table.frames_since_motion.tolist() == [0, 5000, 1000 * (MAX_NUM_DETECTIONS - 1)]
+    assert table.peak_temperature.tolist() == [30.0, 35.0, 30.0 + MAX_NUM_DETECTIONS - 1]
+    assert table.foot_position_estimate_y.tolist() == [0.0, 2.5, 0.5 * (MAX_NUM_DETECTIONS - 1)]
+    for row, (frame, slot) in enumerate([(0, 0), (0, 5), (2, MAX_NUM_DETECTIONS - 1)]):
+        detection = packets[frame].cv_detections[slot]
+        for name, *_ in detection._fields_:
+            assert getattr(table, name)[row] == getattr(detection, name)
+
+
+def test_selection_and_concatenation() -> None:
+    table = DetectionTable.from_packets([detections_packet(0, 1, 2), detections_packet(3)])
+    hot = table[table.peak_temperature > 31.0]
+    assert hot.id.tolist() == [3, 4]
+    joined = DetectionTable.concatenate([table[:2], table[2:]])
+    assert np.array_equal(joined.to_records(), table.to_records())
+    assert repr(table) == "DetectionTable(4 detections in 2 frames)"
+
+
+def test_from_detections_of_packet_batch() -> None:
+    raw = b"".join(itertools.islice(synthetic_packets(), 8))
+    detections = np.frombuffer(raw, SPI_PACKET_DTYPE)["cv_detections"]["cv_detections"]
+    table = DetectionTable.from_detections(detections)
+    assert table.frame.tolist() == list(range(8))
+    assert (
+        table.frame.tolist()
+        == DetectionTable.from_packets(
+            SpiPacket.from_buffer_copy(raw, index * ctypes.sizeof(SpiPacket)).cv_detections for index in range(8)
+        ).frame.tolist()
+    )
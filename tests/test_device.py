@@ -0,0 +1,88 @@
+import itertools
+import pathlib
+
+import pytest
+
+from ctsgen3.device.device import ReplayDevice, recording_packets, synthetic_packets
+from ctsgen3.recording.recording import Recorder, Recording
+from ctsgen3.spi.reader import SpiPacketReader
+from ctsgen3.spi.spi import SpiPacket, SpiSection
+
+
+def test_finite_source_ends_iteration() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 5))
+    reader = SpiPacketReader(ReplayDevice(packets))
+    assert [bytes(packet) for packet in reader] == packets
+    assert reader.num_invalid == 0
+
+
+def test_reading_the_last_packet_does_not_fail() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 3))
+    device = ReplayDevice(packets)
+    reader = SpiPacketReader(device)
+    assert [bytes(packet) for packet in itertools.islice(reader, 3)] == packets
+    with pytest.raises(EOFError):
+        device.transfer(bytes(len(packets[0])))
+
+
+def test_empty_source() -> None:
+    device = ReplayDevice([])
+    assert list(SpiPacketReader(device)) == []
+    with pytest.raises(EOFError):
+        device.transfer(bytes(16))
+
+
+def test_partial_transfer_repeats_the_packet() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 2))
+    device = ReplayDevice(packets)
+    assert device.transfer(bytes(10)) == packets[0][:10]
+    assert device.transfer(bytes(len(packets[0]) + 2)) == packets[0] + packets[0][-1:] * 2
+    assert device.transfer(bytes(len(packets[0]))) == packets[0]
+    assert device.transfer(bytes(10)) == packets[1][:10]
+
+
+def test_faulty_read_does_not_consume_the_packet() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 2))
+    device = ReplayDevice(packets, crc_error_rate=1.0, seed=0)
+    assert device.transfer(bytes(len(packets[0]))) != packets[0]
+    device.crc_error_rate = 0.0
+    assert device.transfer(bytes(len(packets[0]))) == packets[0]
+    assert device.transfer(bytes(len(packets[0]))) == packets[1]
+
+
+def test_paced_finite_source() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 4))
+    reader = SpiPacketReader(ReplayDevice(packets, fps=200.0))
+    assert [bytes(packet) for packet in reader] == packets
+
+
+def test_recording_packets_without_loop(tmp_path: pathlib.Path) -> None:
+    packets = list(itertools.islice(synthetic_packets(), 6))
+    with Recorder(tmp_path / "capture.cts") as recorder:
+        for packet in packets:
+            recorder.write(SpiPacket.from_buffer_copy(packet))
+    reader = SpiPacketReader(ReplayDevice(recording_packets(Recording(tmp_path / "capture.cts"))))
+    assert [bytes(packet) for packet in reader] == packets
+
+
+def test_looping_a_recording_without_valid_packets(tmp_path: pathlib.Path) -> None:
+    with Recorder(tmp_path / "capture.cts") as recorder:
+        recorder.write(SpiPacket(), SpiSection.METADATA)
+    with pytest.raises(ValueError, match="no valid packets"):
+        ReplayDevice(recording_packets(Recording(tmp_path / "capture.cts"), loop=True))
+    assert list(recording_packets(Recording(tmp_path / "capture.cts"))) == []
+
+
+def test_recording_packets_loop(tmp_path: pathlib.Path) -> None:
+    packets = list(itertools.islice(synthetic_packets(), 2))
+    with Recorder(tmp_path / "capture.cts") as recorder:
+        for packet in packets:
+            recorder.write(SpiPacket.from_buffer_copy(packet))
+    looped = recording_packets(Recording(tmp_path / "capture.cts"), loop=True)
+    assert list(itertools.islice(looped, 5)) == packets * 2 + packets[:1]
+
+
+def test_no_data_ready() -> None:
+    device = ReplayDevice(synthetic_packets(), fps=60.0, data_ready=False)
+    assert not device.has_data_ready
+    assert device.wait_data_ready(0.0) is False
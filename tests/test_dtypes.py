@@ -0,0 +1,75 @@
+import ctypes
+from typing import Any, Type
+
+import numpy as np
+import pytest
+
+from ctsgen3.registers.dtypes import REGISTER_MAP_DTYPE, bitfield, bitfields, layout_matches, struct_dtype
+from ctsgen3.registers.registers import CTS_CTRL_0x1F, RegisterMap
+from ctsgen3.spi.dtypes import (
+    CV_DETECTION_DTYPE,
+    SPI_CV_DETECTIONS_PACKET_DTYPE,
+    SPI_CV_FOREGROUND_PACKET_DTYPE,
+    SPI_METADATA_PACKET_DTYPE,
+    SPI_PACKET_DTYPE,
+    SPI_THERMAL_PACKET_DTYPE,
+)
+from ctsgen3.spi.spi import (
+    CvDetection,
+    SpiCvDetectionsPacket,
+    SpiCvForegroundPacket,
+    SpiMetadataPacket,
+    SpiPacket,
+    SpiSection,
+    SpiThermalPacket,
+    spi_packet_type,
+)
+
+
+@pytest.mark.parametrize(
+    "struct_type, dtype",
+    [
+        (RegisterMap, REGISTER_MAP_DTYPE),
+        (CvDetection, CV_DETECTION_DTYPE),
+        (SpiThermalPacket, SPI_THERMAL_PACKET_DTYPE),
+        (SpiMetadataPacket, SPI_METADATA_PACKET_DTYPE),
+        (SpiCvForegroundPacket, SPI_CV_FOREGROUND_PACKET_DTYPE),
+        (SpiCvDetectionsPacket, SPI_CV_DETECTIONS_PACKET_DTYPE),
+        (SpiPacket, SPI_PACKET_DTYPE),
+    ],
+)
+def test_layout_matches(struct_type: Type[ctypes.Structure], dtype: np.dtype[Any]) -> None:
+    assert dtype.itemsize == ctypes.sizeof(struct_type)
+    for name, *_ in struct_type._fields_:
+        assert dtype.fields is not None and dtype.fields[name][1] == getattr(struct_type, name).offset
+    assert layout_matches(struct_type, dtype)
+
+
+@pytest.mark.parametrize("sections", [SpiSection.THERMAL_FRAME, SpiSection.METADATA | SpiSection.CV_DETECTIONS])
+def test_section_subset_layout_matches(sections: SpiSection) -> None:
+    packet_type = spi_packet_type(sections)
+    assert layout_matches(packet_type, struct_dtype(packet_type))
+
+
+def test_round_trip_is_byte_exact() -> None:
+    raw = np.random.default_rng(0).integers(0, 256, 3 * ctypes.sizeof(SpiPacket), dtype=np.uint8).tobytes()
+    records = np.frombuffer(raw, SPI_PACKET_DTYPE)
+    assert records.tobytes() == raw
+    packet = SpiPacket.from_buffer_copy(raw, ctypes.sizeof(SpiPacket))
+    assert records[1]["metadata"]["crc"] == packet.metadata.crc
+    assert records[1]["thermal_frame"]["thermal_frame"][64] == packet.thermal_frame.thermal_frame[64]
+
+
+def test_layout_mismatch_is_detected() -> None:
+    shifted = np.dtype({"names": ["x", "y"], "formats": ["<i4", "<i4"], "offsets": [0, 4], "itemsize": 12})
+    assert not layout_matches(CvDetection, shifted)
+    assert not layout_matches(CvDetection, CV_DETECTION_DTYPE.newbyteorder(">"))
+
+
+def test_bitfield() -> None:
+    register = CTS_CTRL_0x1F()
+    for value, (name, (shift, width)) in enumerate(bitfields(CTS_CTRL_0x1F).items()):
+        setattr(register, name, value % (1 << width))
+    words = np.frombuffer(bytes(register), struct_dtype(CTS_CTRL_0x1F))
+    for name in bitfields(CTS_CTRL_0x1F):
+        assert int(bitfield(words, CTS_CTRL_0x1F, name)[0]) == getattr(register, name)
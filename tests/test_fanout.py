@@ -0,0 +1,109 @@
+import ctypes
+import os
+import sys
+import uuid
+
+import pytest
+
+from ctsgen3.spi.fanout import FanoutPublisher, FanoutSubscriber, _map_read_only, _shm_open_read_only
+from ctsgen3.spi.spi import SpiPacket, SpiSection, spi_packet_type
+
+PACKET_TYPE = spi_packet_type(SpiSection.THERMAL_FRAME)
+
+
+def packet(value: int) -> bytes:
+    return bytes([value % 256]) * ctypes.sizeof(PACKET_TYPE)
+
+
+@pytest.fixture
+def name() -> str:
+    return f"ctsgen3-test-{uuid.uuid4().hex[:12]}"
+
+
+def test_publish_and_read(name: str) -> None:
+    with FanoutPublisher(name, capacity=4, packet_type=PACKET_TYPE) as publisher:
+        publisher.publish(packet(1))  # before subscribing, so not read
+        with FanoutSubscriber(name) as subscriber:
+            assert subscriber.packet_type is PACKET_TYPE
+            assert subscriber.read(timeout=0) is None
+            for value in range(2, 5):
+                publisher.publish(packet(value), timestamp=float(value))
+            assert subscriber.lag == 3
+            for value in range(2, 5):
+                view = subscriber.read(timeout=0)
+                assert view is not None and bytes(view) == packet(value)
+                assert subscriber.timestamp == float(value) and subscriber.frame_count == value - 1
+                assert subscriber.intact()
+            assert subscriber.num_received == 3 and subscriber.num_overruns == 0
+
+
+def test_frame_count_from_metadata(name: str) -> None:
+    with FanoutPublisher(name, capacity=2) as publisher, FanoutSubscriber(name) as subscriber:
+        assert subscriber.packet_type is SpiPacket
+        source = SpiPacket()
+        source.metadata.metadata.GLOBAL_FRM_CNT_0x02.frame_count = 1234
+        publisher.publish(source)
+        assert subscriber.read(timeout=0) is not None and subscriber.frame_count == 1234
+
+
+def test_overrun_skips_to_oldest(name: str) -> None:
+    with FanoutPublisher(name, capacity=4, packet_type=PACKET_TYPE) as publisher, FanoutSubscriber(name) as subscriber:
+        publisher.publish(packet(0))
+        view = subscriber.read(timeout=0)
+        assert view is not None
+        for value in range(1, 11):
+            publisher.publish(packet(value))
+        assert not subscriber.intact()  # its slot was reused
+        view = subscriber.read(timeout=0)
+        assert view is not None and bytes(view) == packet(8)
+        assert subscriber.num_overruns == 7 and subscriber.position == 9
+
+
+def test_from_oldest(name: str) -> None:
+    with FanoutPublisher(name, capacity=4, packet_type=PACKET_TYPE) as publisher:
+        for value in range(6):
+            publisher.publish(packet(value))
+        with FanoutSubscriber(name, from_oldest=True) as subscriber:
+            assert [bytes(subscriber.read(timeout=0) or b"")[0] for _ in range(3)] == [3, 4, 5]
+            assert subscriber.read(timeout=0) is None
+
+
+def test_torn_slot_is_skipped(name: str) -> None:
+    with FanoutPublisher(name, capacity=4, packet_type=PACKET_TYPE) as publisher, FanoutSubscriber(name) as subscriber:
+        publisher.publish(packet(0))
+        publisher.publish(packet(1))
+        publisher._slots[0].write_count = 9  # as if being overwritten
+        view = subscriber.read(timeout=0)
+        assert view is not None and bytes(view) == packet(1)
+        assert subscriber.num_overruns == 1
+
+
+def test_not_a_ring(name: str) -> None:
+    with pytest.raises(FileNotFoundError):
+        FanoutSubscriber(name)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX shared memory")
+def test_shm_open_fallback(name: str) -> None:
+    with FanoutPublisher(name, capacity=2, packet_type=PACKET_TYPE):
+        fd = _shm_open_read_only(name)
+        os.close(fd)
+        with _map_read_only(name, 8) as mapping:
+            assert mapping[:8] == b"CTSGEN3F"
+    with pytest.raises(FileNotFoundError):
+        _shm_open_read_only(name)
+
+
+def test_use_after_close_raises(name: str) -> None:
+    with FanoutPublisher(name, capacity=2, packet_type=PACKET_TYPE) as publisher:
+        subscriber = FanoutSubscriber(name)
+        publisher.publish(packet(1))
+        subscriber.close()
+        subscriber.close()
+        assert not hasattr(subscriber, "header")
+        with pytest.raises(ValueError, match="closed"):
+            subscriber.read(timeout=0)
+        with pytest.raises(ValueError, match="closed"):
+            assert subscriber.lag == 0
+        with pytest.raises(ValueError, match="closed"):
+            subscriber.intact()
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "ctsgen3.spi.spi",
+        "ctsgen3.spi.reader",
+        "ctsgen3.spi.aio",
+        "ctsgen3.spi.fanout",
+        "ctsgen3.device.device",
+        "ctsgen3.device.manager",
+        "ctsgen3.recording.recording",
+        "ctsgen3.recording.archive",
+        "ctsgen3.analysis.statistics",
+        "ctsgen3.pipeline.pipeline",
+        "ctsgen3.stream.cli",
+    ],
+)
+def test_offline_modules_do_not_load_hardware_or_gui_libraries(module: str) -> None:
+    # a fresh interpreter, as the test session may already have imported them
+    statement = f"import sys, {module}; print(' '.join(sorted({{'ft4222', 'matplotlib'}} & set(sys.modules))))"
+    result = subprocess.run([sys.executable, "-c", statement], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
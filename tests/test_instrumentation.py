@@ -0,0 +1,60 @@
+import io
+import itertools
+import pathlib
+
+from ctsgen3.device.device import ReplayDevice, synthetic_packets
+from ctsgen3.instrumentation.instrumentation import Exporter, Histogram, Instrumentation
+from ctsgen3.spi.reader import SpiPacketReader
+
+
+def test_histogram_quantiles() -> None:
+    histogram = Histogram([1.0, 2.0, 4.0])
+    for value in [0.5, 1.5, 1.5, 3.0, 10.0]:
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1, 1]
+    assert (histogram.count, histogram.sum, histogram.max) == (5, 16.5, 10.0)
+    assert histogram.quantile(0.2) == 1.0
+    assert histogram.quantile(0.5) == 2.0
+    assert histogram.quantile(1.0) == 10.0
+
+
+def test_prometheus_format() -> None:
+    instrumentation = Instrumentation()
+    instrumentation.observe("transfer", 0.002)
+    instrumentation.observe("transfer", 20.0)
+    instrumentation.count("duplicates", 3)
+    lines = instrumentation.prometheus().splitlines()
+    assert lines[0] == "# TYPE ctsgen3_stage_seconds histogram"
+    assert 'ctsgen3_stage_seconds_bucket{stage="transfer",le="0.00316228"} 1' in lines
+    assert 'ctsgen3_stage_seconds_bucket{stage="transfer",le="10"} 1' in lines
+    assert 'ctsgen3_stage_seconds_bucket{stage="transfer",le="+Inf"} 2' in lines
+    assert 'ctsgen3_stage_seconds_count{stage="transfer"} 2' in lines
+    assert lines[-2:] == ["# TYPE ctsgen3_duplicates_total counter", "ctsgen3_duplicates_total 3"]
+
+
+def test_reader_stages() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 4))
+    device = ReplayDevice(packets, crc_error_rate=1.0, seed=0)
+    reader = SpiPacketReader(device, max_retries=0)
+    reader.instrumentation = Instrumentation()
+    reader.next_frame(reader.packet)
+    device.crc_error_rate = 0.0
+    assert list(itertools.islice(reader, 4)) and reader.num_lost == 1
+    histograms = reader.instrumentation.histograms
+    assert {"wait", "transfer", "parse", "crc.THERMAL_FRAME", "crc.METADATA"} <= set(histograms)
+    assert histograms["transfer"].count == reader.num_reads
+    assert reader.instrumentation.counters["frames_lost"] == 1
+    assert sum(value for name, value in reader.instrumentation.counters.items() if name.startswith("crc_failures")) == 1
+
+
+def test_exporter_writes_on_stop(tmp_path: pathlib.Path) -> None:
+    instrumentation = Instrumentation()
+    with instrumentation.time("render"):
+        pass
+    stream = io.StringIO()
+    exporter = Exporter(instrumentation, interval=60.0, stream=stream, path=str(tmp_path / "ctsgen3.prom"))
+    exporter.start()
+    exporter.stop()
+    assert stream.getvalue().split()[:2] == ["render", "n=1"]
+    assert (tmp_path / "ctsgen3.prom").read_text() == instrumentation.prometheus()
+    assert not (tmp_path / "ctsgen3.prom.tmp").exists()
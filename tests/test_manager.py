@@ -0,0 +1,68 @@
+import itertools
+from typing import Any, List, Optional, Tuple
+
+import pytest
+
+from ctsgen3.device import manager
+from ctsgen3.device.device import Ft4222Device, ReplayDevice, synthetic_packets
+from ctsgen3.device.manager import AcquisitionManager
+from ctsgen3.spi.reader import SpiPacketReader
+
+
+class FakeDevice(ReplayDevice):
+    def __init__(self) -> None:
+        super().__init__(synthetic_packets())
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_open_all_closes_opened_devices_on_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    opened: List[FakeDevice] = []
+
+    def open_by_location(location: int, *args: Any) -> FakeDevice:
+        if location == 3:
+            raise RuntimeError("device busy")
+        opened.append(FakeDevice())
+        return opened[-1]
+
+    locations: List[Tuple[int, Optional[int]]] = [(1, None), (2, None), (3, None)]
+    monkeypatch.setattr(manager, "ft4222_locations", lambda: locations)
+    monkeypatch.setattr(Ft4222Device, "open_by_location", open_by_location)
+    with pytest.raises(RuntimeError, match="device busy"):
+        AcquisitionManager.open_all()
+    assert len(opened) == 2 and all(device.closed for device in opened)
+
+
+def test_merges_devices() -> None:
+    readers = [SpiPacketReader(ReplayDevice(synthetic_packets(seed=seed), fps=200.0)) for seed in range(2)]
+    with AcquisitionManager(readers) as acquisition:
+        devices = {packet.device for packet in itertools.islice(acquisition, 20)}
+    assert devices == {0, 1}
+
+
+class FailingDevice(ReplayDevice):
+    def transfer(self, tx: bytes) -> bytes:
+        raise OSError("device unplugged")
+
+
+def test_iteration_ends_with_the_sources() -> None:
+    sources = [list(itertools.islice(synthetic_packets(seed=seed), 5)) for seed in range(2)]
+    readers = [SpiPacketReader(ReplayDevice(packets)) for packets in sources]
+    with AcquisitionManager(readers) as acquisition:
+        received = list(acquisition)
+    assert sorted(packet.device for packet in received) == [0] * 5 + [1] * 5
+    for index, packets in enumerate(sources):
+        assert [bytes(packet.packet) for packet in received if packet.device == index] == packets
+    assert all(worker.error is None for worker in acquisition.workers)
+
+
+def test_iteration_raises_worker_errors() -> None:
+    readers = [
+        SpiPacketReader(ReplayDevice(list(itertools.islice(synthetic_packets(), 3)))),
+        SpiPacketReader(FailingDevice(synthetic_packets())),
+    ]
+    with AcquisitionManager(readers) as acquisition, pytest.raises(OSError, match="unplugged"):
+        for _ in acquisition:
+            pass
@@ -0,0 +1,47 @@
+import ctypes
+import os
+
+import pytest
+
+from ctsgen3.pipeline.pipeline import ProcessPipeline
+from ctsgen3.spi.spi import SpiSection, spi_packet_type
+
+PACKET_TYPE = spi_packet_type(SpiSection.METADATA)
+
+
+def first_byte(packet: ctypes.Structure) -> int:
+    return bytes(packet)[0]
+
+
+def exit_on_zero(packet: ctypes.Structure) -> int:
+    if bytes(packet)[0] == 0:
+        os._exit(3)
+    return bytes(packet)[0]
+
+
+def packet(value: int) -> bytes:
+    return bytes([value]) * ctypes.sizeof(PACKET_TYPE)
+
+
+def test_results_in_submission_order() -> None:
+    with ProcessPipeline(first_byte, workers=2, packet_type=PACKET_TYPE, block=True) as pipeline:
+        for value in range(20):
+            assert pipeline.submit(packet(value), timeout=5.0)
+        assert [pipeline.get(timeout=5.0) for _ in range(20)] == list(enumerate(range(20)))
+        assert sum(pipeline.processed) == 20 and pipeline.in_flight == 0
+
+
+def test_dead_worker_fails_get() -> None:
+    with ProcessPipeline(exit_on_zero, workers=2, packet_type=PACKET_TYPE) as pipeline:
+        pipeline.submit(packet(0))
+        with pytest.raises(RuntimeError, match="exited with code 3"):
+            pipeline.get(timeout=5.0)
+        with pytest.raises(RuntimeError):
+            pipeline.submit(packet(1))
+
+
+def test_dead_worker_fails_blocked_submit() -> None:
+    with ProcessPipeline(exit_on_zero, workers=1, capacity=1, packet_type=PACKET_TYPE, block=True) as pipeline:
+        pipeline.submit(packet(0))
+        with pytest.raises(RuntimeError, match="exited with code 3"):
+            pipeline.submit(packet(1), timeout=5.0)
@@ -0,0 +1,148 @@
+import ctypes
+import itertools
+import time
+from typing import Any, List
+
+import pytest
+
+from ctsgen3.device.device import Ft4222Device, ReplayDevice, synthetic_packets
+from ctsgen3.registers.registers import CIS_frame_rate_enum
+from ctsgen3.spi.reader import SpiPacketReader
+from ctsgen3.spi.spi import SpiPacket, SpiSection, spi_packet_type
+
+
+class FlakyDevice(ReplayDevice):
+    """
+    Corrupts the first `failures` transfers, each taking `delay` seconds.
+    """
+
+    def __init__(self, failures: int, delay: float = 0.0) -> None:
+        super().__init__(synthetic_packets())
+        self.failures = failures
+        self.delay = delay
+
+    def transfer(self, tx: bytes) -> bytes:
+        time.sleep(self.delay)
+        rx = super().transfer(tx)
+        if self.failures:
+            self.failures -= 1
+            return corrupt(rx, 0)
+        return rx
+
+
+def corrupt(packet: bytes, offset: int) -> bytes:
+    corrupted = bytearray(packet)
+    corrupted[offset] ^= 1
+    return bytes(corrupted)
+
+
+def test_read_valid_packets() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 3))
+    reader = SpiPacketReader(ReplayDevice(packets))
+    for packet in packets:
+        assert reader.read() == SpiSection(0)
+        assert bytes(reader.packet) == packet
+    assert (reader.num_reads, reader.num_invalid, reader.num_wrong_length) == (3, 0, 0)
+
+
+def test_read_counts_section_failures() -> None:
+    packet = next(synthetic_packets())
+    reader = SpiPacketReader(ReplayDevice([corrupt(packet, SpiPacket.metadata.offset)]))
+    target = SpiPacket()
+    assert reader.read_into(target) == SpiSection.METADATA
+    assert bytes(target) == corrupt(packet, SpiPacket.metadata.offset)
+    assert reader.num_invalid == 1
+    assert reader.section_failures[SpiSection.METADATA] == 1
+    assert sum(reader.section_failures.values()) == 1
+
+
+def test_wrong_length_fails_every_section() -> None:
+    packet = next(synthetic_packets())
+    reader = SpiPacketReader(ReplayDevice([packet], short_read_rate=1.0, seed=0))
+    assert reader.read() == SpiSection(15)
+    assert reader.num_wrong_length == 1 and reader.num_invalid == 1
+    assert all(count == 1 for count in reader.section_failures.values())
+
+
+def test_section_subset() -> None:
+    packet_type = spi_packet_type(SpiSection.THERMAL_FRAME | SpiSection.CV_DETECTIONS)
+    packets = list(itertools.islice(synthetic_packets(packet_type), 4))
+    reader = SpiPacketReader(ReplayDevice(packets), packet_type)
+    assert set(reader.section_failures) == {SpiSection.THERMAL_FRAME, SpiSection.CV_DETECTIONS}
+    assert [bytes(packet) for packet in reader] == packets
+    assert reader.frame_count is None  # no metadata to track
+
+
+def test_open(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: List[Any] = []
+
+    def open(description: str, *args: Any) -> ReplayDevice:
+        calls.append((description, *args))
+        return ReplayDevice([])
+
+    monkeypatch.setattr(Ft4222Device, "open", open)
+    with SpiPacketReader.open("FT4222 B", max_retries=1) as reader:
+        assert isinstance(reader.device, ReplayDevice) and reader.max_retries == 1
+        assert ctypes.sizeof(reader.packet) == ctypes.sizeof(SpiPacket)
+    assert calls == [("FT4222 B", None, None)]
+
+
+def test_retry_reads_the_same_frame() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 200))
+    reader = SpiPacketReader(ReplayDevice(packets, crc_error_rate=0.2, short_read_rate=0.1, seed=1))
+    assert [bytes(packet) for packet in reader] == packets
+    assert reader.num_recovered > 0 and reader.num_invalid > reader.num_recovered
+    assert reader.sequence.num_missed == 0 and reader.num_duplicates == 0
+
+
+def test_duplicates_are_dropped() -> None:
+    device = ReplayDevice(synthetic_packets(), fps=100.0, data_ready=False)
+    reader = SpiPacketReader(device, fps=800.0)  # polls faster than frames are produced
+    frame_counts: List[int] = []
+    for _ in range(5):
+        assert reader.next_frame(reader.packet, timeout=1.0)
+        frame_counts.append(reader.packet.metadata.metadata.GLOBAL_FRM_CNT_0x02.frame_count)
+    assert frame_counts == sorted(set(frame_counts))
+    assert reader.num_duplicates > 0
+    assert reader.sequence.num_new == 5
+
+
+def test_paced_by_frame_rate_mode() -> None:
+    device = ReplayDevice(synthetic_packets(frame_rate=CIS_frame_rate_enum.FPS_60), fps=60.0, data_ready=False)
+    reader = SpiPacketReader(device)
+    assert reader.frame_period == 0.0
+    start = time.monotonic()
+    for _ in range(7):
+        assert reader.next_frame(reader.packet, timeout=1.0)
+    assert reader.frame_period == pytest.approx(1 / 60)
+    assert time.monotonic() - start >= 5 / 60
+    assert device.num_transfers < 7 * 3  # waits for the frame period rather than spinning
+    assert reader.sequence.num_gaps == 0
+
+
+def test_paced_by_data_ready() -> None:
+    device = ReplayDevice(synthetic_packets(), fps=100.0)
+    reader = SpiPacketReader(device)
+    assert reader.wait_frame(1.0)
+    frame_counts: List[int] = []
+    for _ in range(5):
+        assert reader.next_frame(reader.packet, timeout=1.0)
+        frame_counts.append(reader.packet.metadata.metadata.GLOBAL_FRM_CNT_0x02.frame_count)
+    assert frame_counts == sorted(set(frame_counts))
+    assert device.num_transfers == 5 + reader.num_duplicates
+
+
+@pytest.mark.parametrize("failures, recovered, lost, reads", [(0, 0, 0, 1), (2, 1, 0, 3), (3, 1, 0, 4), (4, 0, 1, 4)])
+def test_read_frame_retries(failures: int, recovered: int, lost: int, reads: int) -> None:
+    reader = SpiPacketReader(FlakyDevice(failures), max_retries=3)
+    assert bool(reader.read_frame(reader.packet)) == bool(lost)
+    assert (reader.num_recovered, reader.num_lost, reader.num_reads) == (recovered, lost, reads)
+
+
+def test_no_retry_after_the_frame_period() -> None:
+    reader = SpiPacketReader(FlakyDevice(failures=5, delay=0.02), fps=100.0)  # a transfer takes 2 frame periods
+    assert reader.read_frame(reader.packet) == SpiSection.THERMAL_FRAME
+    assert (reader.num_reads, reader.num_lost) == (1, 1)
+    reader.fps = 5.0
+    assert reader.read_frame(reader.packet) == SpiSection.THERMAL_FRAME  # 3 retries fit in the period
+    assert (reader.num_reads, reader.num_lost) == (5, 2)
@@ -0,0 +1,68 @@
+import ctypes
+import pathlib
+from typing import List
+
+import numpy as np
+import pytest
+
+from ctsgen3.recording.recording import Recorder, Recording
+from ctsgen3.spi.crc import update_crcs
+from ctsgen3.spi.spi import SpiPacket, SpiSection, spi_packet_type
+
+
+def write_recording(path: pathlib.Path, count: int, sections: SpiSection = SpiSection(15)) -> List[bytes]:
+    packet_type = spi_packet_type(sections)
+    rng = np.random.default_rng(0)
+    packets = []
+    with Recorder(path, packet_type) as recorder:
+        for index in range(count):
+            packet = packet_type.from_buffer_copy(rng.integers(0, 256, ctypes.sizeof(packet_type), np.uint8).tobytes())
+            update_crcs(packet)
+            recorder.write(packet, SpiSection.METADATA if index % 4 == 3 else SpiSection(0), 100.0 + index)
+            packets.append(bytes(packet))
+    return packets
+
+
+def test_round_trip(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.cts"
+    packets = write_recording(path, 10)
+    recording = Recording(path)
+    assert recording.packet_type is SpiPacket
+    assert len(recording) == 10
+    assert [bytes(recording.packet(index)) for index in range(10)] == packets
+    assert recording.timestamps.tolist() == [100.0 + index for index in range(10)]
+    assert len(recording.time_slice(102.0, 105.0)) == 3
+    assert sum(len(chunk) for chunk in recording.chunks(4, valid_only=True)) == 8
+
+
+def test_packet_negative_and_out_of_range_index(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.cts"
+    packets = write_recording(path, 3, SpiSection.THERMAL_FRAME | SpiSection.METADATA)
+    recording = Recording(path)
+    assert bytes(recording.packet(-1)) == packets[-1]
+    assert bytes(recording.packet(-3)) == packets[0]
+    with pytest.raises(IndexError):
+        recording.packet(3)
+    with pytest.raises(IndexError):
+        recording.packet(-4)
+
+
+def test_partial_record_and_empty_recording(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.cts"
+    packets = write_recording(path, 2)
+    with open(path, "ab") as file:
+        file.write(packets[0][:100])  # killed mid write
+    assert len(Recording(path)) == 2
+    write_recording(path, 0)
+    recording = Recording(path)
+    assert len(recording) == 0
+    with pytest.raises(IndexError):
+        recording.packet(-1)
+
+
+def test_not_a_recording(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.cts"
+    with open(path, "wb") as file:
+        file.write(bytes(64))
+    with pytest.raises(ValueError):
+        Recording(path)
@@ -0,0 +1,47 @@
+import itertools
+
+import numpy as np
+
+from ctsgen3.device.device import ReplayDevice, synthetic_packets
+from ctsgen3.spi.reader import SpiPacketReader
+from ctsgen3.spi.ring import SpiPacketRing
+from ctsgen3.spi.spi import PIXEL_HEIGHT, PIXEL_WIDTH, SpiSection, spi_packet_type
+
+
+def test_views_alias_the_buffer() -> None:
+    ring = SpiPacketRing(3)
+    assert ring.thermal_frames is not None and ring.cv_foregrounds is not None
+    assert ring.thermal_frames.shape == (3, PIXEL_HEIGHT, PIXEL_WIDTH)
+    ring.packets[1].thermal_frame.thermal_frame[PIXEL_WIDTH + 2] = -5
+    ring.packets[2].metadata.crc = 0x1234
+    assert ring.thermal_frames[1, 1, 2] == -5
+    assert ring.records[2]["metadata"]["crc"] == 0x1234
+    assert np.shares_memory(ring.records, ring.buffer) and np.shares_memory(ring.thermal_frames, ring.buffer)
+
+
+def test_claim_and_commit_wrap() -> None:
+    ring = SpiPacketRing(3)
+    assert ring.latest == -1 and len(ring) == 0
+    slots = []
+    for _ in range(5):
+        assert ring.claim() is ring.packets[ring.count % 3]
+        slots.append(ring.commit())
+    assert slots == [0, 1, 2, 0, 1]
+    assert ring.latest == 1 and len(ring) == 3 and ring.count == 5
+
+
+def test_reads_into_slots() -> None:
+    packets = list(itertools.islice(synthetic_packets(), 5))
+    reader = SpiPacketReader(ReplayDevice(packets))
+    ring = SpiPacketRing(4)
+    for _ in packets:
+        assert not reader.read_into(ring.claim())
+        ring.commit()
+    assert ring.buffer[0].tobytes() == packets[4]
+    assert [ring.buffer[slot].tobytes() for slot in range(1, 4)] == packets[1:4]
+
+
+def test_section_subset_has_no_foreground() -> None:
+    ring = SpiPacketRing(2, spi_packet_type(SpiSection.THERMAL_FRAME | SpiSection.METADATA))
+    assert ring.thermal_frames is not None and ring.cv_foregrounds is None
+    assert ring.thermal_frames.shape == (2, PIXEL_HEIGHT, PIXEL_WIDTH)
@@ -0,0 +1,72 @@
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+
+from ctsgen3.registers.dtypes import REGISTER_MAP_DTYPE
+from ctsgen3.registers.registers import CIS_frame_rate_enum, RegisterMap
+from ctsgen3.spi.sequence import FrameSequence, SequenceTracker, classify_frame_counts
+
+
+def metadata(frame_count: int, cmos_frame_count: int = 0) -> RegisterMap:
+    registers = RegisterMap()
+    registers.GLOBAL_FRM_CNT_0x02.frame_count = frame_count % (1 << 32)
+    registers.CMOS_FRAME_CNT_ADDR_0x3F.cmos_frame_count = cmos_frame_count % (1 << 32)
+    registers.CTS_CTRL_0x1F.FRAME_RATE_MODE = CIS_frame_rate_enum.FPS_1
+    return registers
+
+
+def track(counts: List[Tuple[int, int]]) -> Tuple[SequenceTracker, List[FrameSequence]]:
+    tracker = SequenceTracker()
+    return tracker, [tracker.update(metadata(*count), float(time)) for time, count in enumerate(counts)]
+
+
+def test_counter_reset_counts_once() -> None:
+    tracker, sequence = track([(count, count) for count in [100, 101, 102, 0, 1]])
+    assert sequence == [FrameSequence.NEW] * 5
+    assert tracker.num_new == 5
+    assert tracker.num_resets == 1
+    assert tracker.effective_fps == 1.0
+    assert tracker.sensor_fps == 1.0
+
+
+def test_gaps_and_duplicates() -> None:
+    tracker, sequence = track([(5, 5), (6, 6), (6, 6), (9, 9), (10, 10)])
+    assert sequence == [
+        FrameSequence.NEW,
+        FrameSequence.NEW,
+        FrameSequence.DUPLICATE,
+        FrameSequence.GAP,
+        FrameSequence.NEW,
+    ]
+    assert (tracker.num_new, tracker.num_duplicates, tracker.num_gaps, tracker.num_missed) == (4, 1, 1, 2)
+    assert tracker.configured_fps == 1.0
+
+
+def test_wrap_around_is_not_a_reset() -> None:
+    tracker, sequence = track([((1 << 32) - 2 + count, count) for count in range(4)])
+    assert sequence == [FrameSequence.NEW] * 4
+    assert tracker.num_resets == 0 and tracker.sensor_fps == 1.0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorised_classification_matches_tracker(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    counts = [(int(rng.integers(1 << 32)), 0)]
+    for _ in range(300):
+        frame_count, cmos_frame_count = counts[-1]
+        step = int(rng.choice([0, 0, 1, 1, 1, 2, 5, -40]))
+        counts.append((frame_count + step, cmos_frame_count + int(step != 0 or rng.random() < 0.3)))
+    _, expected = track(counts)
+    records = np.frombuffer(b"".join(bytes(metadata(*count)) for count in counts), REGISTER_MAP_DTYPE)
+    result = classify_frame_counts(
+        records["GLOBAL_FRM_CNT_0x02"]["frame_count"], records["CMOS_FRAME_CNT_ADDR_0x3F"]["cmos_frame_count"]
+    )
+    assert result.tolist() == [int(sequence) for sequence in expected]
+    assert FrameSequence.DUPLICATE in expected and FrameSequence.GAP in expected
+
+
+def test_vectorised_duplicates_need_both_counters() -> None:
+    frame_counts = np.array([5, 6, 6, 6, 9, 10, 0], np.uint32)
+    cmos_frame_counts = np.array([5, 6, 6, 7, 10, 11, 12], np.uint32)
+    assert classify_frame_counts(frame_counts, cmos_frame_counts).tolist() == [0, 0, 1, 0, 2, 0, 0]
@@ -0,0 +1,58 @@
+import pytest
+
+from ctsgen3.registers.registers import RegisterMap
+from ctsgen3.registers.snapshot import STATIC_REGISTERS, RegisterSnapshot, RegisterTracker
+
+
+def registers(frame_count: int, exposure: int = 100, serial: int = 7) -> RegisterMap:
+    result = RegisterMap()
+    result.GLOBAL_FRM_CNT_0x02.frame_count = frame_count
+    result.EXPOSURE_0x05.exposure = exposure
+    result.SERIAL_NUMBER_LO_0x14.serial_lo = serial
+    return result
+
+
+def test_decodes_like_register_map() -> None:
+    snapshot = RegisterSnapshot(registers(5, exposure=42))
+    assert snapshot.GLOBAL_FRM_CNT_0x02.frame_count == 5
+    assert snapshot.EXPOSURE_0x05.exposure == 42
+    assert snapshot.EXPOSURE_0x05 is snapshot.EXPOSURE_0x05  # decoded once
+    assert bytes(snapshot.register_map()) == bytes(registers(5, exposure=42))
+    assert "EXPOSURE_0x05" in dir(snapshot)
+    assert not hasattr(snapshot, "NOT_A_REGISTER")
+    with pytest.raises(ValueError):
+        RegisterSnapshot(b"\0" * 8)
+
+
+def test_changed_and_reuse() -> None:
+    first = RegisterSnapshot(registers(1))
+    assert first.changed == frozenset(name for name, *_ in RegisterMap._fields_)
+    exposure = first.EXPOSURE_0x05
+    second = RegisterSnapshot(registers(2), first)
+    assert second.changed == {"GLOBAL_FRM_CNT_0x02"}
+    assert list(second.changed_registers()) == ["GLOBAL_FRM_CNT_0x02"]
+    assert second.EXPOSURE_0x05 is exposure
+    third = RegisterSnapshot(registers(2), second)
+    assert third.changed == frozenset()
+    fourth = RegisterSnapshot(registers(3, exposure=200), third)
+    assert fourth.changed == {"GLOBAL_FRM_CNT_0x02", "EXPOSURE_0x05"}
+    assert fourth.EXPOSURE_0x05.exposure == 200
+
+
+def test_static_registers_are_shared_per_device() -> None:
+    assert "SERIAL_NUMBER_LO_0x14" in STATIC_REGISTERS
+    one, other = RegisterSnapshot(registers(1, serial=1001)), RegisterSnapshot(registers(9, serial=1001))
+    assert one.FW_VERSION_0x16 is other.FW_VERSION_0x16
+    assert RegisterSnapshot(registers(1, serial=1002)).FW_VERSION_0x16 is not one.FW_VERSION_0x16
+
+
+def test_tracker_keeps_one_snapshot_of_history() -> None:
+    tracker = RegisterTracker()
+    first = tracker.update(registers(1))
+    second = tracker.update(bytes(registers(2)))
+    assert second.changed == {"GLOBAL_FRM_CNT_0x02"}
+    third = tracker.update(registers(3, exposure=5))
+    assert third.changed == {"GLOBAL_FRM_CNT_0x02", "EXPOSURE_0x05"}
+    assert tracker.snapshot is third
+    assert first._previous is None and second._previous is None and third._previous is second
+    assert second.changed == {"GLOBAL_FRM_CNT_0x02"}  # settled before its link was dropped
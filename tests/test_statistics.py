@@ -0,0 +1,68 @@
+import pathlib
+
+import numpy as np
+
+from ctsgen3.analysis.statistics import PixelStatistics, RecordingStatistics, recording_statistics
+from ctsgen3.conversion.conversion import FRAME_SHAPE, frames_to_float
+from ctsgen3.recording.recording import Recording
+from ctsgen3.spi.spi import SpiSection
+from tests.test_recording import write_recording
+
+
+def test_chunked_update_matches_numpy() -> None:
+    frames = np.random.default_rng(0).normal(25.0, 0.1, (1000,) + FRAME_SHAPE)
+    pixels = PixelStatistics()
+    for chunk in np.array_split(frames, 7):
+        pixels.update(chunk)
+    pixels.update(frames[:0])
+    assert pixels.count == 1000
+    assert np.allclose(pixels.mean, frames.mean(axis=0))
+    assert np.allclose(pixels.variance, frames.var(axis=0, ddof=1))
+    assert np.array_equal(pixels.min, frames.min(axis=0)) and np.array_equal(pixels.max, frames.max(axis=0))
+
+
+def test_merge_matches_single_pass() -> None:
+    frames = np.random.default_rng(1).normal(30.0, 2.0, (200,) + FRAME_SHAPE)
+    whole, first, second = PixelStatistics(), PixelStatistics(), PixelStatistics()
+    whole.update(frames)
+    first.update(frames[:50])
+    second.update(frames[50:])
+    first.merge(second)
+    first.merge(PixelStatistics())
+    assert first.count == whole.count
+    assert np.allclose(first.mean, whole.mean) and np.allclose(first.m2, whole.m2)
+    assert np.isclose(first.netd, whole.netd) and np.isclose(first.spatial_noise, whole.spatial_noise)
+
+
+def test_single_frame_variance_is_nan() -> None:
+    pixels = PixelStatistics()
+    pixels.update(np.zeros((1,) + FRAME_SHAPE))
+    assert np.isnan(pixels.variance).all()
+
+
+def test_recording_statistics(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.cts"
+    write_recording(path, 10)
+    recording = Recording(path)
+    statistics = recording_statistics(recording, chunk_size=3)
+    records = recording.records[recording.records["crc_failures"] == 0]
+    frames = frames_to_float(records["packet"]["thermal_frame"]["thermal_frame"])
+    assert statistics.pixels.count == len(records) == 8
+    assert np.allclose(statistics.pixels.mean, frames.mean(axis=0))
+    table = statistics.frames
+    assert table["timestamp"].tolist() == records["timestamp"].tolist()
+    assert np.allclose(table["max"], frames.max(axis=(1, 2)))
+    metadata = records["packet"]["metadata"]["metadata"]
+    assert table["exposure"].tolist() == metadata["EXPOSURE_0x05"]["exposure"].tolist()
+    assert set(statistics.correlation()) == {"exposure", "luminosity", "image_sensor_temp"}
+    assert statistics.summary().startswith("8 frames")
+
+
+def test_recording_without_metadata(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "capture.cts"
+    write_recording(path, 4, SpiSection.THERMAL_FRAME)
+    statistics = RecordingStatistics()
+    for chunk in Recording(path).chunks(2):
+        statistics.update(chunk)
+    assert len(statistics.frames) == 4
+    assert np.isnan(statistics.frames["exposure"]).all()